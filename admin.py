@@ -1,69 +1,23 @@
 import streamlit as st
-import pandas as pd
 from data_manager import (
-    get_all_listings, 
+    get_listings_page,
+    count_listings,
+    get_category_counts,
     approve_listing,
     delete_listing,
-    get_analytics_data,
-    get_listing_by_id
+    enrich_with_listings
 )
+from dashboard_metrics import get_dashboard_metrics
 import plotly.express as px
 from datetime import datetime, timedelta
-from utils import apply_page_styling
+from utils import get_page_offset, render_pagination
+from instrumentation import INSTRUMENTATION_ENABLED, get_timings, get_timings_since, reset_timings
+
+# Number of listings shown per page in listing management
+ADMIN_LISTINGS_PER_PAGE = 20
 
 def render_admin_dashboard():
     """Render the admin dashboard."""
-    # Apply consistent styling for the admin dashboard
-    apply_page_styling()
-    
-    # Add admin-specific styling
-    st.markdown("""
-    <style>
-        /* Admin dashboard section styling */
-        .admin-card {
-            background-color: white;
-            padding: 20px;
-            border-radius: 10px;
-            border: 1px solid #e0e0e0;
-            margin-bottom: 20px;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-        }
-        
-        /* Stats counter styling */
-        .stat-counter {
-            background-color: #F8F9FA;
-            padding: 15px;
-            border-radius: 8px;
-            text-align: center;
-            border-left: 4px solid #4361EE;
-        }
-        
-        /* Listing table styling */
-        .styled-table {
-            width: 100%;
-            border-collapse: collapse;
-            margin-bottom: 20px;
-            font-size: 14px;
-        }
-        .styled-table th {
-            background-color: #F0F3FF;
-            padding: 12px 15px;
-            text-align: left;
-            border-bottom: 2px solid #4361EE;
-        }
-        .styled-table td {
-            padding: 10px 15px;
-            border-bottom: 1px solid #e0e0e0;
-        }
-        .styled-table tr:nth-child(even) {
-            background-color: #F8F9FA;
-        }
-        .styled-table tr:hover {
-            background-color: #F0F3FF;
-        }
-    </style>
-    """, unsafe_allow_html=True)
-    
     st.title("Admin Dashboard")
     
     # Admin tabs with enhanced styling
@@ -82,10 +36,10 @@ def render_listing_management():
     """Render the listing management section."""
     st.header("Listing Management")
     
-    # Get all listings including unapproved ones
-    listings = get_all_listings(approved_only=False)
+    # Counts are popcounts over the cached bitmap indexes
+    total_listings = count_listings()
     
-    if listings.empty:
+    if total_listings == 0:
         st.info("No listings available.")
         return
     
@@ -94,7 +48,6 @@ def render_listing_management():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        total_listings = len(listings)
         st.markdown(f"""
         <div class="stat-counter">
             <h4 style="margin-bottom: 5px;">Total Listings</h4>
@@ -103,7 +56,7 @@ def render_listing_management():
         """, unsafe_allow_html=True)
     
     with col2:
-        approved_count = len(listings[listings["approved"] == True])
+        approved_count = count_listings(approved=True)
         st.markdown(f"""
         <div class="stat-counter" style="border-left-color: #2EC4B6;">
             <h4 style="margin-bottom: 5px;">Approved</h4>
@@ -112,7 +65,7 @@ def render_listing_management():
         """, unsafe_allow_html=True)
     
     with col3:
-        pending_count = len(listings[listings["approved"] == False])
+        pending_count = count_listings(approved=False)
         st.markdown(f"""
         <div class="stat-counter" style="border-left-color: #FF9F1C;">
             <h4 style="margin-bottom: 5px;">Pending</h4>
@@ -133,28 +86,27 @@ def render_listing_management():
         )
     
     with col2:
-        categories = listings["category"].unique()
+        categories = get_category_counts(approved_only=False)
         filter_category = st.selectbox(
             "Filter by Category",
             ["All"] + list(categories)
         )
     st.markdown('</div>', unsafe_allow_html=True)
     
-    # Apply filters
-    filtered_listings = listings.copy()
-    
-    if filter_status == "Approved":
-        filtered_listings = filtered_listings[filtered_listings["approved"] == True]
-    elif filter_status == "Pending":
-        filtered_listings = filtered_listings[filtered_listings["approved"] == False]
-    
-    if filter_category != "All":
-        filtered_listings = filtered_listings[filtered_listings["category"] == filter_category]
+    # Apply filters as one AND of the status and category bitmaps, a page at a time
+    approved = {"All": None, "Approved": True, "Pending": False}[filter_status]
+    category = None if filter_category == "All" else filter_category
+    page_key = f"admin_{filter_status}_{filter_category}"
+    matching = count_listings(approved=approved, category=category)
+    offset = get_page_offset(page_key, ADMIN_LISTINGS_PER_PAGE, matching)
+    filtered_listings, matching = get_listings_page(
+        ADMIN_LISTINGS_PER_PAGE, offset, approved=approved, category=category
+    )
     
     # Display listings with actions in a styled card
     st.markdown('<div class="admin-card">', unsafe_allow_html=True)
     st.markdown("<h3>Manage Listings</h3>", unsafe_allow_html=True)
-    st.markdown(f"<p>Showing {len(filtered_listings)} listings</p>", unsafe_allow_html=True)
+    st.markdown(f"<p>Showing {len(filtered_listings)} of {matching} listings</p>", unsafe_allow_html=True)
     
     # Display listings with actions
     for i, row in filtered_listings.iterrows():
@@ -189,21 +141,18 @@ def render_listing_management():
                     st.success("Listing deleted!")
                     st.rerun()
     
+    render_pagination(matching, ADMIN_LISTINGS_PER_PAGE, page_key)
+    
     st.markdown('</div>', unsafe_allow_html=True)
 
 def render_analytics():
     """Render the analytics section."""
     st.header("Analytics Dashboard")
     
-    analytics_data = get_analytics_data()
-    
-    if analytics_data.empty:
+    if get_dashboard_metrics().total_views == 0:
         st.info("No analytics data available yet.")
         return
     
-    # Convert timestamp to datetime
-    analytics_data["timestamp"] = pd.to_datetime(analytics_data["timestamp"])
-    
     # Date filter in a styled card
     st.markdown('<div class="admin-card">', unsafe_allow_html=True)
     st.markdown("<h3>Filter Data</h3>", unsafe_allow_html=True)
@@ -222,16 +171,16 @@ def render_analytics():
         )
     st.markdown('</div>', unsafe_allow_html=True)
     
-    # Filter by date
-    filtered_data = analytics_data[
-        (analytics_data["timestamp"].dt.date >= start_date) &
-        (analytics_data["timestamp"].dt.date <= end_date)
-    ]
+    # Every metric for the selected range, computed once and shared across sessions
+    metrics = get_dashboard_metrics(start_date, end_date)
+    total_views = metrics.total_views
     
-    if filtered_data.empty:
+    if total_views == 0:
         st.info("No data available for the selected date range.")
         return
     
+    type_views = metrics.type_views()
+    
     # Overview stats
     st.markdown('<div class="admin-card">', unsafe_allow_html=True)
     st.markdown("<h3>Overview</h3>", unsafe_allow_html=True)
@@ -240,7 +189,6 @@ def render_analytics():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        total_views = len(filtered_data)
         st.markdown(f"""
         <div class="stat-counter">
             <h4 style="margin-bottom: 5px;">Total Views</h4>
@@ -249,7 +197,7 @@ def render_analytics():
         """, unsafe_allow_html=True)
     
     with col2:
-        premium_views = len(filtered_data[filtered_data["listing_type"] == "premium"])
+        premium_views = metrics.premium_views
         st.markdown(f"""
         <div class="stat-counter" style="border-left-color: #FF5722;">
             <h4 style="margin-bottom: 5px;">Premium Views</h4>
@@ -258,7 +206,7 @@ def render_analytics():
         """, unsafe_allow_html=True)
     
     with col3:
-        standard_views = len(filtered_data[filtered_data["listing_type"] == "standard"])
+        standard_views = metrics.standard_views
         st.markdown(f"""
         <div class="stat-counter" style="border-left-color: #6c757d;">
             <h4 style="margin-bottom: 5px;">Standard Views</h4>
@@ -273,8 +221,7 @@ def render_analytics():
     st.markdown("<h3>Traffic Analysis</h3>", unsafe_allow_html=True)
     
     # Views by day
-    daily_views = filtered_data.groupby(filtered_data["timestamp"].dt.date).size().reset_index()
-    daily_views.columns = ["Date", "Views"]
+    daily_views = metrics.daily_views()
     
     # Update chart styling
     fig1 = px.line(
@@ -311,11 +258,7 @@ def render_analytics():
     col1, col2 = st.columns(2)
     
     with col1:
-        # Views by listing type
-        type_views = filtered_data.groupby("listing_type").size().reset_index()
-        type_views.columns = ["Listing Type", "Views"]
-        
-        # Update pie chart styling
+        # Views by listing type, with updated pie chart styling
         fig2 = px.pie(
             type_views, 
             values="Views", 
@@ -337,14 +280,10 @@ def render_analytics():
     
     with col2:
         # Top listings
-        top_listings = filtered_data.groupby("listing_id").size().reset_index()
-        top_listings.columns = ["Listing ID", "Views"]
-        top_listings = top_listings.sort_values("Views", ascending=False).head(5)
+        top_listings = metrics.top_listings(limit=5)
         
         # Add listing names
-        top_listings["Listing Name"] = top_listings["Listing ID"].apply(
-            lambda x: get_listing_by_id(x)["name"] if get_listing_by_id(x) is not None else "Unknown"
-        )
+        top_listings = enrich_with_listings(top_listings, "Listing ID", {"name": "Listing Name"})
         
         # Create bar chart for top listings
         fig3 = px.bar(
@@ -381,14 +320,10 @@ def render_analytics():
     st.markdown("<h3>Top Listings by Views</h3>", unsafe_allow_html=True)
     
     # Get top 10 listings
-    top_listings = filtered_data.groupby("listing_id").size().reset_index()
-    top_listings.columns = ["Listing ID", "Views"]
-    top_listings = top_listings.sort_values("Views", ascending=False).head(10)
+    top_listings = metrics.top_listings(limit=10)
     
     # Add listing names
-    top_listings["Listing Name"] = top_listings["Listing ID"].apply(
-        lambda x: get_listing_by_id(x)["name"] if get_listing_by_id(x) is not None else "Unknown"
-    )
+    top_listings = enrich_with_listings(top_listings, "Listing ID", {"name": "Listing Name"})
     
     # Display enhanced table
     st.dataframe(
@@ -402,7 +337,7 @@ def render_analytics():
     with col1:
         st.download_button(
             "Export to CSV",
-            top_listings.to_csv(index=False).encode('utf-8'),
+            top_listings[["Listing ID", "Views", "Listing Name"]].to_csv(index=False).encode('utf-8'),
             "listing_analytics.csv",
             "text/csv",
             key='download-csv'
@@ -559,3 +494,38 @@ def render_settings():
         st.success("Appearance settings saved successfully!")
     
     st.markdown('</div>', unsafe_allow_html=True)
+    
+    render_performance()
+
+def render_performance():
+    """Render the slowest functions and pages recorded by the instrumentation."""
+    st.markdown('<div class="admin-card">', unsafe_allow_html=True)
+    st.markdown("<h3>Performance</h3>", unsafe_allow_html=True)
+    
+    if not INSTRUMENTATION_ENABLED:
+        st.info("Timing is off. Start the app with DIRECTORY_INSTRUMENTATION=1 to record how long each page run and data function takes.")
+        st.markdown('</div>', unsafe_allow_html=True)
+        return
+    
+    since = datetime.fromtimestamp(get_timings_since())
+    st.markdown(f"<p>Recorded in this process since {since.strftime('%Y-%m-%d %H:%M:%S')}, most total time first. Function times include the functions they call.</p>", unsafe_allow_html=True)
+    
+    timings = get_timings().round(2)
+    if timings.empty:
+        st.info("No calls recorded yet.")
+    else:
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("<h4>Pages</h4>", unsafe_allow_html=True)
+            pages = timings[timings["Kind"] == "page"].drop(columns="Kind")
+            st.dataframe(pages.head(10), use_container_width=True, hide_index=True)
+        
+        with col2:
+            st.markdown("<h4>Functions</h4>", unsafe_allow_html=True)
+            functions = timings[timings["Kind"] == "function"].drop(columns="Kind")
+            st.dataframe(functions.head(15), use_container_width=True, hide_index=True)
+    
+    st.button("Reset Timings", key="reset_timings", on_click=reset_timings, use_container_width=True)
+    
+    st.markdown('</div>', unsafe_allow_html=True)
@@ -0,0 +1,178 @@
+import os
+import re
+import shutil
+from datetime import date, timedelta
+
+import pandas as pd
+from atomic_file import atomic_write
+from columnar import ANALYTICS_DATES, ANALYTICS_DTYPES, read_table
+from file_lock import file_locked
+from io_stats import record_io
+
+# Page views are stored as one CSV partition per day: data/analytics/YYYY-MM-DD.csv
+PAGE_VIEWS_DIR = "data/analytics"
+PAGE_VIEW_COLUMNS = ["timestamp", "listing_id", "listing_type"]
+
+# Written once the legacy single-file log has been split into partitions
+MIGRATED_MARKER = ".migrated"
+MIGRATION_LOCK = ".migrate.lock"
+MIGRATION_STAGING = ".migrating"
+
+PARTITION_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2})\.csv$")
+
+
+def partition_path(day, directory=PAGE_VIEWS_DIR):
+    """Get the partition file for a day (a date or YYYY-MM-DD string)."""
+    return os.path.join(directory, f"{str(day)[:10]}.csv")
+
+
+def event_partition(event, directory=PAGE_VIEWS_DIR):
+    """Get the partition file an event belongs to, from its timestamp."""
+    return partition_path(event["timestamp"][:10], directory)
+
+
+def list_partitions(start=None, end=None, directory=PAGE_VIEWS_DIR):
+    """Get ``(day, path)`` pairs for partitions in a date range, oldest first.
+
+    Partitions are pruned by file name, so files outside the range are
+    never opened.
+    """
+    if not os.path.isdir(directory):
+        return []
+    start = str(start) if start is not None else ""
+    end = str(end) if end is not None else "9999-12-31"
+    partitions = []
+    for name in os.listdir(directory):
+        match = PARTITION_PATTERN.match(name)
+        if match and start <= match.group(1) <= end:
+            partitions.append((match.group(1), os.path.join(directory, name)))
+    return sorted(partitions)
+
+
+def read_partitions(start=None, end=None, directory=PAGE_VIEWS_DIR, columns=None):
+    """Read the page views between two dates, inclusive.
+
+    Timestamps are parsed and listing types are categorical. Partitions
+    with a fresh Parquet snapshot are read from it, loading only
+    ``columns`` when given.
+    """
+    frames = [
+        read_table(path, columns, ANALYTICS_DTYPES, ANALYTICS_DATES)
+        for _, path in list_partitions(start, end, directory)
+    ]
+    if not frames:
+        return pd.DataFrame(columns=columns or PAGE_VIEW_COLUMNS)
+    events = pd.concat(frames, ignore_index=True)
+    if "listing_type" in events.columns:
+        # Categories differ between partitions, which concat turns into object
+        events["listing_type"] = events["listing_type"].astype("category")
+    return events
+
+
+def _append_partition(path, text):
+    """Append CSV rows to a partition under the lock the ingest writer takes."""
+    with open(path, "a", newline="") as f, file_locked(f):
+        if f.tell() == 0:
+            text = ",".join(PAGE_VIEW_COLUMNS) + "\n" + text
+        f.write(text)
+
+
+def migrate_legacy_log(legacy_file, directory=PAGE_VIEWS_DIR):
+    """Split a single-file page view log into daily partitions, once.
+
+    Runs under a file lock, so only one process migrates. The partitions
+    are first written to a staging directory, then each is linked into
+    place and unstaged, and the marker is written last, so a migration
+    that crashed partway resumes without duplicating any day.
+    """
+    os.makedirs(directory, exist_ok=True)
+    marker = os.path.join(directory, MIGRATED_MARKER)
+    if os.path.exists(marker):
+        return 0
+
+    with open(os.path.join(directory, MIGRATION_LOCK), "a") as lock, file_locked(lock):
+        if os.path.exists(marker):
+            return 0
+        staging = os.path.join(directory, MIGRATION_STAGING)
+        if not os.path.isdir(staging) and os.path.exists(legacy_file):
+            # Staged in full before the rename, so a half-written day is never moved
+            partial = staging + ".tmp"
+            shutil.rmtree(partial, ignore_errors=True)
+            os.makedirs(partial)
+            legacy = pd.read_csv(legacy_file, dtype={"listing_id": str})
+            if not legacy.empty:
+                for day, events in legacy.groupby(legacy["timestamp"].str[:10]):
+                    events[PAGE_VIEW_COLUMNS].to_csv(partition_path(day, partial), index=False)
+            os.rename(partial, staging)
+
+        migrated = 0
+        for day, staged in list_partitions(directory=staging):
+            path = partition_path(day, directory)
+            with open(staged) as f:
+                migrated += sum(1 for _ in f) - 1
+            try:
+                # Creates the partition only if it does not exist yet
+                os.link(staged, path)
+            except FileExistsError:
+                if not os.path.samefile(staged, path):
+                    # Another process already ingested into this day
+                    with open(staged) as f:
+                        next(f)
+                        _append_partition(path, f.read())
+            os.remove(staged)
+        with atomic_write(marker) as tmp_path, open(tmp_path, "w") as f:
+            f.write(f"{migrated}\n")
+        if os.path.isdir(staging):
+            os.rmdir(staging)
+    return migrated
+
+
+class PartitionTail:
+    """Follows the partitions of a directory, returning only appended rows.
+
+    Keeps a byte offset per partition; partitions older than the day before
+    the newest one are treated as closed once they have been read. A
+    partially written last line is left for the next read.
+    """
+
+    def __init__(self, directory=PAGE_VIEWS_DIR, offsets=None, latest_day=""):
+        self.directory = directory
+        # partition path -> (inode, bytes read)
+        self.offsets = dict(offsets or {})
+        self.latest_day = latest_day
+
+    def reset(self):
+        """Start again from the beginning of every partition."""
+        self.offsets = {}
+        self.latest_day = ""
+
+    def read_new(self):
+        """Get the text appended to each partition since the last read.
+
+        Returns None if a partition was replaced or truncated, in which case
+        the caller should reset and start over.
+        """
+        open_from = str(date.fromisoformat(self.latest_day) - timedelta(days=1)) if self.latest_day else ""
+        chunks = []
+        for day, path in list_partitions(directory=self.directory):
+            if path in self.offsets and day < open_from:
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            inode, offset = self.offsets.get(path, (stat.st_ino, 0))
+            if stat.st_ino != inode or stat.st_size < offset:
+                return None
+            if stat.st_size > offset:
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    chunk = f.read(stat.st_size - offset)
+                record_io("read", "csv", len(chunk))
+                end = chunk.rfind(b"\n") + 1
+                if end:
+                    offset += end
+                    chunks.append(chunk[:end].decode("utf-8"))
+            self.offsets[path] = (inode, offset)
+            self.latest_day = max(self.latest_day, day)
+        return chunks
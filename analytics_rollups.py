@@ -0,0 +1,166 @@
+import csv
+import io
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+from analytics_partitions import PAGE_VIEWS_DIR, PartitionTail
+from atomic_file import atomic_write
+
+ROLLUPS_FILE = os.path.join(PAGE_VIEWS_DIR, "rollups.json")
+
+# Save the snapshot at most this often (and at exit)
+SNAPSHOT_INTERVAL_SECONDS = float(os.environ.get("ANALYTICS_ROLLUPS_SNAPSHOT_SECONDS", "60"))
+
+
+class _DayRollup:
+    """View counts for one day."""
+
+    __slots__ = ("total", "types", "hours", "listings")
+
+    def __init__(self):
+        self.total = 0
+        self.types = Counter()
+        self.hours = Counter()
+        # (listing_id, listing_type) -> views
+        self.listings = Counter()
+
+    def to_json(self):
+        """Get the counts as JSON-serializable data."""
+        return {
+            "total": self.total,
+            "types": dict(self.types),
+            "hours": dict(self.hours),
+            "listings": [[listing_id, listing_type, views]
+                         for (listing_id, listing_type), views in self.listings.items()],
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        """Restore counts saved with to_json."""
+        rollup = cls()
+        rollup.total = data["total"]
+        rollup.types = Counter(data["types"])
+        rollup.hours = Counter({int(hour): views for hour, views in data["hours"].items()})
+        rollup.listings = Counter({
+            (listing_id, listing_type): views for listing_id, listing_type, views in data["listings"]
+        })
+        return rollup
+
+
+class AnalyticsRollups:
+    """Per-day, per-hour, per-listing and per-type page view counts.
+
+    Rollups are folded from the daily page view partitions incrementally:
+    each refresh reads only the bytes appended to each partition since the
+    previous one, so every event is parsed once per process and dashboards
+    query the small aggregates instead of the raw log. Partitions older
+    than yesterday are treated as closed once they have been read.
+
+    Like the view counter, the rollups are saved to a JSON snapshot
+    together with the partition offsets they cover, so a restart restores
+    the snapshot and only folds the events written since.
+    """
+
+    def __init__(self, directory=PAGE_VIEWS_DIR, snapshot_file=ROLLUPS_FILE):
+        self.directory = directory
+        self.snapshot_file = snapshot_file
+        self._lock = threading.Lock()
+        self._days = {}
+        self._tail = PartitionTail(directory)
+        self.events = 0
+        # Bumped whenever the folded counts change
+        self.generation = 0
+        self._saved_at = time.monotonic()
+        self._dirty = False
+        # Serialized days not folded into since, reused by the next save
+        self._saved_days = {}
+        self._load_snapshot()
+
+    def _load_snapshot(self):
+        """Restore the rollups and offsets from the snapshot, if there is one."""
+        try:
+            with open(self.snapshot_file) as f:
+                snapshot = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        self._saved_days = snapshot.get("days", {})
+        self._days = {day: _DayRollup.from_json(data) for day, data in self._saved_days.items()}
+        self.events = snapshot.get("events", 0)
+        self._tail.offsets = {path: tuple(state) for path, state in snapshot.get("offsets", {}).items()}
+        self._tail.latest_day = snapshot.get("latest_day", "")
+
+    def save(self):
+        """Write the snapshot atomically."""
+        with self._lock:
+            if not self._dirty:
+                return
+            for day, rollup in self._days.items():
+                if day not in self._saved_days:
+                    self._saved_days[day] = rollup.to_json()
+            snapshot = {
+                "days": dict(self._saved_days),
+                "events": self.events,
+                "offsets": dict(self._tail.offsets),
+                "latest_day": self._tail.latest_day,
+            }
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        with atomic_write(self.snapshot_file) as tmp_path, open(tmp_path, "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+
+    def _reset(self):
+        """Drop all folded counts."""
+        self._days = {}
+        self._saved_days = {}
+        self._tail.reset()
+        self.events = 0
+        self.generation += 1
+        self._dirty = True
+
+    def refresh(self):
+        """Fold any events appended to the partitions since the last refresh."""
+        with self._lock:
+            chunks = self._tail.read_new()
+            if chunks is None:
+                # A partition was replaced or truncated; fold everything again
+                self._reset()
+                chunks = self._tail.read_new() or []
+            for text in chunks:
+                self._fold(text)
+            if chunks:
+                self.generation += 1
+                self._dirty = True
+            due = self._dirty and time.monotonic() - self._saved_at >= SNAPSHOT_INTERVAL_SECONDS
+        if due:
+            self.save()
+
+    def _fold(self, text):
+        """Add CSV rows of page views to the rollups."""
+        for row in csv.reader(io.StringIO(text)):
+            if len(row) < 3 or row[0] == "timestamp":
+                continue
+            timestamp, listing_id, listing_type = row[0], row[1], row[2]
+            day = self._days.get(timestamp[:10])
+            if day is None:
+                day = self._days[timestamp[:10]] = _DayRollup()
+            self._saved_days.pop(timestamp[:10], None)
+            day.total += 1
+            day.types[listing_type] += 1
+            day.hours[int(timestamp[11:13] or 0)] += 1
+            day.listings[(listing_id, listing_type)] += 1
+            self.events += 1
+
+    def scan(self, start, end, visit):
+        """Call ``visit(day, rollup)`` for each day in a range, oldest first.
+
+        Runs under the rollups lock, so ``visit`` must not keep references
+        to the rollup's counters.
+        """
+        start = str(start) if start is not None else ""
+        end = str(end) if end is not None else "9999-12-31"
+        with self._lock:
+            for day in sorted(d for d in self._days if start <= d <= end):
+                visit(day, self._days[day])
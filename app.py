@@ -2,8 +2,11 @@ import streamlit as st
 import pandas as pd
 import os
 from datetime import datetime
-from data_manager import initialize_data, get_premium_listings, get_listings_by_category, get_categories
-from utils import track_page_view, apply_page_styling
+from data_manager import initialize_data, get_premium_listings, get_listings_by_category, get_categories, get_category_counts
+from utils import track_page_view, apply_page_styling, get_listing_views
+from instrumentation import time_fragment_runs, time_page_run
+
+time_page_run("Home")
 
 # Setup page config
 st.set_page_config(
@@ -16,46 +19,6 @@ st.set_page_config(
 # Apply consistent styling across the app
 apply_page_styling()
 
-# Add page-specific styles
-st.markdown("""
-<style>
-    /* Premium listing style */
-    .premium-card {
-        border: 1px solid #e0e0e0;
-        border-radius: 8px;
-        padding: 20px;
-        margin-bottom: 20px;
-        background-color: #FAFBFF;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.05);
-    }
-    
-    /* Category button styling */
-    .category-button {
-        background-color: #F8F9FA;
-        border: 1px solid #e0e0e0;
-        border-radius: 8px;
-        padding: 15px;
-        text-align: center;
-        margin-bottom: 15px;
-        transition: transform 0.2s;
-    }
-    .category-button:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-    }
-    
-    /* Footer styling */
-    .footer {
-        margin-top: 50px;
-        padding-top: 20px;
-        border-top: 1px solid #e0e0e0;
-        text-align: center;
-        color: #6c757d;
-        font-size: 14px;
-    }
-</style>
-""", unsafe_allow_html=True)
-
 # Initialize data if it doesn't exist
 initialize_data()
 
@@ -69,11 +32,24 @@ st.sidebar.write("Discover top-rated businesses or submit your listing today.")
 st.title("Business Directory")
 st.subheader("Discover top businesses in your area")
 
-# Display featured/premium listings
-st.header("Featured Businesses")
-premium_listings = get_premium_listings()
+def close_details():
+    """Hide the featured listing details."""
+    st.session_state['home_show_details'] = False
 
-if not premium_listings.empty:
+@st.fragment
+@time_fragment_runs
+def render_featured_listings():
+    """Render the premium listings, with details for the one selected.
+    
+    Runs as a fragment: opening and closing details rerun only this
+    function, not the page.
+    """
+    premium_listings = get_premium_listings()
+    
+    if premium_listings.empty:
+        st.info("No premium listings available yet.")
+        return
+    
     # Display premium listings in a more prominent way
     for i, row in premium_listings.iterrows():
         # Use premium card styling
@@ -94,14 +70,29 @@ if not premium_listings.empty:
             # Track view when user clicks "View Details"
             if st.button(f"View Details 👁️", key=f"premium_{i}", use_container_width=True):
                 track_page_view(row['id'], "premium")
-                st.session_state['current_listing'] = row['id']
-                st.rerun()
-else:
-    st.info("No premium listings available yet.")
+                st.session_state['home_current_listing'] = row['id']
+                st.session_state['home_show_details'] = True
+        
+        # Contact details and views for the selected listing, below its card
+        if st.session_state.get('home_show_details') and st.session_state.get('home_current_listing') == row['id']:
+            with st.container(border=True):
+                detail_col1, detail_col2 = st.columns([3, 1])
+                with detail_col1:
+                    st.write(f"📧 **Email:** {row['email']}")
+                    st.write(f"📞 **Phone:** {row['phone']}")
+                    st.write(f"**Listed since:** {row['submitted_date']}")
+                with detail_col2:
+                    st.metric("Page Views", get_listing_views(row['id']))
+                    st.button("Close", key=f"close_premium_{i}", use_container_width=True, on_click=close_details)
+
+# Display featured/premium listings
+st.header("Featured Businesses")
+render_featured_listings()
 
 # Display category selection with modern cards
 st.header("Browse by Category")
 categories = get_categories()
+category_counts = get_category_counts()
 
 # Display categories in a grid with styled cards
 st.markdown("<div style='margin-bottom: 30px;'></div>", unsafe_allow_html=True)
@@ -134,6 +125,7 @@ for i, category in enumerate(categories['name']):
         <div class="category-button">
             <h3 style="text-align: center; font-size: 24px;">{icon}</h3>
             <h4 style="text-align: center; margin-top: 5px;">{category}</h4>
+            <p style="text-align: center; color: #6c757d; margin: 0;">{category_counts.get(category, 0)} listings</p>
         </div>
         """, unsafe_allow_html=True)
         
@@ -0,0 +1,23 @@
+import os
+import threading
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_write(path):
+    """Yield a temp path to write, then move it over ``path`` in one step.
+
+    Readers never see a partial file. The temp name is unique per process
+    and thread, so concurrent writers never share one, and it is removed
+    if writing fails.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
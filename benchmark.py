@@ -0,0 +1,248 @@
+"""Benchmark the data_manager and utils functions on synthetic data.
+
+For each scale, generates a data set with generate_data.py and times each
+function the pages call in fresh processes (so no cache is warm), e.g.:
+
+    python benchmark.py --scale 10000:1000000 --scale 100000:10000000 --output results.json
+
+Reports, per function and scale as JSON, the first (cold) call and the
+latency percentiles of the warm calls, timed in one process, and the peak
+memory traced during the cold call, which includes loading the snapshot
+and building the indexes, measured in another so tracing does not slow
+the timed calls.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Stop timing a function after this many seconds, even below --iterations
+CASE_TIME_BUDGET_SECONDS = 10.0
+MIN_ITERATIONS = 3
+
+
+def _percentiles(timings):
+    """Summarize call times in milliseconds."""
+    ms = np.asarray(timings) * 1000
+    return {
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p90_ms": round(float(np.percentile(ms, 90)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+def _trace_cold(call, args):
+    """Get the peak memory traced during a function's cold first call."""
+    tracemalloc.start()
+    try:
+        call(*args[0])
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"cold_peak_traced_kb": round(peak / 1024, 1)}
+
+
+def _time_calls(call, args, iterations):
+    """Time a function's cold first call, then its warm calls."""
+    started = time.perf_counter()
+    call(*args[0])
+    cold = time.perf_counter() - started
+
+    timings = []
+    budget_end = time.perf_counter() + CASE_TIME_BUDGET_SECONDS
+    for i in range(iterations):
+        if i >= MIN_ITERATIONS and time.perf_counter() > budget_end:
+            break
+        started = time.perf_counter()
+        call(*args[i % len(args)])
+        timings.append(time.perf_counter() - started)
+
+    try:
+        import resource
+        max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        max_rss_kb = None
+    return {
+        "calls": len(timings),
+        "cold_ms": round(cold * 1000, 3),
+        **{f"warm_{key}": value for key, value in _percentiles(timings).items()},
+        "max_rss_kb": max_rss_kb,
+    }
+
+
+def _cases(seed):
+    """Get (name, function, argument tuples) for every benchmarked function."""
+    import pandas as pd
+
+    import data_manager
+    import utils
+
+    # Read the inputs directly, so the first timed call of each function is cold
+    rng = np.random.default_rng(seed)
+    listings = pd.read_csv(data_manager.LISTINGS_FILE, dtype=str, usecols=["id", "description"])
+    ids = listings["id"].to_numpy()
+    sample_ids = [(str(i),) for i in rng.choice(ids, size=min(100, len(ids)), replace=False)]
+    categories = [(None,)] + [(c,) for c in pd.read_csv(data_manager.CATEGORIES_FILE)["name"]]
+    words = listings["description"].head(1000).str.split().explode().dropna().unique()
+    queries = [(" ".join(rng.choice(words, size=rng.integers(1, 3))),) for _ in range(50)]
+
+    today = datetime.now().date()
+    ranges = [(today, today), (today - timedelta(days=6), today), (today - timedelta(days=29), today)]
+
+    return [
+        ("data_manager.get_all_listings", lambda: data_manager.get_all_listings(), [()]),
+        ("data_manager.get_listings_by_category", data_manager.get_listings_by_category, categories[1:]),
+        ("data_manager.get_category_counts", lambda: data_manager.get_category_counts(), [()]),
+        ("data_manager.get_listings_page", lambda c: data_manager.get_listings_page(limit=120, category=c), categories),
+        ("data_manager.count_listings", lambda c: data_manager.count_listings(approved=True, category=c), categories),
+        ("data_manager.get_listing_by_id", data_manager.get_listing_by_id, sample_ids),
+        ("data_manager.search_listings", data_manager.search_listings, queries),
+        ("data_manager.rank_listings", lambda q: data_manager.rank_listings(q, limit=120), queries),
+        ("data_manager.get_premium_listings", data_manager.get_premium_listings, [()]),
+        ("data_manager.get_analytics_data[1d]", data_manager.get_analytics_data, ranges[:1]),
+        ("data_manager.get_analytics_data[7d]", data_manager.get_analytics_data, ranges[1:2]),
+        ("data_manager.get_analytics_data[30d]", data_manager.get_analytics_data, ranges[2:]),
+        ("utils.track_page_view", utils.track_page_view, sample_ids),
+        ("utils.get_listing_views", utils.get_listing_views, sample_ids),
+    ]
+
+
+def run_worker(case, mode, iterations, seed):
+    """Measure one function against the data directory under the working directory.
+
+    ``mode`` is "list" (print the function names), "time" or "trace".
+    """
+    sys.path.insert(0, REPO_DIR)
+    cases = {name: (call, args) for name, call, args in _cases(seed)}
+    if mode == "list":
+        json.dump(list(cases), sys.stdout)
+        return
+    call, args = cases[case]
+    json.dump(_trace_cold(call, args) if mode == "trace" else _time_calls(call, args, iterations), sys.stdout)
+
+
+def _manifest(data_dir):
+    """Get the size of every file in a data directory."""
+    return {
+        os.path.join(root, name): os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(data_dir) for name in names
+    }
+
+
+def _restore(data_dir, manifest):
+    """Undo a worker's writes: drop new files and cut appended ones back."""
+    for path, size in _manifest(data_dir).items():
+        if path not in manifest:
+            os.remove(path)
+        elif size != manifest[path]:
+            os.truncate(path, manifest[path])
+
+
+def _run_worker(scale_dir, iterations, seed, mode, case=None):
+    """Run the worker in a fresh process and get its JSON output."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get("PYTHONPATH")])))
+    command = [sys.executable, os.path.abspath(__file__), "--worker", mode,
+               "--iterations", str(iterations), "--seed", str(seed)]
+    if case is not None:
+        command += ["--case", case]
+    output = subprocess.run(command, cwd=scale_dir, env=env, check=True, stdout=subprocess.PIPE).stdout
+    return json.loads(output)
+
+
+def run_scale(listings, events, days, iterations, seed, work_dir):
+    """Generate one scale's data set and benchmark it in a fresh process."""
+    from generate_data import generate
+
+    scale_dir = os.path.join(work_dir, f"{listings}_{events}")
+    started = time.perf_counter()
+    generate(os.path.join(scale_dir, "data"), listings=listings, events=events, days=days, seed=seed, force=True)
+    generated = time.perf_counter() - started
+
+    # Each function gets its own fresh processes on the generated data, with
+    # the snapshots and page views earlier workers saved undone, so every
+    # cold call is cold
+    data_dir = os.path.join(scale_dir, "data")
+    manifest = _manifest(data_dir)
+    results = []
+    for case in _run_worker(scale_dir, iterations, seed, "list"):
+        result = {"function": case}
+        for mode in ("time", "trace"):
+            result.update(_run_worker(scale_dir, iterations, seed, mode, case))
+            _restore(data_dir, manifest)
+        results.append(result)
+    return {
+        "listings": listings,
+        "events": events,
+        "days": days,
+        "generate_seconds": round(generated, 2),
+        "results": results,
+    }
+
+
+def _parse_scale(value):
+    """Parse LISTINGS:EVENTS."""
+    listings, _, events = value.partition(":")
+    return int(listings), int(events or 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark data_manager and utils on synthetic data.")
+    parser.add_argument("--scale", action="append", type=_parse_scale, metavar="LISTINGS:EVENTS",
+                        help="data set size; repeat for several (default: 10000:1000000)")
+    parser.add_argument("--days", type=int, default=30, help="days of page views per data set")
+    parser.add_argument("--iterations", type=int, default=50, help="warm calls per function")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--work-dir", help="generate data sets here and keep them (default: a temp dir)")
+    parser.add_argument("--worker", choices=["list", "time", "trace"], help=argparse.SUPPRESS)
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.case, args.worker, args.iterations, args.seed)
+        return
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="directory-bench-")
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "seed": args.seed,
+        "scales": [],
+    }
+    try:
+        for listings, events in args.scale or [(10_000, 1_000_000)]:
+            print(f"Benchmarking {listings} listings, {events} events...", file=sys.stderr)
+            scale = run_scale(listings, events, args.days, args.iterations, args.seed, work_dir)
+            report["scales"].append(scale)
+            for result in scale["results"]:
+                print(f"  {result['function']:<42} cold {result['cold_ms']:>10.1f}ms  "
+                      f"warm p50 {result['warm_p50_ms']:>9.2f}ms  p99 {result['warm_p99_ms']:>9.2f}ms  "
+                      f"cold peak {result['cold_peak_traced_kb']:>10.0f}KB", file=sys.stderr)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
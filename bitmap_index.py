@@ -0,0 +1,92 @@
+import numpy as np
+
+# Set bits per byte, for NumPy versions without bitwise_count
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount(bits):
+    """Count the set bits in a word array."""
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(bits).sum())
+    return int(_POPCOUNT8[bits.view(np.uint8)].sum())
+
+
+class BitmapIndex:
+    """Bitsets over row labels, one per indexed key.
+
+    Each bitmap is a NumPy array of 64-bit words where bit ``n`` is set if
+    row label ``n`` has the key (e.g. "approved" or ("category", name)).
+    Filters combine bitmaps with bitwise AND/NOT and counts are popcounts,
+    so neither touches the listings frame. All bitmaps grow together as
+    labels are added.
+    """
+
+    def __init__(self):
+        self._bitmaps = {}
+        self._words = 0
+
+    def _grow(self, label):
+        """Make every bitmap wide enough to hold a label."""
+        if label < self._words * 64:
+            return
+        words = max(label // 64 + 1, self._words * 2)
+        for key, bits in self._bitmaps.items():
+            self._bitmaps[key] = np.concatenate([bits, np.zeros(words - self._words, dtype=np.uint64)])
+        self._words = words
+
+    def load(self, key, mask):
+        """Set a bitmap from a boolean array indexed by label."""
+        mask = np.asarray(mask, dtype=bool)
+        self._grow(max(len(mask) - 1, 0))
+        padded = np.zeros(self._words * 64, dtype=bool)
+        padded[:len(mask)] = mask
+        self._bitmaps[key] = np.packbits(padded, bitorder="little").view(np.uint64)
+
+    def load_labels(self, key, labels):
+        """Set a bitmap to exactly the given labels."""
+        labels = np.asarray(labels, dtype=np.int64)
+        if len(labels):
+            self._grow(int(labels.max()))
+        mask = np.zeros(self._words * 64, dtype=bool)
+        mask[labels] = True
+        self._bitmaps[key] = np.packbits(mask, bitorder="little").view(np.uint64)
+
+    def add(self, key, label):
+        """Set a label's bit in a bitmap."""
+        self._grow(label)
+        bits = self._bitmaps.get(key)
+        if bits is None:
+            bits = self._bitmaps[key] = np.zeros(self._words, dtype=np.uint64)
+        bits[label // 64] |= np.uint64(1 << (label % 64))
+
+    def discard(self, key, label):
+        """Clear a label's bit in a bitmap."""
+        bits = self._bitmaps.get(key)
+        if bits is not None and label < self._words * 64:
+            bits[label // 64] &= ~np.uint64(1 << (label % 64))
+
+    def discard_label(self, label):
+        """Clear a label's bit in every bitmap."""
+        for key in self._bitmaps:
+            self.discard(key, label)
+
+    def get(self, key):
+        """Get a bitmap, all zeros if the key has none. Do not mutate it."""
+        bits = self._bitmaps.get(key)
+        if bits is None:
+            return np.zeros(self._words, dtype=np.uint64)
+        return bits
+
+    def keys(self):
+        """Get the indexed keys."""
+        return list(self._bitmaps)
+
+    @staticmethod
+    def count(bits):
+        """Count the labels in a bitmap."""
+        return _popcount(bits)
+
+    @staticmethod
+    def labels(bits):
+        """Get the labels in a bitmap, ascending."""
+        return np.flatnonzero(np.unpackbits(bits.view(np.uint8), bitorder="little"))
@@ -0,0 +1,267 @@
+import json
+import os
+import threading
+import time
+
+from atomic_file import atomic_write
+from file_lock import acquire_file_lock, release_file_lock
+
+CHANGE_LOG_FILE = "data/changes.log"
+CHANGE_FEED_STATE_FILE = "data/change_feed_state.json"
+
+# Bytes read from the end of the log to find the latest sequence number
+_TAIL_BYTES = 64 * 1024
+
+# Compact the log once it grows past this size, keeping the changes a durable
+# subscriber has not seen yet and at least the latest CHANGE_LOG_KEEP changes
+CHANGE_LOG_MAX_BYTES = int(os.environ.get("CHANGE_LOG_MAX_BYTES", str(8 * 1024 * 1024)))
+CHANGE_LOG_KEEP = int(os.environ.get("CHANGE_LOG_KEEP", "1000"))
+
+
+def _parse_change(line):
+    """Parse a logged change, restoring tuple generation tokens from JSON lists."""
+    change = json.loads(line)
+    for field in ("before", "after"):
+        if isinstance(change[field], list):
+            change[field] = tuple(change[field])
+    return change
+
+
+class ChangeFeed:
+    """Sequenced record of every write to the listings and premium tables.
+
+    Each change is appended as a JSON line to a shared log under a file
+    lock and given the next sequence number, so sequence numbers increase
+    across every process writing to the same data directory. Subscribers
+    get changes in sequence order: those published in this process as they
+    happen, and those from other processes when the feed is polled.
+
+    A change holds the table, the operation, the listing or subscription,
+    and the table generations before and after the write, so a subscriber
+    can tell whether its state is the one the change applies to.
+
+    Durable subscribers have their last-seen sequence number saved, and on
+    subscribing again (e.g. after a restart) are replayed every change
+    they missed. A durable name should be used by one process at a time.
+
+    Once the log passes CHANGE_LOG_MAX_BYTES it is compacted to the changes
+    after the lowest durable last-seen sequence number (and at least the
+    latest CHANGE_LOG_KEEP). A non-durable subscriber that falls further
+    behind than that skips the dropped changes; the listings cache and
+    premium index then reload, as their generations no longer match.
+    """
+
+    def __init__(self, log_file=CHANGE_LOG_FILE, state_file=CHANGE_FEED_STATE_FILE):
+        self.log_file = log_file
+        self.state_file = state_file
+        self._lock = threading.RLock()
+        self._subscribers = {}
+        # Bytes of the log read so far, and the sequence number they end at
+        self._offset = 0
+        self._head = 0
+        # The log file the offset is into, which compaction replaces
+        self._inode = None
+        self._state = self._load_state()
+        self._durable_names = set()
+        self._seek_head()
+
+    def _load_state(self):
+        """Load the saved last-seen sequence numbers of durable subscribers."""
+        try:
+            with open(self.state_file) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save_state(self):
+        """Save this process's durable last-seen sequence numbers atomically.
+
+        Entries of durable subscribers in other processes are kept as saved.
+        """
+        state = self._load_state()
+        state.update({name: self._state[name] for name in self._durable_names if name in self._state})
+        with atomic_write(self.state_file) as tmp_path, open(tmp_path, "w") as f:
+            json.dump(state, f)
+
+    def _seek_head(self):
+        """Start following the log from its end."""
+        try:
+            with open(self.log_file, "rb") as f:
+                self._inode = os.fstat(f.fileno()).st_ino
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(0, size - _TAIL_BYTES))
+                lines = f.read().split(b"\n")
+        except FileNotFoundError:
+            return
+        for line in reversed(lines):
+            try:
+                self._head = _parse_change(line)["seq"]
+                break
+            except (ValueError, KeyError):
+                continue
+        # Stop before a partially written last line, which is read once complete
+        self._offset = size - len(lines[-1])
+
+    def _read_from(self, f, offset):
+        """Read the complete change lines after a byte offset. Returns (changes, new offset)."""
+        f.seek(offset)
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        changes = [_parse_change(line) for line in data[:end].splitlines() if line.strip()]
+        return changes, offset + end
+
+    def _read_new(self, f):
+        """Read the changes after the ones this process has seen, moving the offset on.
+
+        If the log was compacted since, the new file is read from the
+        start, skipping changes already seen.
+        """
+        inode = os.fstat(f.fileno()).st_ino
+        if inode != self._inode:
+            self._inode = inode
+            changes, self._offset = self._read_from(f, 0)
+            return [change for change in changes if change["seq"] > self._head]
+        changes, self._offset = self._read_from(f, self._offset)
+        return changes
+
+    def _open_locked(self):
+        """Open the current log for appending with the file lock held."""
+        while True:
+            f = open(self.log_file, "a+b")
+            acquire_file_lock(f)
+            try:
+                if os.stat(self.log_file).st_ino == os.fstat(f.fileno()).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+            # Compacted while waiting for the lock; lock the new file instead
+            release_file_lock(f)
+            f.close()
+
+    def _compact(self, f):
+        """Rewrite the log without changes every durable subscriber has seen.
+
+        Called with the log locked; the lock is then held on a replaced
+        file, so other writers reopen the new one.
+        """
+        state = self._load_state()
+        keep_after = min([self._head - CHANGE_LOG_KEEP] + list(state.values()))
+        changes, _ = self._read_from(f, 0)
+        with atomic_write(self.log_file) as tmp_path, open(tmp_path, "wb") as out:
+            for change in changes:
+                if change["seq"] > keep_after:
+                    out.write(json.dumps(change, default=str).encode("utf-8") + b"\n")
+            size = out.tell()
+        self._inode = os.stat(self.log_file).st_ino
+        self._offset = size
+
+    def _deliver(self, changes):
+        """Pass changes to every subscriber that has not seen them yet."""
+        durable_seen = False
+        for change in changes:
+            for name, (callback, durable) in list(self._subscribers.items()):
+                seen = self._state.get(name, 0) if durable else 0
+                if change["seq"] <= seen:
+                    continue
+                callback(change)
+                if durable:
+                    self._state[name] = change["seq"]
+                    durable_seen = True
+        if durable_seen:
+            self._save_state()
+
+    def publish(self, table, op, key, data, before, after):
+        """Record a change and deliver it. Returns its sequence number.
+
+        ``data`` is the inserted record or the updated fields; ``before``
+        and ``after`` are the table generations around the write.
+        """
+        with self._lock:
+            directory = os.path.dirname(self.log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with self._open_locked() as f:
+                try:
+                    # Changes other processes appended come first
+                    foreign = self._read_new(f)
+                    head = foreign[-1]["seq"] if foreign else self._head
+                    change = {
+                        "seq": head + 1,
+                        "time": time.time(),
+                        "table": table,
+                        "op": op,
+                        "key": str(key),
+                        "data": data,
+                        "before": before,
+                        "after": after,
+                    }
+                    f.seek(0, os.SEEK_END)
+                    f.write(json.dumps(change, default=str).encode("utf-8") + b"\n")
+                    f.flush()
+                    self._offset = f.tell()
+                    self._head = change["seq"]
+                    if self._offset > CHANGE_LOG_MAX_BYTES:
+                        self._compact(f)
+                finally:
+                    release_file_lock(f)
+            self._deliver(foreign + [change])
+            return change["seq"]
+
+    def poll(self):
+        """Deliver changes other processes appended since the last poll or publish."""
+        try:
+            stat = os.stat(self.log_file)
+        except FileNotFoundError:
+            return
+        if stat.st_ino == self._inode and stat.st_size <= self._offset:
+            return
+        with self._lock:
+            with open(self.log_file, "rb") as f:
+                changes = self._read_new(f)
+            if changes:
+                self._head = changes[-1]["seq"]
+                self._deliver(changes)
+
+    def subscribe(self, name, callback, durable=False):
+        """Call ``callback(change)`` for each change, in sequence order.
+
+        A durable subscriber is first replayed every change after its saved
+        last-seen sequence number; others only get changes from now on.
+        """
+        with self._lock:
+            if durable:
+                self._durable_names.add(name)
+            if durable and self._state.get(name, 0) < self._head:
+                missed = []
+                with open(self.log_file, "rb") as f:
+                    changes, _ = self._read_from(f, 0)
+                for change in changes:
+                    if self._state.get(name, 0) < change["seq"] <= self._head:
+                        missed.append(change)
+                for change in missed:
+                    callback(change)
+                    self._state[name] = change["seq"]
+                self._save_state()
+            self._subscribers[name] = (callback, durable)
+
+    def last_seen(self, name):
+        """Get the last sequence number a durable subscriber has seen."""
+        return self._state.get(name, 0)
+
+    @property
+    def head(self):
+        """Get the latest sequence number this process has seen."""
+        return self._head
+
+
+_change_feed = None
+_change_feed_lock = threading.Lock()
+
+
+def get_change_feed():
+    """Get the process-wide change feed."""
+    global _change_feed
+    with _change_feed_lock:
+        if _change_feed is None:
+            _change_feed = ChangeFeed()
+        return _change_feed
@@ -0,0 +1,127 @@
+"""Optional Parquet snapshots of the CSV tables.
+
+A snapshot ``foo.parquet`` next to ``foo.csv`` is used for reads whenever
+it is at least as new as the CSV, and is rewritten whenever a table is
+rewritten through storage. Snapshots keep typed columns (datetime64
+timestamps, categorical listing_type and category, boolean approved) and
+support column projection. Run ``python columnar.py`` to convert the
+existing CSV files. Without pyarrow everything falls back to CSV.
+"""
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+from atomic_file import atomic_write
+from io_stats import record_io
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+# Typed schemas used for both CSV parsing and snapshots
+ANALYTICS_DTYPES = {"listing_id": str, "listing_type": "category"}
+ANALYTICS_DATES = ["timestamp"]
+PREMIUM_DTYPES = {"id": str, "listing_id": str}
+
+
+def snapshot_path(csv_path):
+    """Get the Parquet snapshot path for a CSV file."""
+    return os.path.splitext(csv_path)[0] + ".parquet"
+
+
+def has_fresh_snapshot(csv_path):
+    """Check whether a CSV file has a snapshot at least as new as itself."""
+    if not HAS_PYARROW:
+        return False
+    try:
+        snapshot_mtime = os.stat(snapshot_path(csv_path)).st_mtime_ns
+    except FileNotFoundError:
+        return False
+    try:
+        return snapshot_mtime >= os.stat(csv_path).st_mtime_ns
+    except FileNotFoundError:
+        return True
+
+
+def read_table(csv_path, columns=None, dtypes=None, parse_dates=None):
+    """Read a table from its snapshot if fresh, otherwise from CSV.
+
+    ``columns`` limits the columns read; with a snapshot the other columns
+    are never loaded from disk.
+    """
+    if has_fresh_snapshot(csv_path):
+        path = snapshot_path(csv_path)
+        record_io("read", "parquet", os.path.getsize(path))
+        return pd.read_parquet(path, columns=columns)
+    record_io("read", "csv", os.path.getsize(csv_path))
+    dtypes = {k: v for k, v in (dtypes or {}).items() if columns is None or k in columns}
+    parse_dates = [c for c in (parse_dates or []) if columns is None or c in columns]
+    return pd.read_csv(csv_path, usecols=columns, dtype=dtypes, parse_dates=parse_dates or False)
+
+
+def _typed(frame):
+    """Apply the snapshot column types to whichever columns a table has."""
+    frame = frame.copy()
+    if "approved" in frame.columns:
+        frame["approved"] = frame["approved"].astype(str).str.lower().isin(["true", "1"])
+    for column in ("category", "listing_type"):
+        if column in frame.columns:
+            frame[column] = frame[column].astype("category")
+    if "timestamp" in frame.columns:
+        frame["timestamp"] = pd.to_datetime(frame["timestamp"])
+    return frame
+
+
+def write_snapshot(frame, csv_path):
+    """Write a typed snapshot for a CSV table, atomically."""
+    if not HAS_PYARROW:
+        return
+    path = snapshot_path(csv_path)
+    with atomic_write(path) as tmp_path:
+        _typed(frame).to_parquet(tmp_path, index=False)
+    record_io("write", "parquet", os.path.getsize(path))
+
+
+def refresh_snapshot(frame, csv_path):
+    """Rewrite a table's snapshot after a CSV write, if it has one."""
+    if HAS_PYARROW and os.path.exists(snapshot_path(csv_path)):
+        write_snapshot(frame, csv_path)
+
+
+def convert_csv_files(data_dir="data"):
+    """Write snapshots for the listings, premium and closed analytics files.
+
+    Today's analytics partition is still being appended to and is left as
+    CSV. Returns the list of snapshots written.
+    """
+    if not HAS_PYARROW:
+        raise RuntimeError("Columnar snapshots require pyarrow")
+
+    written = []
+    listings_file = os.path.join(data_dir, "listings.csv")
+    if os.path.exists(listings_file):
+        write_snapshot(pd.read_csv(listings_file, dtype={"id": str}), listings_file)
+        written.append(snapshot_path(listings_file))
+
+    premium_file = os.path.join(data_dir, "premium_listings.csv")
+    if os.path.exists(premium_file):
+        write_snapshot(pd.read_csv(premium_file, dtype=PREMIUM_DTYPES), premium_file)
+        written.append(snapshot_path(premium_file))
+
+    # Imported here to avoid a cycle: partitions read through this module
+    from analytics_partitions import list_partitions
+
+    today = datetime.now().strftime("%Y-%m-%d")
+    for day, path in list_partitions(directory=os.path.join(data_dir, "analytics")):
+        if day < today and not has_fresh_snapshot(path):
+            write_snapshot(pd.read_csv(path, dtype={"listing_id": str}), path)
+            written.append(snapshot_path(path))
+    return written
+
+
+if __name__ == "__main__":
+    for path in convert_csv_files(sys.argv[1] if len(sys.argv) > 1 else "data"):
+        print(path)
@@ -0,0 +1,125 @@
+import heapq
+import os
+import threading
+from collections import Counter, OrderedDict
+from datetime import date
+
+import pandas as pd
+from data_manager import get_analytics_rollups
+from slow_query_log import QueryTimer
+
+# Number of (range, generation) bundles kept for reuse across sessions
+METRICS_CACHE_SIZE = int(os.environ.get("METRICS_CACHE_SIZE", "32"))
+
+
+class DashboardMetrics:
+    """Every dashboard metric for one date range, computed in a single scan.
+
+    Built from the analytics rollups by visiting each day in the range once;
+    the frames the pages chart are derived from the accumulated counts.
+    Bundles are shared between sessions and must be treated as read-only.
+    """
+
+    def __init__(self, start=None, end=None):
+        self.start = start
+        self.end = end
+        self.total_views = 0
+        self.views_by_type = Counter()
+        # day -> views, day -> Counter(hour -> views)
+        self._daily = {}
+        self._hourly = {}
+        # listing_id -> views, and the listings viewed as premium
+        self.listing_totals = Counter()
+        self.premium_listing_ids = set()
+
+    def _add_day(self, day, rollup):
+        """Accumulate one day's rollup."""
+        self.total_views += rollup.total
+        self.views_by_type.update(rollup.types)
+        self._daily[day] = rollup.total
+        self._hourly[day] = Counter(rollup.hours)
+        for (listing_id, listing_type), views in rollup.listings.items():
+            self.listing_totals[listing_id] += views
+            if listing_type == "premium":
+                self.premium_listing_ids.add(listing_id)
+
+    @property
+    def premium_views(self):
+        """Views of listings shown as premium."""
+        return self.views_by_type.get("premium", 0)
+
+    @property
+    def standard_views(self):
+        """Views of listings shown as standard."""
+        return self.views_by_type.get("standard", 0)
+
+    @property
+    def unique_listings(self):
+        """Number of distinct listings viewed."""
+        return len(self.listing_totals)
+
+    def daily_views(self):
+        """Get views per day as a frame with Date and Views columns."""
+        return pd.DataFrame({
+            "Date": [date.fromisoformat(d) for d in self._daily],
+            "Views": list(self._daily.values()),
+        })
+
+    def type_views(self):
+        """Get views per listing type as a frame."""
+        return pd.DataFrame(sorted(self.views_by_type.items()), columns=["Listing Type", "Views"])
+
+    def top_listings(self, limit=10):
+        """Get the most viewed listings, most viewed first.
+
+        Returns a frame with "Listing ID", "Views" and "Premium" (whether any
+        of the views was of the listing as a premium listing).
+        """
+        top = heapq.nlargest(limit, self.listing_totals.items(), key=lambda item: item[1])
+        return pd.DataFrame(
+            [(listing_id, views, listing_id in self.premium_listing_ids) for listing_id, views in top],
+            columns=["Listing ID", "Views", "Premium"]
+        )
+
+    def dates(self):
+        """Get the dates with at least one view."""
+        return [date.fromisoformat(d) for d in self._daily]
+
+    def hourly_views(self, day):
+        """Get views per hour of one day in the range as a frame."""
+        hours = self._hourly.get(str(day), {})
+        return pd.DataFrame(sorted(hours.items()), columns=["Hour", "Views"])
+
+
+_metrics_cache = OrderedDict()
+_metrics_lock = threading.Lock()
+
+
+def get_dashboard_metrics(start=None, end=None):
+    """Get the metric bundle for a date range (inclusive).
+
+    Bundles are cached by range and rollup generation, so every page and
+    session asking for the same range between two flushes shares one.
+    """
+    timer = QueryTimer("analytics_metrics", date_range=(start, end))
+    with timer.io():
+        # Folds any page views appended to the partitions since the last call
+        rollups = get_analytics_rollups()
+    key = (str(start), str(end), rollups.generation)
+    with _metrics_lock:
+        metrics = _metrics_cache.get(key)
+        if metrics is not None:
+            _metrics_cache.move_to_end(key)
+            timer.finish(0, len(metrics._daily))
+            return metrics
+
+    metrics = DashboardMetrics(start, end)
+    rollups.scan(start, end, metrics._add_day)
+    # Scanned rows are the page views the rollups of the range summarize
+    timer.finish(metrics.total_views, len(metrics._daily))
+
+    with _metrics_lock:
+        _metrics_cache[key] = metrics
+        while len(_metrics_cache) > METRICS_CACHE_SIZE:
+            _metrics_cache.popitem(last=False)
+    return metrics
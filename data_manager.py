@@ -1,13 +1,84 @@
 import streamlit as st
 import pandas as pd
 import os
+import sys
+import atexit
+import threading
 from datetime import datetime, timedelta
+from storage import CSVStorage, SQLiteStorage
+from ingest import flush_page_views, get_page_view_buffer
+from analytics_rollups import AnalyticsRollups
+from analytics_partitions import PAGE_VIEWS_DIR, migrate_legacy_log, read_partitions
+from event_log import BINARY_LOG_ENABLED, get_binary_event_log
+from listings_cache import ListingsCache
+from premium_index import PremiumIndex
+from change_feed import get_change_feed
+from instrumentation import instrument_module
+from slow_query_log import QueryTimer
 
 # Data file paths
 CATEGORIES_FILE = "data/categories.csv"
 LISTINGS_FILE = "data/listings.csv"
 PREMIUM_LISTINGS_FILE = "data/premium_listings.csv"
-ANALYTICS_FILE = "data/analytics.csv"
+ANALYTICS_FILE = "data/analytics.csv"  # Legacy single-file log, migrated to ANALYTICS_DIR
+ANALYTICS_DIR = PAGE_VIEWS_DIR
+SQLITE_FILE = "data/directory.db"
+
+# Storage backend for listings, categories and premium data ("csv" or "sqlite")
+STORAGE_BACKEND = os.environ.get("DIRECTORY_STORAGE", "csv")
+
+# Score multiplier for listings with active premium in ranked search
+PREMIUM_SEARCH_BOOST = float(os.environ.get("PREMIUM_SEARCH_BOOST", "1.5"))
+
+_storage = None
+_listings_cache = None
+_premium_index = None
+_analytics_rollups = None
+_storage_lock = threading.Lock()
+_id_lock = threading.Lock()
+_last_id = 0
+
+def get_storage():
+    """Get the process-wide storage backend."""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            csv_storage = CSVStorage(CATEGORIES_FILE, LISTINGS_FILE, PREMIUM_LISTINGS_FILE)
+            if STORAGE_BACKEND == "csv":
+                _storage = csv_storage
+            elif STORAGE_BACKEND == "sqlite":
+                # Existing CSV data is imported the first time the database is created
+                _storage = SQLiteStorage(SQLITE_FILE, import_from=csv_storage)
+            else:
+                raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+        return _storage
+
+def get_listings_cache():
+    """Get the process-wide listings cache, caught up with the change feed."""
+    global _listings_cache
+    storage = get_storage()
+    with _storage_lock:
+        if _listings_cache is None:
+            _listings_cache = ListingsCache(storage)
+            get_change_feed().subscribe("listings_cache", _listings_cache.apply_change)
+    # Patches in writes from other processes instead of reloading the table
+    get_change_feed().poll()
+    return _listings_cache
+
+def get_premium_index():
+    """Get the process-wide active premium index, caught up with the change feed."""
+    global _premium_index
+    storage = get_storage()
+    with _storage_lock:
+        if _premium_index is None:
+            _premium_index = PremiumIndex(storage)
+            get_change_feed().subscribe("premium_index", _premium_index.apply_change)
+    get_change_feed().poll()
+    return _premium_index
+
+def get_cache_stats():
+    """Get listings cache hit/miss/reload counters."""
+    return get_listings_cache().stats()
 
 def initialize_data():
     """Initialize data files if they don't exist."""
@@ -15,53 +86,33 @@ def initialize_data():
     if not os.path.exists("data"):
         os.makedirs("data")
     
-    # Initialize categories
-    if not os.path.exists(CATEGORIES_FILE):
-        categories = pd.DataFrame({
-            "id": ["cat1", "cat2", "cat3", "cat4", "cat5", "cat6", "cat7", "cat8"],
-            "name": [
-                "Restaurants", 
-                "Retail", 
-                "Professional Services", 
-                "Health & Wellness", 
-                "Technology", 
-                "Home Services", 
-                "Education", 
-                "Entertainment"
-            ]
-        })
-        categories.to_csv(CATEGORIES_FILE, index=False)
-    
-    # Initialize listings
-    if not os.path.exists(LISTINGS_FILE):
-        listings = pd.DataFrame(columns=[
-            "id", "name", "description", "category", "website", 
-            "email", "phone", "location", "submitted_date", "approved"
-        ])
-        listings.to_csv(LISTINGS_FILE, index=False)
-    
-    # Initialize premium listings
-    if not os.path.exists(PREMIUM_LISTINGS_FILE):
-        premium = pd.DataFrame(columns=[
-            "id", "listing_id", "package_type", "start_date", "end_date", "payment_status"
-        ])
-        premium.to_csv(PREMIUM_LISTINGS_FILE, index=False)
-    
-    # Initialize analytics
-    if not os.path.exists(ANALYTICS_FILE):
-        analytics = pd.DataFrame(columns=["timestamp", "listing_id", "listing_type"])
-        analytics.to_csv(ANALYTICS_FILE, index=False)
+    # Initialize categories, listings and premium listings
+    categories = pd.DataFrame({
+        "id": ["cat1", "cat2", "cat3", "cat4", "cat5", "cat6", "cat7", "cat8"],
+        "name": [
+            "Restaurants", 
+            "Retail", 
+            "Professional Services", 
+            "Health & Wellness", 
+            "Technology", 
+            "Home Services", 
+            "Education", 
+            "Entertainment"
+        ]
+    })
+    get_storage().initialize(categories)
+    
+    # Initialize analytics partitions, splitting any legacy log into them
+    migrate_legacy_log(ANALYTICS_FILE, ANALYTICS_DIR)
 
 def get_categories():
     """Get all categories."""
-    if os.path.exists(CATEGORIES_FILE):
-        return pd.read_csv(CATEGORIES_FILE)
-    return pd.DataFrame(columns=["id", "name"])
+    return get_storage().read_categories()
 
 def get_all_listings(approved_only=True):
     """Get all listings."""
-    if os.path.exists(LISTINGS_FILE):
-        listings = pd.read_csv(LISTINGS_FILE)
+    if get_storage().exists():
+        listings = get_listings_cache().get()
         if approved_only:
             return listings[listings["approved"] == True]
         return listings
@@ -69,41 +120,116 @@ def get_all_listings(approved_only=True):
 
 def get_listings_by_category(category, approved_only=True):
     """Get listings by category."""
-    listings = get_all_listings(approved_only)
-    if not listings.empty:
-        return listings[listings["category"] == category]
+    if get_storage().exists():
+        return get_listings_cache().by_category(category, approved_only)
     return pd.DataFrame()
 
+def get_category_counts(approved_only=True):
+    """Get the number of listings in each category, keyed by category name."""
+    if get_storage().exists():
+        return get_listings_cache().category_counts(approved_only)
+    return {}
+
+def filter_listings(approved=None, category=None, premium=False):
+    """Get listings matching a combination of filters, in table order.
+    
+    ``approved`` is True, False (pending) or None (either); ``premium``
+    restricts to listings with active premium.
+    """
+    if get_storage().exists():
+        premium_ids = get_active_premium_ids() if premium else None
+        return get_listings_cache().filter(approved, category, premium_ids)
+    return pd.DataFrame()
+
+def get_listings_page(limit=20, offset=0, approved=True, category=None, premium=False):
+    """Get one page of the listings matching a combination of filters.
+    
+    Returns ``(listings, total)``: up to ``limit`` listings starting at
+    ``offset``, in table order, and the number of listings matching.
+    """
+    if get_storage().exists():
+        premium_ids = get_active_premium_ids() if premium else None
+        return get_listings_cache().page(limit, offset, approved, category, premium_ids)
+    return pd.DataFrame(), 0
+
+def count_listings(approved=None, category=None, premium=False):
+    """Count listings matching a combination of filters."""
+    if get_storage().exists():
+        premium_ids = get_active_premium_ids() if premium else None
+        return get_listings_cache().count(approved, category, premium_ids)
+    return 0
+
 def get_listing_by_id(listing_id):
     """Get a specific listing by ID."""
-    listings = get_all_listings(approved_only=False)
-    if not listings.empty:
-        listing = listings[listings["id"] == listing_id]
-        if not listing.empty:
-            return listing.iloc[0]
+    if get_storage().exists():
+        return get_listings_cache().lookup(listing_id)
     return None
 
+def get_listings_by_ids(listing_ids):
+    """Get listings for a list of IDs, aligned row-for-row with the input."""
+    if get_storage().exists():
+        return get_listings_cache().lookup_many(listing_ids)
+    return pd.DataFrame()
+
+def enrich_with_listings(frame, id_column="listing_id", columns=None, fill_value="Unknown"):
+    """Attach listing fields to a frame keyed by listing ID in one batch join.
+    
+    ``columns`` maps listing fields to output column names, e.g.
+    ``{"name": "Listing Name"}``. Rows whose listing no longer exists get
+    ``fill_value``. Returns a new frame.
+    """
+    columns = columns or {"name": "Listing Name", "category": "Category"}
+    enriched = frame.copy()
+    details = get_listings_by_ids(frame[id_column])
+    for field, output in columns.items():
+        if field in details.columns:
+            values = details[field]
+            enriched[output] = (values.fillna(fill_value) if fill_value is not None else values).to_numpy()
+        else:
+            enriched[output] = fill_value
+    return enriched
+
 def search_listings(query, approved_only=True):
-    """Search listings by query."""
-    listings = get_all_listings(approved_only)
-    if listings.empty:
+    """Search listings by query.
+    
+    Terms are matched as word prefixes across name, description, category
+    and location. Terms are ANDed; separate alternatives with "OR".
+    """
+    if not get_storage().exists():
         return pd.DataFrame()
     
-    # Convert query and DataFrame text columns to lowercase for case-insensitive search
-    query = query.lower()
-    listings_lower = listings.copy()
-    for col in ["name", "description", "category", "location"]:
-        listings_lower[col] = listings_lower[col].str.lower()
+    timer = QueryTimer("search", query=query)
+    cache = get_listings_cache()
+    with timer.io():
+        # Reloads the snapshot if another writer changed the listings
+        scanned = len(cache.get())
+    listings = cache.search(query)
+    if approved_only and not listings.empty:
+        listings = listings[listings["approved"] == True]
+    timer.finish(scanned, len(listings))
+    if listings.empty:
+        return pd.DataFrame()
+    return listings
+
+def rank_listings(query, limit=20, approved_only=True, offset=0):
+    """Get search results ranked by relevance, a page at a time.
     
-    # Search in multiple columns
-    mask = (
-        listings_lower["name"].str.contains(query, na=False) |
-        listings_lower["description"].str.contains(query, na=False) |
-        listings_lower["category"].str.contains(query, na=False) |
-        listings_lower["location"].str.contains(query, na=False)
-    )
+    Results are scored with BM25 (name weighted above description above
+    location) and boosted by PREMIUM_SEARCH_BOOST for active premium
+    listings. Returns ``limit`` listings starting at rank ``offset``, best
+    first, with a "score" column, and the total number of matches.
+    """
+    if not get_storage().exists():
+        return pd.DataFrame(), 0
     
-    return listings[mask]
+    timer = QueryTimer("rank", query=query)
+    cache = get_listings_cache()
+    with timer.io():
+        boosts = dict.fromkeys(get_active_premium_ids(), PREMIUM_SEARCH_BOOST)
+        scanned = len(cache.get())
+    results, total = cache.rank(query, limit, boosts=boosts, approved_only=approved_only, offset=offset)
+    timer.finish(scanned, len(results))
+    return results, total
 
 def add_listing(name, description, category, website, email, phone, location):
     """Add a new listing."""
@@ -121,38 +247,29 @@ def add_listing(name, description, category, website, email, phone, location):
         "approved": False
     }
     
-    if os.path.exists(LISTINGS_FILE):
-        listings = pd.read_csv(LISTINGS_FILE)
-        listings = pd.concat([listings, pd.DataFrame([new_listing])], ignore_index=True)
-        listings.to_csv(LISTINGS_FILE, index=False)
-    else:
-        pd.DataFrame([new_listing]).to_csv(LISTINGS_FILE, index=False)
+    before, after = get_storage().insert_listing(new_listing)
+    get_change_feed().publish("listings", "insert", listing_id, new_listing, before, after)
     
     return listing_id
 
 def approve_listing(listing_id):
     """Approve a listing."""
-    if os.path.exists(LISTINGS_FILE):
-        listings = pd.read_csv(LISTINGS_FILE)
-        listings.loc[listings["id"] == listing_id, "approved"] = True
-        listings.to_csv(LISTINGS_FILE, index=False)
-        return True
-    return False
+    generations = get_storage().update_listing(str(listing_id), {"approved": True})
+    if generations is None:
+        return False
+    get_change_feed().publish("listings", "update", listing_id, {"approved": True}, *generations)
+    return True
 
 def delete_listing(listing_id):
-    """Delete a listing."""
-    if os.path.exists(LISTINGS_FILE):
-        listings = pd.read_csv(LISTINGS_FILE)
-        listings = listings[listings["id"] != listing_id]
-        listings.to_csv(LISTINGS_FILE, index=False)
-        
-        # Also remove any premium listings
-        if os.path.exists(PREMIUM_LISTINGS_FILE):
-            premium = pd.read_csv(PREMIUM_LISTINGS_FILE)
-            premium = premium[premium["listing_id"] != listing_id]
-            premium.to_csv(PREMIUM_LISTINGS_FILE, index=False)
-        return True
-    return False
+    """Delete a listing and any premium listings for it."""
+    generations = get_storage().delete_listing(str(listing_id))
+    if generations is None:
+        return False
+    listings_generations, premium_generations = generations
+    feed = get_change_feed()
+    feed.publish("listings", "delete", listing_id, None, *listings_generations)
+    feed.publish("premium", "delete_listing", listing_id, None, *premium_generations)
+    return True
 
 def add_premium_listing(listing_id, package_type, duration_days):
     """Add a premium listing."""
@@ -162,55 +279,77 @@ def add_premium_listing(listing_id, package_type, duration_days):
     
     new_premium = {
         "id": premium_id,
-        "listing_id": listing_id,
+        "listing_id": str(listing_id),
         "package_type": package_type,
         "start_date": start_date.strftime("%Y-%m-%d"),
         "end_date": end_date.strftime("%Y-%m-%d"),
         "payment_status": "paid"
     }
     
-    if os.path.exists(PREMIUM_LISTINGS_FILE):
-        premium = pd.read_csv(PREMIUM_LISTINGS_FILE)
-        premium = pd.concat([premium, pd.DataFrame([new_premium])], ignore_index=True)
-        premium.to_csv(PREMIUM_LISTINGS_FILE, index=False)
-    else:
-        pd.DataFrame([new_premium]).to_csv(PREMIUM_LISTINGS_FILE, index=False)
+    before, after = get_storage().insert_premium(new_premium)
+    get_change_feed().publish("premium", "insert", premium_id, new_premium, before, after)
     
     return premium_id
 
+def get_active_premium_ids():
+    """Get the IDs of listings with an active, paid premium subscription."""
+    return get_premium_index().active_ids()
+
 def get_premium_listings():
     """Get all active premium listings."""
-    if os.path.exists(PREMIUM_LISTINGS_FILE) and os.path.exists(LISTINGS_FILE):
-        premium = pd.read_csv(PREMIUM_LISTINGS_FILE)
-        listings = pd.read_csv(LISTINGS_FILE)
-        
-        # Filter for active premium listings
-        today = datetime.now().strftime("%Y-%m-%d")
-        active_premium = premium[
-            (premium["end_date"] >= today) & 
-            (premium["payment_status"] == "paid")
-        ]
-        
-        if active_premium.empty:
+    if get_storage().exists():
+        premium_listing_ids = get_active_premium_ids()
+        if not premium_listing_ids:
             return pd.DataFrame()
         
-        # Get full listing details for premium listings
-        premium_listing_ids = active_premium["listing_id"].unique()
-        premium_listings = listings[
-            (listings["id"].isin(premium_listing_ids)) & 
-            (listings["approved"] == True)
-        ]
-        
-        return premium_listings
+        # Get full listing details for approved premium listings
+        return get_listings_cache().filter(approved=True, premium_ids=premium_listing_ids)
     
     return pd.DataFrame()
 
-def get_analytics_data():
-    """Get analytics data."""
-    if os.path.exists(ANALYTICS_FILE):
-        return pd.read_csv(ANALYTICS_FILE)
-    return pd.DataFrame()
+def get_analytics_data(start=None, end=None, columns=None):
+    """Get analytics data, optionally only between two dates (inclusive).
+    
+    Only the daily partitions inside the range are read, and only
+    ``columns`` when given. With the binary page view log enabled, the
+    range is read from it instead.
+    """
+    timer = QueryTimer("analytics_data", date_range=(start, end))
+    with timer.io():
+        flush_page_views()
+        if BINARY_LOG_ENABLED:
+            analytics = get_binary_event_log().read_days(start, end, columns)
+        else:
+            analytics = read_partitions(start, end, ANALYTICS_DIR, columns)
+    timer.finish(len(analytics), len(analytics))
+    if analytics.empty:
+        return pd.DataFrame()
+    return analytics
+
+def get_analytics_rollups():
+    """Get the process-wide analytics rollups, caught up with the log.
+    
+    The rollups are also refreshed by the page view flusher after each
+    batch it writes.
+    """
+    global _analytics_rollups
+    with _storage_lock:
+        if _analytics_rollups is None:
+            _analytics_rollups = AnalyticsRollups(ANALYTICS_DIR)
+            get_page_view_buffer().add_listener(lambda events: _analytics_rollups.refresh())
+            atexit.register(_analytics_rollups.save)
+    flush_page_views()
+    _analytics_rollups.refresh()
+    return _analytics_rollups
 
 def generate_id():
     """Generate a unique ID."""
-    return datetime.now().strftime("%Y%m%d%H%M%S") + str(int(datetime.now().microsecond / 1000))
+    global _last_id
+    with _id_lock:
+        # Bump past the last ID so two calls in the same millisecond never collide
+        candidate = int(datetime.now().strftime("%Y%m%d%H%M%S%f")[:-3])
+        _last_id = max(candidate, _last_id + 1)
+        return str(_last_id)
+
+# Time the public functions above when instrumentation is enabled
+instrument_module(sys.modules[__name__])
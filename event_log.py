@@ -0,0 +1,193 @@
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from analytics_partitions import PAGE_VIEWS_DIR, PAGE_VIEW_COLUMNS, list_partitions
+from columnar import ANALYTICS_DATES, ANALYTICS_DTYPES, read_table
+from file_lock import file_locked
+
+# Opt-in binary copy of the page view log for very high view volumes
+BINARY_LOG_ENABLED = os.environ.get("ANALYTICS_BINARY_LOG", "").lower() in ("1", "true", "yes")
+BINARY_LOG_FILE = os.path.join(PAGE_VIEWS_DIR, "page_views.bin")
+LISTING_KEYS_FILE = os.path.join(PAGE_VIEWS_DIR, "listing_keys.txt")
+
+# One fixed-width, unpadded record per view: epoch seconds, listing key, type code
+RECORD_DTYPE = np.dtype([("timestamp", "<i8"), ("listing_key", "<i4"), ("listing_type", "u1")])
+LISTING_TYPES = ["standard", "premium"]
+OTHER_TYPE = 255
+
+
+def _epoch(timestamp):
+    """Convert a "YYYY-MM-DD HH:MM:SS" string or naive datetime to epoch seconds.
+
+    Naive times are encoded as if UTC, so they decode back to the same
+    wall-clock time whatever the local timezone.
+    """
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return int(timestamp.replace(tzinfo=timezone.utc).timestamp())
+
+
+class BinaryEventLog:
+    """Page views as fixed-size binary records, read through ``numpy.memmap``.
+
+    Listing ids are mapped to int32 surrogate keys, kept in an append-only
+    text file (line number = key). Each flushed batch is sorted by time
+    before it is appended, so the file is in time order and range queries
+    binary-search it; batches flushed concurrently by several processes may
+    overlap by a few seconds at their edges. Reads map the file without
+    copying it onto the Python heap.
+    """
+
+    def __init__(self, path=BINARY_LOG_FILE, keys_path=LISTING_KEYS_FILE):
+        self.path = path
+        self.keys_path = keys_path
+        self._lock = threading.Lock()
+        self._keys = {}
+        self._keys_size = 0
+
+    def _load_keys(self):
+        """Read listing keys added since the last load (by any process)."""
+        try:
+            size = os.path.getsize(self.keys_path)
+        except FileNotFoundError:
+            return
+        if size == self._keys_size:
+            return
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._keys_size)
+            chunk = f.read(size - self._keys_size)
+        end = chunk.rfind(b"\n") + 1
+        for listing_id in chunk[:end].decode("utf-8").splitlines():
+            self._keys[listing_id] = len(self._keys)
+        self._keys_size += end
+
+    def _key_for(self, listing_id, keys_file):
+        """Get the key of a listing, assigning one under the file lock if new."""
+        key = self._keys.get(listing_id)
+        if key is None:
+            self._load_keys()
+            key = self._keys.get(listing_id)
+        if key is None:
+            keys_file.write(f"{listing_id}\n".encode("utf-8"))
+            keys_file.flush()
+            key = self._keys[listing_id] = len(self._keys)
+            self._keys_size = keys_file.tell()
+        return key
+
+    def append(self, events):
+        """Append a batch of page view events (dicts keyed by column)."""
+        if not events:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # The keys file lock also guards the log, so keys and records agree
+        with self._lock, open(self.keys_path, "ab") as keys_file, file_locked(keys_file):
+            records = np.empty(len(events), dtype=RECORD_DTYPE)
+            for i, event in enumerate(events):
+                listing_type = event.get("listing_type", "")
+                records[i] = (
+                    _epoch(event["timestamp"]),
+                    self._key_for(str(event["listing_id"]), keys_file),
+                    LISTING_TYPES.index(listing_type) if listing_type in LISTING_TYPES else OTHER_TYPE,
+                )
+            records.sort(order="timestamp", kind="stable")
+            with open(self.path, "ab") as f:
+                f.write(records.tobytes())
+
+    def records(self):
+        """Map the complete records in the log (empty if there are none)."""
+        try:
+            count = os.path.getsize(self.path) // RECORD_DTYPE.itemsize
+        except FileNotFoundError:
+            count = 0
+        if count == 0:
+            return np.empty(0, dtype=RECORD_DTYPE)
+        return np.memmap(self.path, dtype=RECORD_DTYPE, mode="r", shape=(count,))
+
+    def key_of(self, listing_id):
+        """Get the surrogate key of a listing, or None if it was never viewed."""
+        with self._lock:
+            self._load_keys()
+            return self._keys.get(str(listing_id))
+
+    def listing_ids(self):
+        """Get the listing ids indexed by surrogate key."""
+        with self._lock:
+            self._load_keys()
+            return list(self._keys)
+
+    def time_range(self, start=None, end=None):
+        """Get the records with start <= timestamp < end (datetimes or strings)."""
+        records = self.records()
+        times = records["timestamp"]
+        lo = np.searchsorted(times, _epoch(start), side="left") if start is not None else 0
+        hi = np.searchsorted(times, _epoch(end), side="left") if end is not None else len(records)
+        return records[lo:hi]
+
+    def count_views(self, listing_id, start=None, end=None):
+        """Count the views of one listing with a vectorized scan."""
+        key = self.key_of(listing_id)
+        if key is None:
+            return 0
+        return int(np.count_nonzero(self.time_range(start, end)["listing_key"] == key))
+
+    def view_counts(self, start=None, end=None):
+        """Get views per listing as a dict, counted with ``numpy.bincount``."""
+        counts = np.bincount(self.time_range(start, end)["listing_key"])
+        listing_ids = self.listing_ids()
+        return {listing_ids[key]: int(n) for key, n in zip(np.flatnonzero(counts), counts[counts > 0])}
+
+    def read_days(self, start=None, end=None, columns=None):
+        """Read the page views between two dates, inclusive, like read_partitions.
+
+        Only the records in the range are decoded into the frame.
+        """
+        end_time = datetime.fromisoformat(str(end)[:10]) + timedelta(days=1) if end is not None else None
+        records = self.time_range(str(start)[:10] if start is not None else None, end_time)
+        codes = records["listing_type"]
+        events = pd.DataFrame({
+            "timestamp": pd.to_datetime(records["timestamp"], unit="s"),
+            "listing_id": np.asarray(self.listing_ids(), dtype=object)[records["listing_key"]],
+            "listing_type": pd.Categorical.from_codes(
+                np.where(codes < len(LISTING_TYPES), codes, -1), categories=LISTING_TYPES
+            ),
+        }, columns=PAGE_VIEW_COLUMNS)
+        return events[columns] if columns else events
+
+    def import_partitions(self, directory=PAGE_VIEWS_DIR):
+        """Fill an empty log from the CSV partitions. Returns the records written.
+
+        Partitions are imported one at a time, oldest first, so only one
+        day of events is in memory at once.
+        """
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            return 0
+        imported = 0
+        for _, path in list_partitions(directory=directory):
+            events = read_table(path, dtypes=ANALYTICS_DTYPES, parse_dates=ANALYTICS_DATES)
+            if events.empty:
+                continue
+            events = events.sort_values("timestamp", kind="stable")
+            events["timestamp"] = events["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")
+            events["listing_type"] = events["listing_type"].astype(str)
+            self.append(events.to_dict("records"))
+            imported += len(events)
+        return imported
+
+
+_binary_log = None
+_binary_log_lock = threading.Lock()
+
+
+def get_binary_event_log():
+    """Get the process-wide binary log, importing the CSV partitions if new."""
+    global _binary_log
+    with _binary_log_lock:
+        if _binary_log is None:
+            _binary_log = BinaryEventLog()
+            _binary_log.import_partitions()
+        return _binary_log
@@ -0,0 +1,28 @@
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process locks only
+    fcntl = None
+
+
+def acquire_file_lock(f):
+    """Take an exclusive lock on an open file, blocking until it is free."""
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+
+
+def release_file_lock(f):
+    """Release a lock taken with acquire_file_lock."""
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+@contextmanager
+def file_locked(f):
+    """Hold an exclusive lock on an open file for the duration of the block."""
+    acquire_file_lock(f)
+    try:
+        yield f
+    finally:
+        release_file_lock(f)
@@ -0,0 +1,229 @@
+"""Deterministic synthetic directory data for benchmarks.
+
+Writes categories, listings, premium subscriptions and daily page view
+partitions in the same CSV schema the app uses, e.g.:
+
+    python generate_data.py --listings 100000 --events 10000000 --out /tmp/bench/data
+
+The same arguments and seed always produce the same files.
+"""
+import argparse
+import os
+import shutil
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from analytics_partitions import PAGE_VIEW_COLUMNS
+from storage import LISTING_COLUMNS, PREMIUM_COLUMNS
+
+CATEGORIES = [
+    "Restaurants", "Retail", "Professional Services", "Health & Wellness",
+    "Technology", "Home Services", "Education", "Entertainment"
+]
+# Zipf-like share of listings per category (most popular first)
+CATEGORY_SKEW = 1.1
+# Zipf-like share of views per listing (a few listings get most views)
+VIEW_SKEW = 1.05
+
+NAME_WORDS = [
+    "Golden", "Urban", "Blue", "Bright", "Green", "Silver", "Rapid", "Prime",
+    "Harbor", "Summit", "Oak", "Maple", "River", "Sunrise", "Metro", "Corner",
+    "Royal", "Happy", "Smart", "Classic", "Modern", "Northern", "Coastal", "Elite"
+]
+NAME_SUFFIXES = ["Co", "Studio", "Group", "Shop", "House", "Labs", "Partners", "Works", "Hub", "Center"]
+CATEGORY_WORDS = {
+    "Restaurants": ["bistro", "kitchen", "cafe", "pizza", "sushi", "bakery", "grill", "coffee", "vegan", "brunch"],
+    "Retail": ["boutique", "outlet", "store", "fashion", "shoes", "books", "gifts", "market", "vintage", "toys"],
+    "Professional Services": ["legal", "accounting", "consulting", "tax", "marketing", "design", "staffing", "insurance", "audit", "advisory"],
+    "Health & Wellness": ["yoga", "dental", "clinic", "spa", "fitness", "massage", "therapy", "pharmacy", "nutrition", "pilates"],
+    "Technology": ["software", "repair", "cloud", "security", "web", "data", "it", "devices", "networking", "apps"],
+    "Home Services": ["plumbing", "cleaning", "roofing", "electrical", "painting", "landscaping", "movers", "hvac", "handyman", "locksmith"],
+    "Education": ["tutoring", "language", "music", "school", "coding", "academy", "lessons", "test", "prep", "workshop"],
+    "Entertainment": ["cinema", "theater", "bowling", "arcade", "karaoke", "gallery", "concerts", "escape", "comedy", "events"],
+}
+FILLER_WORDS = [
+    "family", "owned", "local", "trusted", "friendly", "professional", "affordable", "quality",
+    "service", "experienced", "team", "since", "award", "winning", "open", "daily", "best",
+    "downtown", "community", "custom", "fast", "reliable", "premium", "organic", "fresh"
+]
+CITIES = [
+    "New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Philadelphia", "San Antonio",
+    "San Diego", "Dallas", "Austin", "Seattle", "Denver", "Boston", "Portland", "Miami"
+]
+PACKAGES = [("Basic", 30), ("Standard", 90), ("Premium", 365)]
+
+# Rows written per CSV chunk, to bound memory at large scales
+CHUNK_ROWS = 1_000_000
+
+
+def _zipf_weights(n, skew):
+    """Get normalized Zipf weights for n ranks."""
+    weights = 1.0 / np.arange(1, n + 1) ** skew
+    return weights / weights.sum()
+
+
+def _pick(rng, words, size):
+    """Pick words uniformly, as an object array."""
+    return np.asarray(words, dtype=object)[rng.integers(0, len(words), size)]
+
+
+def generate_listings(rng, count, today):
+    """Generate the listings table."""
+    ids = np.array([str(20200101000000000 + i) for i in range(count)], dtype=object)
+    categories = np.asarray(CATEGORIES, dtype=object)[
+        rng.choice(len(CATEGORIES), size=count, p=_zipf_weights(len(CATEGORIES), CATEGORY_SKEW))
+    ]
+    names = _pick(rng, NAME_WORDS, count) + " " + _pick(rng, NAME_WORDS, count) + " " + _pick(rng, NAME_SUFFIXES, count)
+
+    descriptions = np.empty(count, dtype=object)
+    for category in CATEGORIES:
+        mask = categories == category
+        n = int(mask.sum())
+        words = [_pick(rng, CATEGORY_WORDS[category] if i % 2 == 0 else FILLER_WORDS, n) for i in range(8)]
+        descriptions[mask] = [" ".join(parts) for parts in zip(*words)]
+
+    submitted = today - pd.to_timedelta(rng.integers(0, 3 * 365, count), unit="D")
+    slugs = pd.Series(names).str.lower().str.replace(" ", "", regex=False)
+    return pd.DataFrame({
+        "id": ids,
+        "name": names,
+        "description": descriptions,
+        "category": categories,
+        "website": "https://" + slugs + pd.Series(ids).str[-6:] + ".example.com",
+        "email": "info@" + slugs + ".example.com",
+        "phone": ["555-%03d-%04d" % (a, b) for a, b in zip(rng.integers(100, 1000, count), rng.integers(0, 10000, count))],
+        "location": _pick(rng, CITIES, count),
+        "submitted_date": pd.DatetimeIndex(submitted).strftime("%Y-%m-%d"),
+        # About nine in ten listings are approved
+        "approved": rng.random(count) < 0.9,
+    })[LISTING_COLUMNS]
+
+
+def generate_premium(rng, listings, fraction, today):
+    """Generate premium subscriptions for a fraction of approved listings.
+
+    Includes expired and unpaid subscriptions, and some listings with
+    several subscriptions, as real data would.
+    """
+    approved_ids = listings.loc[listings["approved"], "id"].to_numpy()
+    count = int(len(approved_ids) * fraction)
+    if count == 0:
+        return pd.DataFrame(columns=PREMIUM_COLUMNS)
+    # A tenth of the subscriptions renew an earlier subscriber
+    subscribers = rng.choice(approved_ids, size=count, replace=False)
+    renewals = rng.choice(subscribers, size=count // 10)
+    listing_ids = np.concatenate([subscribers, renewals])
+
+    packages = rng.integers(0, len(PACKAGES), len(listing_ids))
+    starts = today - pd.to_timedelta(rng.integers(0, 400, len(listing_ids)), unit="D")
+    ends = starts + pd.to_timedelta([PACKAGES[p][1] for p in packages], unit="D")
+    return pd.DataFrame({
+        "id": [str(30200101000000000 + i) for i in range(len(listing_ids))],
+        "listing_id": listing_ids,
+        "package_type": [PACKAGES[p][0] for p in packages],
+        "start_date": pd.DatetimeIndex(starts).strftime("%Y-%m-%d"),
+        "end_date": pd.DatetimeIndex(ends).strftime("%Y-%m-%d"),
+        "payment_status": np.where(rng.random(len(listing_ids)) < 0.95, "paid", "pending"),
+    })[PREMIUM_COLUMNS]
+
+
+def generate_page_views(rng, listings, premium, count, days, today, directory):
+    """Write ``count`` page views over the last ``days`` days as daily partitions.
+
+    Views follow a Zipf distribution over listings, and within a day are
+    sorted by time like the real log.
+    """
+    os.makedirs(directory, exist_ok=True)
+    ids = listings["id"].to_numpy()
+    # Shuffle which listings are popular, so popularity is independent of id order
+    popularity = rng.permutation(len(ids))
+    weights = _zipf_weights(len(ids), VIEW_SKEW)[popularity]
+    premium_ids = set(premium["listing_id"])
+    is_premium = np.fromiter((i in premium_ids for i in ids), dtype=bool, count=len(ids))
+
+    per_day = np.full(days, count // days)
+    per_day[: count % days] += 1
+    for offset, day_count in enumerate(per_day):
+        day = today - timedelta(days=days - 1 - offset)
+        path = os.path.join(directory, f"{day:%Y-%m-%d}.csv")
+        day_start = np.datetime64(f"{day:%Y-%m-%d}T00:00:00")
+        written = 0
+        # Draw the day's seconds once and sort them, then write in chunks
+        seconds = np.sort(rng.integers(0, 86400, int(day_count)))
+        while written < day_count:
+            n = int(min(CHUNK_ROWS, day_count - written))
+            picks = rng.choice(len(ids), size=n, p=weights)
+            timestamps = day_start + seconds[written:written + n].astype("timedelta64[s]")
+            chunk = pd.DataFrame({
+                "timestamp": pd.DatetimeIndex(timestamps).strftime("%Y-%m-%d %H:%M:%S"),
+                "listing_id": ids[picks],
+                "listing_type": np.where(is_premium[picks], "premium", "standard"),
+            })[PAGE_VIEW_COLUMNS]
+            chunk.to_csv(path, mode="w" if written == 0 else "a", header=written == 0, index=False)
+            written += n
+
+
+def generate(out, listings=10_000, events=1_000_000, premium_fraction=0.05, days=30, seed=42, today=None,
+             force=False):
+    """Generate a full synthetic data directory. Returns the listings count by category.
+
+    Refuses a non-empty ``out`` unless ``force`` is set, in which case its
+    contents are deleted first, so no snapshot, change log or database is
+    left describing data that was replaced.
+    """
+    if os.path.isdir(out) and os.listdir(out):
+        if not force:
+            raise FileExistsError(f"{out} is not empty")
+        shutil.rmtree(out)
+    rng = np.random.default_rng(seed)
+    today = pd.Timestamp(today or datetime.now().strftime("%Y-%m-%d"))
+    os.makedirs(out, exist_ok=True)
+
+    pd.DataFrame({
+        "id": [f"cat{i + 1}" for i in range(len(CATEGORIES))],
+        "name": CATEGORIES,
+    }).to_csv(os.path.join(out, "categories.csv"), index=False)
+
+    listing_frame = generate_listings(rng, listings, today)
+    listing_frame.to_csv(os.path.join(out, "listings.csv"), index=False)
+
+    premium = generate_premium(rng, listing_frame, premium_fraction, today)
+    premium.to_csv(os.path.join(out, "premium_listings.csv"), index=False)
+
+    analytics_dir = os.path.join(out, "analytics")
+    generate_page_views(rng, listing_frame, premium, events, days, today.to_pydatetime(), analytics_dir)
+    # The generated partitions replace any legacy single-file log
+    with open(os.path.join(analytics_dir, ".migrated"), "w") as f:
+        f.write("0\n")
+    return listing_frame["category"].value_counts().to_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic directory data set.")
+    parser.add_argument("--out", required=True, help="data directory to write")
+    parser.add_argument("--force", action="store_true",
+                        help="delete everything in --out first if it is not empty (never do this to a live data directory)")
+    parser.add_argument("--listings", type=int, default=10_000)
+    parser.add_argument("--events", type=int, default=1_000_000, help="page view events")
+    parser.add_argument("--premium-fraction", type=float, default=0.05, help="share of approved listings with premium")
+    parser.add_argument("--days", type=int, default=30, help="days of page views, ending today")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--today", help="last day of page views as YYYY-MM-DD (default: today)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    try:
+        counts = generate(args.out, args.listings, args.events, args.premium_fraction, args.days, args.seed,
+                          args.today, args.force)
+    except FileExistsError as e:
+        parser.error(f"{e}; use --force to replace its contents")
+    print(f"Wrote {args.listings} listings and {args.events} page views to {args.out} "
+          f"in {time.perf_counter() - started:.1f}s")
+    for category, count in counts.items():
+        print(f"  {category}: {count}")
+
+
+if __name__ == "__main__":
+    main()
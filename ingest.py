@@ -0,0 +1,173 @@
+import atexit
+import csv
+import io
+import logging
+import os
+import threading
+import time
+
+from analytics_partitions import PAGE_VIEW_COLUMNS, event_partition
+from event_log import BINARY_LOG_ENABLED, get_binary_event_log
+from file_lock import file_locked
+from io_stats import record_io
+
+logger = logging.getLogger(__name__)
+
+# Flush when this many events are buffered or this many seconds have passed
+FLUSH_MAX_EVENTS = int(os.environ.get("ANALYTICS_FLUSH_EVENTS", "500"))
+FLUSH_INTERVAL_SECONDS = float(os.environ.get("ANALYTICS_FLUSH_SECONDS", "2.0"))
+
+
+class EventBuffer:
+    """Buffers events in memory and appends them to a CSV log in batches.
+
+    ``path`` is either the log file or a function mapping an event to the
+    log file (partition) it belongs to. A background thread flushes the
+    buffer when it reaches ``max_events`` or every ``flush_interval``
+    seconds. Each batch is written with a single append under a file lock,
+    so concurrent sessions and processes never interleave partial rows.
+    """
+
+    def __init__(self, path, columns, max_events=FLUSH_MAX_EVENTS, flush_interval=FLUSH_INTERVAL_SECONDS):
+        self.path = path
+        self.columns = columns
+        self.max_events = max_events
+        self.flush_interval = flush_interval
+        self._events = []
+        self._listeners = []
+        self._cond = threading.Condition()
+        # Keeps batches in order when several threads flush at once
+        self._write_lock = threading.Lock()
+        self._closed = False
+        # Events appended and written to the log so far
+        self.appended = 0
+        self.flushed = 0
+        self._thread = threading.Thread(target=self._run, name="event-flusher", daemon=True)
+        self._thread.start()
+
+    def append(self, event):
+        """Buffer an event (a dict keyed by column)."""
+        with self._cond:
+            self._events.append(event)
+            self.appended += 1
+            if len(self._events) >= self.max_events:
+                self._cond.notify()
+        if self._closed:
+            self.flush()
+
+    def add_listener(self, callback):
+        """Call ``callback(events)`` after each batch is written to the log."""
+        self._listeners.append(callback)
+
+    def pending(self):
+        """Get the number of buffered, unflushed events."""
+        with self._cond:
+            return len(self._events)
+
+    def count_pending(self, column, value):
+        """Count the buffered, unflushed events whose ``column`` equals ``value``."""
+        value = str(value)
+        with self._cond:
+            return sum(1 for event in self._events if str(event.get(column, "")) == value)
+
+    def flush(self):
+        """Write all buffered events to the log. Returns the number written."""
+        with self._write_lock:
+            with self._cond:
+                events, self._events = self._events, []
+            if not events:
+                return 0
+
+            # Group events by target file, keeping their order within each file
+            batches = {}
+            for event in events:
+                path = self.path(event) if callable(self.path) else self.path
+                if path not in batches:
+                    out = io.StringIO()
+                    batches[path] = (out, csv.writer(out, lineterminator="\n"), [])
+                batches[path][1].writerow([event.get(column, "") for column in self.columns])
+                batches[path][2].append(event)
+            paths = list(batches)
+            for i, path in enumerate(paths):
+                try:
+                    self._append(path, batches[path][0].getvalue())
+                except Exception:
+                    # Put the unwritten events back in front, to be retried next flush
+                    unwritten = [event for p in paths[i:] for event in batches[p][2]]
+                    with self._cond:
+                        self._events[:0] = unwritten
+                    self.flushed += len(events) - len(unwritten)
+                    raise
+            self.flushed += len(events)
+        for callback in self._listeners:
+            try:
+                callback(events)
+            except Exception:
+                # A failing listener must not stop the others or the flusher
+                logger.exception("Event buffer listener %r failed", callback)
+        return len(events)
+
+    def _append(self, path, text):
+        """Append text to a log file, writing the header if the file is new."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "a", newline="") as f, file_locked(f):
+            start = f.tell()
+            if start == 0:
+                text = ",".join(self.columns) + "\n" + text
+            f.write(text)
+            f.flush()
+            record_io("write", "csv", f.tell() - start)
+
+    def _run(self):
+        """Flush on the size or time threshold until closed."""
+        while True:
+            deadline = time.monotonic() + self.flush_interval
+            with self._cond:
+                while not self._closed and len(self._events) < self.max_events:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                closed = self._closed
+            try:
+                self.flush()
+            except Exception:
+                # The batch was put back; keep the thread alive to retry it
+                logger.exception("Could not flush events")
+            if closed:
+                return
+
+    def close(self):
+        """Stop the flusher thread and flush any remaining events."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=5)
+        self.flush()
+
+
+_page_views = None
+_page_views_lock = threading.Lock()
+
+
+def get_page_view_buffer():
+    """Get the process-wide page view buffer, starting it on first use."""
+    global _page_views
+    # Opened (and filled from the partitions if new) outside the buffer lock
+    binary_log = get_binary_event_log() if BINARY_LOG_ENABLED and _page_views is None else None
+    with _page_views_lock:
+        if _page_views is None:
+            # Each event goes to the daily partition of its timestamp
+            _page_views = EventBuffer(event_partition, PAGE_VIEW_COLUMNS)
+            if binary_log is not None:
+                _page_views.add_listener(binary_log.append)
+            atexit.register(_page_views.close)
+        return _page_views
+
+
+def flush_page_views():
+    """Flush buffered page views so readers see them."""
+    if _page_views is not None:
+        _page_views.flush()
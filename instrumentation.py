@@ -0,0 +1,221 @@
+import functools
+import os
+import threading
+import time
+
+import pandas as pd
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Opt-in timing of the data_manager and utils functions and of page script runs
+INSTRUMENTATION_ENABLED = os.environ.get("DIRECTORY_INSTRUMENTATION", "").lower() in ("1", "true", "yes")
+_page_timing_enabled = INSTRUMENTATION_ENABLED
+
+# Histogram buckets: exact below 64us, then 32 buckets per power of two (~3% wide)
+_LINEAR_BITS = 6
+_LINEAR_BUCKETS = 1 << _LINEAR_BITS
+_SUB_BUCKETS = _LINEAR_BUCKETS // 2
+
+
+def _bucket(micros):
+    """Get the histogram bucket of a duration in microseconds."""
+    if micros < _LINEAR_BUCKETS:
+        return micros
+    shift = micros.bit_length() - _LINEAR_BITS
+    return _LINEAR_BUCKETS + (shift - 1) * _SUB_BUCKETS + (micros >> shift) - _SUB_BUCKETS
+
+
+def _bucket_upper(index):
+    """Get the largest duration in microseconds that falls in a bucket."""
+    if index < _LINEAR_BUCKETS:
+        return index
+    shift = (index - _LINEAR_BUCKETS) // _SUB_BUCKETS + 1
+    mantissa = (index - _LINEAR_BUCKETS) % _SUB_BUCKETS + _SUB_BUCKETS
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """Call count, total time and a log-linear latency histogram.
+
+    Like an HDR histogram, buckets have a fixed relative width, so
+    recording is a few integer operations and percentiles are accurate
+    to about 3% from microseconds to hours.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._buckets = []
+
+    def record(self, seconds):
+        """Record one duration."""
+        index = _bucket(int(seconds * 1_000_000))
+        with self._lock:
+            if index >= len(self._buckets):
+                self._buckets.extend([0] * (index + 1 - len(self._buckets)))
+            self._buckets[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, q):
+        """Get the duration in seconds below which ``q`` percent of calls fall."""
+        with self._lock:
+            target = self.count * q / 100
+            seen = 0
+            for index, count in enumerate(self._buckets):
+                seen += count
+                if count and seen >= target:
+                    return min(_bucket_upper(index) / 1_000_000, self.max)
+        return 0.0
+
+
+_timings = {}
+_timings_lock = threading.Lock()
+# Page names by page script hash, for attributing work (including
+# fragment reruns, which skip the top of the page) to pages
+_page_names = {}
+_timings_since = time.time()
+
+
+def record_timing(name, kind, seconds):
+    """Record one call of a function or run of a page."""
+    histogram = _timings.get((kind, name))
+    if histogram is None:
+        with _timings_lock:
+            histogram = _timings.setdefault((kind, name), LatencyHistogram())
+    histogram.record(seconds)
+
+
+def get_timings():
+    """Get the recorded timings, slowest total first.
+
+    Function times include the time of the instrumented functions they
+    call.
+    """
+    with _timings_lock:
+        items = list(_timings.items())
+    rows = [
+        {
+            "Name": name,
+            "Kind": kind,
+            "Calls": histogram.count,
+            "Total (ms)": histogram.total * 1000,
+            "Mean (ms)": histogram.total * 1000 / histogram.count,
+            "p50 (ms)": histogram.percentile(50) * 1000,
+            "p99 (ms)": histogram.percentile(99) * 1000,
+            "Max (ms)": histogram.max * 1000,
+        }
+        for (kind, name), histogram in items if histogram.count
+    ]
+    columns = ["Name", "Kind", "Calls", "Total (ms)", "Mean (ms)", "p50 (ms)", "p99 (ms)", "Max (ms)"]
+    return pd.DataFrame(rows, columns=columns).sort_values("Total (ms)", ascending=False, ignore_index=True)
+
+
+def get_histograms():
+    """Get the histogram of every recorded function and page, by (kind, name)."""
+    with _timings_lock:
+        return dict(_timings)
+
+
+def get_timings_since():
+    """Get when timings started being recorded (startup or the last reset)."""
+    return _timings_since
+
+
+def reset_timings():
+    """Forget every recorded timing."""
+    global _timings_since
+    with _timings_lock:
+        _timings.clear()
+        _timings_since = time.time()
+
+
+def timed(name, func):
+    """Wrap a function so each call is recorded under ``name``."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record_timing(name, "function", time.perf_counter() - started)
+    return wrapper
+
+
+def instrument_module(module):
+    """Time every public function defined in a module, if instrumentation is enabled.
+
+    Call at the end of the module, so that ``from module import name``
+    elsewhere gets the timed function.
+    """
+    if not INSTRUMENTATION_ENABLED:
+        return
+    for name, value in list(vars(module).items()):
+        if (not name.startswith("_") and callable(value) and not isinstance(value, type)
+                and getattr(value, "__module__", None) == module.__name__):
+            setattr(module, name, timed(f"{module.__name__}.{name}", value))
+
+
+def enable_page_timing():
+    """Time page runs even without full instrumentation (for metrics export)."""
+    global _page_timing_enabled
+    _page_timing_enabled = True
+
+
+def current_page():
+    """Get the page the current script run (or fragment rerun) belongs to, or None."""
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return None
+    return _page_names.get(ctx.page_script_hash)
+
+
+def time_page_run(page):
+    """Time the current script run of a page, if page timing is enabled.
+
+    Call at the top of the page. The run is recorded when Streamlit
+    reports that the script stopped, however it stopped. The page is
+    remembered for current_page() either way.
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is not None:
+        _page_names[ctx.page_script_hash] = page
+    if not _page_timing_enabled:
+        return
+    # Streamlit has no public end-of-run hook; the script thread's runner
+    # signals script events, so listen there and do nothing without one
+    runner = getattr(getattr(threading.current_thread(), "_target", None), "__self__", None)
+    on_event = getattr(runner, "on_event", None)
+    if on_event is None:
+        return
+    started = time.perf_counter()
+
+    def finished(sender, event=None, **kwargs):
+        if event is not None and event.name.startswith("SCRIPT_STOPPED"):
+            on_event.disconnect(finished)
+            record_timing(page, "page", time.perf_counter() - started)
+
+    on_event.connect(finished, weak=False)
+
+
+def time_fragment_runs(func):
+    """Time fragment-only reruns of a fragment function, if page timing is enabled.
+
+    Apply under ``@st.fragment``. Fragment reruns never run the top of the
+    page, so time_page_run does not see them; they are recorded as runs of
+    "<page> (fragment)". Full runs of the page are timed as usual.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        ctx = get_script_run_ctx(suppress_warning=True)
+        if not _page_timing_enabled or ctx is None or not ctx.fragment_ids_this_run:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record_timing(f"{current_page()} (fragment)", "page", time.perf_counter() - started)
+    return wrapper
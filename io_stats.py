@@ -0,0 +1,18 @@
+import threading
+from collections import Counter
+
+# (operation, format) -> bytes, e.g. ("read", "csv")
+_io_bytes = Counter()
+_io_lock = threading.Lock()
+
+
+def record_io(operation, file_format, nbytes):
+    """Count bytes read or written from data files of a format."""
+    with _io_lock:
+        _io_bytes[(operation, file_format)] += nbytes
+
+
+def get_io_stats():
+    """Get the bytes read and written so far, by (operation, format)."""
+    with _io_lock:
+        return dict(_io_bytes)
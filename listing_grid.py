@@ -0,0 +1,44 @@
+import os
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+# Plain HTML/JS component; it speaks the component protocol directly, so there is no build step
+_listing_grid = components.declare_component(
+    "listing_grid",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "listing_grid")
+)
+
+# Fields sent to the browser for each card
+GRID_FIELDS = ["id", "name", "category", "location", "description", "website"]
+DESCRIPTION_LENGTH = 150
+
+
+def listing_grid(listings, key, columns=3, show_category=False, row_height=260, max_height=780):
+    """Render listings as a virtualized card grid and get the clicked listing.
+
+    The listings are sent once as a compact JSON array; the browser renders
+    only the rows in view as the grid scrolls. Returns the id of the
+    listing whose "View Details" button was clicked on this rerun, or None.
+    """
+    fields = [f for f in GRID_FIELDS if f in listings.columns and (show_category or f != "category")]
+    rows = listings[fields].fillna("").astype(str)
+    if "description" in rows.columns:
+        long = rows["description"].str.len() > DESCRIPTION_LENGTH
+        rows.loc[long, "description"] = rows.loc[long, "description"].str[:DESCRIPTION_LENGTH] + "..."
+
+    clicked = _listing_grid(
+        rows=rows.to_dict("records"),
+        columns=columns,
+        row_height=row_height,
+        max_height=max_height,
+        key=key,
+        default=None
+    )
+
+    # The component keeps returning its last value, so report each click once
+    seen_key = f"{key}_seen"
+    if clicked is None or clicked.get("nonce") == st.session_state.get(seen_key):
+        return None
+    st.session_state[seen_key] = clicked.get("nonce")
+    return clicked.get("id")
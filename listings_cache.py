@@ -0,0 +1,298 @@
+import threading
+import pandas as pd
+from bitmap_index import BitmapIndex
+from search_index import SEARCH_FIELDS, SearchIndex
+
+
+class ListingsCache:
+    """Process-wide in-memory snapshot of the listings table.
+
+    Every Streamlit session shares the same snapshot. It is reloaded only
+    when the storage generation token changes (file mtime/size for CSV, a
+    write counter for SQLite). Writes from the change feed, including those
+    of other processes, are applied
+    to the snapshot in place, together with a hash index from listing id
+    to row label and bitmap indexes over row labels (live, approved, each
+    category, active premium), so they are visible at once without a
+    reload. A full-text search index is built on
+    first use and maintained the same way. The returned frame is shared
+    and must not be mutated by callers; patches build a new frame, so one
+    already handed out never changes.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._lock = threading.RLock()
+        self._frame = None
+        self._index = {}
+        self._search_index = None
+        self._pending_ids = set()
+        # Keys: "live", "approved", "premium" and ("category", name)
+        self._bitmaps = BitmapIndex()
+        # The premium id set the "premium" bitmap was built from
+        self._premium_ids = None
+        self._next_label = 0
+        self._token = None
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        self.invalidations = 0
+        self.patches = 0
+
+    def _load(self, token):
+        """Reload the snapshot and rebuild the id index."""
+        frame = self.storage.read_listings().reset_index(drop=True)
+        self._frame = frame
+        self._index = dict(zip(frame["id"], frame.index)) if "id" in frame.columns else {}
+        self._search_index = None
+        self._pending_ids = set(frame.loc[frame["approved"] != True, "id"]) if "id" in frame.columns else set()
+        self._bitmaps = BitmapIndex()
+        self._premium_ids = None
+        if not frame.empty:
+            self._bitmaps.load_labels("live", frame.index)
+            self._bitmaps.load("approved", (frame["approved"] == True).to_numpy())
+            for category, labels in frame.groupby("category").groups.items():
+                self._bitmaps.load_labels(("category", category), labels)
+        self._next_label = len(frame)
+        self._token = token
+        self.reloads += 1
+
+    def _current(self):
+        """Refresh the snapshot if stale. Must be called with the lock held."""
+        # The token is read before loading, so a write that races with the
+        # load leaves the snapshot stale and it is reloaded next time
+        token = self.storage.generation()
+        if self._frame is not None and token == self._token:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self._load(token)
+        return self._frame
+
+    def get(self):
+        """Get the current listings snapshot, reloading it if stale."""
+        with self._lock:
+            return self._current()
+
+    def lookup(self, listing_id):
+        """Get one listing row by id with a single index probe, or None."""
+        with self._lock:
+            frame = self._current()
+            label = self._index.get(str(listing_id))
+            if label is None:
+                return None
+            return frame.loc[label]
+
+    def lookup_many(self, listing_ids):
+        """Get listing rows for many ids as a frame aligned to the input.
+
+        Row ``i`` of the result belongs to ``listing_ids[i]``; ids that are
+        not found produce an all-NaN row.
+        """
+        listing_ids = list(listing_ids)
+        with self._lock:
+            frame = self._current()
+            labels = [self._index.get(str(listing_id), -1) for listing_id in listing_ids]
+            result = frame.reindex(labels)
+        result.index = pd.RangeIndex(len(listing_ids))
+        return result
+
+    def _bitmaps_add(self, label, category, approved):
+        """Set a row label's bits in the live, category and approved bitmaps."""
+        self._bitmaps.add("live", label)
+        self._bitmaps.add(("category", category), label)
+        if approved == True:
+            self._bitmaps.add("approved", label)
+
+    def _premium_bits(self, premium_ids):
+        """Get the bitmap of rows in a premium id set, rebuilding it if changed."""
+        if premium_ids is not self._premium_ids:
+            labels = [self._index[i] for i in map(str, premium_ids) if i in self._index]
+            self._bitmaps.load_labels("premium", labels)
+            self._premium_ids = premium_ids
+        return self._bitmaps.get("premium")
+
+    def _filter_bits(self, approved=None, category=None, premium_ids=None):
+        """AND together the bitmaps for a filter combination."""
+        bits = self._bitmaps.get("live")
+        if approved is True:
+            bits = bits & self._bitmaps.get("approved")
+        elif approved is False:
+            bits = bits & ~self._bitmaps.get("approved")
+        if category is not None:
+            bits = bits & self._bitmaps.get(("category", category))
+        if premium_ids is not None:
+            bits = bits & self._premium_bits(premium_ids)
+        return bits
+
+    def filter(self, approved=None, category=None, premium_ids=None):
+        """Get the listings matching every given filter, in table order.
+
+        ``approved`` is True, False (pending) or None (either);
+        ``premium_ids`` restricts to listings in that set.
+        """
+        with self._lock:
+            frame = self._current()
+            labels = self._bitmaps.labels(self._filter_bits(approved, category, premium_ids))
+            return frame.loc[labels]
+
+    def page(self, limit, offset=0, approved=None, category=None, premium_ids=None):
+        """Get one page of the filtered listings and the total match count."""
+        with self._lock:
+            frame = self._current()
+            labels = self._bitmaps.labels(self._filter_bits(approved, category, premium_ids))
+            return frame.loc[labels[offset:offset + limit]], len(labels)
+
+    def count(self, approved=None, category=None, premium_ids=None):
+        """Count the listings matching every given filter."""
+        with self._lock:
+            self._current()
+            return self._bitmaps.count(self._filter_bits(approved, category, premium_ids))
+
+    def by_category(self, category, approved_only=True):
+        """Get the listings in one category."""
+        return self.filter(approved=True if approved_only else None, category=category)
+
+    def category_counts(self, approved_only=True):
+        """Get the number of listings in each non-empty category."""
+        with self._lock:
+            self._current()
+            base = self._filter_bits(approved=True if approved_only else None)
+            counts = {}
+            for key in self._bitmaps.keys():
+                if isinstance(key, tuple):
+                    count = self._bitmaps.count(base & self._bitmaps.get(key))
+                    if count:
+                        counts[key[1]] = count
+            return counts
+
+    def search(self, query):
+        """Get listings matching a full-text query, in table order."""
+        with self._lock:
+            frame = self._current()
+            if self._search_index is None:
+                self._search_index = SearchIndex.from_frame(frame)
+            if not query.strip():
+                return frame
+            labels = sorted(self._index[listing_id] for listing_id in self._search_index.search(query))
+            return frame.loc[labels]
+
+    def rank(self, query, limit, boosts=None, approved_only=True, offset=0):
+        """Get ranked listings ``offset`` to ``offset + limit`` and the total match count."""
+        with self._lock:
+            frame = self._current()
+            if self._search_index is None:
+                self._search_index = SearchIndex.from_frame(frame)
+            exclude = self._pending_ids if approved_only else None
+            total, top = self._search_index.rank(query, offset + limit, boosts=boosts, exclude=exclude)
+            top = top[offset:]
+            results = frame.loc[[self._index[listing_id] for listing_id, _ in top]]
+        results = results.reset_index(drop=True)
+        results["score"] = [score for _, score in top]
+        return results, total
+
+    def _patchable(self, before):
+        """Check the snapshot matches the state a write started from."""
+        if self._frame is not None and before == self._token:
+            return True
+        # Someone else wrote in between; fall back to a full reload
+        self._frame = None
+        self._token = None
+        self.invalidations += 1
+        return False
+
+    def apply_insert(self, record, before, after):
+        """Apply an inserted listing, given the generations around the write."""
+        with self._lock:
+            if not self._patchable(before):
+                return
+            label = self._next_label
+            row = pd.DataFrame([record], index=[label])
+            self._frame = pd.concat([self._frame, row]) if not self._frame.empty else row
+            self._index[str(record["id"])] = label
+            self._bitmaps_add(label, record.get("category"), record.get("approved"))
+            # A new row may belong to the premium set; rebuild its bitmap on next use
+            self._premium_ids = None
+            if record.get("approved") != True:
+                self._pending_ids.add(str(record["id"]))
+            if self._search_index is not None:
+                self._search_index.add(record)
+            self._next_label += 1
+            self._token = after
+            self.patches += 1
+
+    def apply_update(self, listing_id, fields, before, after):
+        """Apply updated fields of a listing."""
+        with self._lock:
+            if not self._patchable(before):
+                return
+            label = self._index.get(str(listing_id))
+            if label is not None:
+                self._bitmaps.discard(("category", self._frame.at[label, "category"]), label)
+                self._bitmaps.discard("approved", label)
+                # Frames already handed out must not change under their
+                # readers, so the updated columns are replaced, not written to
+                frame = self._frame.copy(deep=False)
+                for column, value in fields.items():
+                    values = frame[column].copy()
+                    values.at[label] = value
+                    frame[column] = values
+                self._frame = frame
+                self._bitmaps_add(label, self._frame.at[label, "category"], self._frame.at[label, "approved"])
+                if "approved" in fields:
+                    if fields["approved"] == True:
+                        self._pending_ids.discard(str(listing_id))
+                    else:
+                        self._pending_ids.add(str(listing_id))
+                if self._search_index is not None and set(fields) & set(SEARCH_FIELDS):
+                    self._search_index.add(self._frame.loc[label].to_dict())
+            self._token = after
+            self.patches += 1
+
+    def apply_delete(self, listing_id, before, after):
+        """Apply a deleted listing."""
+        with self._lock:
+            if not self._patchable(before):
+                return
+            label = self._index.pop(str(listing_id), None)
+            if label is not None:
+                self._bitmaps.discard_label(label)
+                self._frame = self._frame.drop(index=label)
+            self._pending_ids.discard(str(listing_id))
+            if self._search_index is not None:
+                self._search_index.remove(listing_id)
+            self._token = after
+            self.patches += 1
+
+    def apply_change(self, change):
+        """Apply a change from the change feed, if it is to the listings table."""
+        # A change whose ``before`` is not the snapshot's generation (e.g. a
+        # reload already picked it up) invalidates the snapshot instead
+        if change["table"] != "listings":
+            return
+        if change["op"] == "insert":
+            self.apply_insert(change["data"], change["before"], change["after"])
+        elif change["op"] == "update":
+            self.apply_update(change["key"], change["data"], change["before"], change["after"])
+        elif change["op"] == "delete":
+            self.apply_delete(change["key"], change["before"], change["after"])
+
+    def invalidate(self):
+        """Drop the snapshot so the next read reloads it."""
+        with self._lock:
+            self._frame = None
+            self._search_index = None
+            self._token = None
+            self.invalidations += 1
+
+    def stats(self):
+        """Get the hit, miss, reload, patch and invalidation counters."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "patches": self.patches,
+                "invalidations": self.invalidations,
+                "rows": 0 if self._frame is None else len(self._frame),
+            }
@@ -0,0 +1,307 @@
+"""Simulate concurrent users of the directory pages with Streamlit's AppTest.
+
+Each simulated user runs a realistic session against a scratch copy of the
+data: open the home page, browse a category, search, view a listing's
+details, submit a listing and approve it from the admin page. AppTest
+keeps one runtime per process, so each user runs in its own process; the
+users share the data directory like several server processes would, e.g.:
+
+    python load_test.py --users 8 --sessions 5 --output load.json
+
+Reports reruns per second, p50/p99 script run time per page, and lost
+writes (submitted listings, approvals and page views missing from the
+files once every process has finished).
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from datetime import datetime
+
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+PAGES = {
+    "home": "app.py",
+    "browse": "pages/01_Browse_Directory.py",
+    "search": "pages/02_Search.py",
+    "submit": "pages/03_Submit_Listing.py",
+    "admin": "pages/05_Admin_Login.py",
+}
+SEARCH_TERMS = ["coffee", "yoga studio", "legal", "repair", "bakery", "tutoring", "spa", "plumbing"]
+APP_TIMEOUT_SECONDS = 60
+
+
+class SimulatedUser:
+    """One user session, timing every script run and recording its writes."""
+
+    def __init__(self, name, rng):
+        self.name = name
+        self.rng = rng
+        self.runs = []  # (page, seconds)
+        self.submitted = []  # listing names
+        self.approved = []  # listing ids
+        self.views = 0
+        self.errors = []
+
+    def _run(self, page, at):
+        """Run one rerun of a page and time it."""
+        started = time.perf_counter()
+        at.run()
+        self.runs.append((page, time.perf_counter() - started))
+        if at.exception:
+            raise RuntimeError(f"{page}: {at.exception[0].value}")
+        return at
+
+    def _open(self, page):
+        """Open a page in a fresh session."""
+        from streamlit.testing.v1 import AppTest
+        at = AppTest.from_file(os.path.join(REPO_DIR, PAGES[page]), default_timeout=APP_TIMEOUT_SECONDS)
+        return self._run(page, at)
+
+    def _view_details(self, page, at, listing_id):
+        """Open a listing's detail panel as a grid click would.
+
+        AppTest cannot click inside the grid component, so this does what
+        the page does with the clicked id and reruns it.
+        """
+        import utils
+        utils.track_page_view(listing_id)
+        self.views += 1
+        at.session_state[f"{page}_current_listing"] = listing_id
+        at.session_state[f"{page}_show_details"] = True
+        self._run(page, at)
+
+    def session(self):
+        """Run one full user session."""
+        from data_manager import rank_listings
+
+        self._open("home")
+
+        at = self._open("browse")
+        buttons = [b for b in at.button if b.key and b.key.startswith("cat_preview_")]
+        if buttons:
+            buttons[int(self.rng.integers(len(buttons)))].click()
+            self._run("browse", at)
+
+        term = SEARCH_TERMS[int(self.rng.integers(len(SEARCH_TERMS)))]
+        at = self._open("search")
+        at.text_input[0].input(term)
+        at.button[0].click()
+        self._run("search", at)
+        results, _ = rank_listings(term, limit=20)
+        if not results.empty:
+            self._view_details("search", at, results.iloc[int(self.rng.integers(len(results)))]["id"])
+
+        listing_name = f"Load Test {self.name} {len(self.submitted)}"
+        at = self._open("submit")
+        for widget in at.text_input:
+            value = {
+                "Business Name*": listing_name,
+                "Business Location*": "Load City",
+                "Website URL*": "https://loadtest.example.com",
+                "Business Email*": "load@example.com",
+                "Business Phone": "555-000-0000",
+            }.get(widget.label)
+            if value:
+                widget.input(value)
+        at.text_area[0].input("Synthetic listing submitted by the load test")
+        for checkbox in at.checkbox:
+            checkbox.check()
+        at.button[0].click()
+        self._run("submit", at)
+        if not at.success:
+            raise RuntimeError("submit: listing was not accepted")
+        self.submitted.append(listing_name)
+
+        self._approve(listing_name)
+
+    def _approve(self, listing_name):
+        """Log in as admin and approve the submitted listing."""
+        from data_manager import get_all_listings
+
+        matches = get_all_listings(approved_only=False)
+        matches = matches[matches["name"] == listing_name]
+        if matches.empty:
+            raise RuntimeError(f"admin: {listing_name} is not in the listings")
+        listing_id = matches.iloc[0]["id"]
+
+        at = self._open("admin")
+        at.text_input[0].input("admin")
+        at.text_input[1].input("directory_admin")
+        at.button[0].click()
+        self._run("admin", at)
+        # Pending listings are oldest first, so start from the last page
+        at.session_state["page_admin_Pending_All"] = 10 ** 9
+        at.selectbox[0].select("Pending")
+        self._run("admin", at)
+        for _ in range(5):
+            button = [b for b in at.button if b.key == f"approve_{listing_id}"]
+            if button:
+                button[0].click()
+                self._run("admin", at)
+                self.approved.append(listing_id)
+                return
+            previous = [b for b in at.button if b.key and b.key.endswith("_prev") and not b.disabled]
+            if not previous:
+                break
+            previous[0].click()
+            self._run("admin", at)
+        raise RuntimeError(f"admin: no approve button for {listing_name}")
+
+    def run(self, sessions, deadline):
+        """Run sessions until done or past the deadline."""
+        for _ in range(sessions):
+            if time.monotonic() > deadline:
+                break
+            try:
+                self.session()
+            except Exception:
+                self.errors.append(traceback.format_exc(limit=3))
+
+
+def run_worker(user, sessions, duration, seed):
+    """Run one user in this process and print its results as JSON."""
+    sys.path.insert(0, REPO_DIR)
+    from ingest import flush_page_views
+
+    simulated = SimulatedUser(f"u{user}", np.random.default_rng([seed, user]))
+    simulated.run(sessions, time.monotonic() + duration)
+    flush_page_views()
+
+    json.dump({
+        "runs": simulated.runs,
+        "submitted": simulated.submitted,
+        "approved": simulated.approved,
+        "views": simulated.views,
+        "errors": simulated.errors,
+    }, sys.stdout)
+
+
+def _count_page_views(data_dir):
+    """Count the page view events in every partition."""
+    from analytics_partitions import read_partitions
+    return len(read_partitions(directory=os.path.join(data_dir, "analytics"), columns=["listing_id"]))
+
+
+def find_lost_writes(work_dir, submitted, approved, views, views_before):
+    """Compare the writes the users made with what the storage backend holds."""
+    import data_manager
+
+    # Data paths are relative to the working directory, as in the workers
+    cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        listings = data_manager.get_storage().read_listings()
+    finally:
+        os.chdir(cwd)
+    names = set(listings["name"])
+    approved_ids = set(listings.loc[listings["approved"] == True, "id"])
+    views_after = _count_page_views(os.path.join(work_dir, "data"))
+    return {
+        "listings": sum(1 for name in submitted if name not in names),
+        "approvals": sum(1 for listing_id in approved if listing_id not in approved_ids),
+        "page_views": max(0, views - (views_after - views_before)),
+    }
+
+
+def _summarize(runs):
+    """Get run counts and p50/p99 run time per page."""
+    by_page = {}
+    for page, seconds in runs:
+        by_page.setdefault(page, []).append(seconds * 1000)
+    return {
+        page: {
+            "runs": len(ms),
+            "p50_ms": round(float(np.percentile(ms, 50)), 1),
+            "p99_ms": round(float(np.percentile(ms, 99)), 1),
+            "max_ms": round(float(max(ms)), 1),
+        }
+        for page, ms in sorted(by_page.items())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the directory pages with concurrent AppTest sessions.")
+    parser.add_argument("--users", type=int, default=4, help="concurrent users, one process each")
+    parser.add_argument("--sessions", type=int, default=3, help="sessions each user runs")
+    parser.add_argument("--duration", type=float, default=300, help="stop starting sessions after this many seconds")
+    parser.add_argument("--data-dir", help="data directory to copy (default: generate one)")
+    parser.add_argument("--listings", type=int, default=2000, help="listings to generate without --data-dir")
+    parser.add_argument("--events", type=int, default=100_000, help="page views to generate without --data-dir")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        run_worker(args.worker, args.sessions, args.duration, args.seed)
+        return
+
+    work_dir = tempfile.mkdtemp(prefix="directory-load-")
+    data_dir = os.path.join(work_dir, "data")
+    try:
+        if args.data_dir:
+            shutil.copytree(args.data_dir, data_dir)
+        else:
+            from generate_data import generate
+            generate(data_dir, listings=args.listings, events=args.events, seed=args.seed)
+        views_before = _count_page_views(data_dir)
+
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get("PYTHONPATH")])))
+        started = time.perf_counter()
+        workers = [
+            subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "--worker", str(user),
+                 "--sessions", str(args.sessions), "--duration", str(args.duration), "--seed", str(args.seed)],
+                cwd=work_dir, env=env, stdout=subprocess.PIPE
+            )
+            for user in range(args.users)
+        ]
+        results = []
+        for worker in workers:
+            output, _ = worker.communicate()
+            if worker.returncode != 0:
+                raise SystemExit(f"Load test worker failed with exit code {worker.returncode}")
+            results.append(json.loads(output))
+        elapsed = time.perf_counter() - started
+
+        runs = [tuple(run) for result in results for run in result["runs"]]
+        submitted = [name for result in results for name in result["submitted"]]
+        approved = [listing_id for result in results for listing_id in result["approved"]]
+        views = sum(result["views"] for result in results)
+        errors = [error for result in results for error in result["errors"]]
+        report = {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "users": args.users,
+            "elapsed_seconds": round(elapsed, 2),
+            "reruns": len(runs),
+            "reruns_per_second": round(len(runs) / elapsed, 2) if elapsed else 0.0,
+            "pages": _summarize(runs),
+            "writes": {"listings": len(submitted), "approvals": len(approved), "page_views": views},
+            "lost_writes": find_lost_writes(work_dir, submitted, approved, views, views_before),
+            "errors": len(errors),
+            "error_samples": errors[:5],
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{report['reruns']} reruns in {report['elapsed_seconds']}s ({report['reruns_per_second']}/s), "
+          f"lost writes {report['lost_writes']}, errors {report['errors']}", file=sys.stderr)
+    for page, stats in report["pages"].items():
+        print(f"  {page:<8} runs {stats['runs']:>5}  p50 {stats['p50_ms']:>8.1f}ms  p99 {stats['p99_ms']:>8.1f}ms",
+              file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Prometheus text-format metrics for the directory process.
+
+Set DIRECTORY_METRICS_FILE to have the metrics written to a file every
+DIRECTORY_METRICS_INTERVAL seconds (for node_exporter's textfile
+collector), and/or DIRECTORY_METRICS_PORT to serve them at /metrics from
+a side thread. The exporter starts when the pages first import utils, so
+``streamlit run app.py`` is unchanged.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from atomic_file import atomic_write
+from data_manager import get_cache_stats
+from ingest import get_page_view_buffer
+from instrumentation import enable_page_timing, get_histograms
+from io_stats import get_io_stats
+
+logger = logging.getLogger(__name__)
+
+METRICS_FILE = os.environ.get("DIRECTORY_METRICS_FILE", "")
+METRICS_PORT = int(os.environ.get("DIRECTORY_METRICS_PORT", "0"))
+METRICS_HOST = os.environ.get("DIRECTORY_METRICS_HOST", "127.0.0.1")
+METRICS_INTERVAL_SECONDS = float(os.environ.get("DIRECTORY_METRICS_INTERVAL", "15"))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+SUMMARY_QUANTILES = [0.5, 0.9, 0.99]
+
+
+def _labels(labels):
+    """Format a label set, escaping values as the text format requires."""
+    if not labels:
+        return ""
+    escaped = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+
+def _metric(lines, name, kind, help_text, samples):
+    """Append one metric family; ``samples`` are (suffix, labels, value)."""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for suffix, labels, value in samples:
+        lines.append(f"{name}{suffix}{_labels(labels)} {value if isinstance(value, int) else repr(float(value))}")
+
+
+def _summary_samples(histograms, kind, label):
+    """Get summary samples (quantiles, sum, count) for recorded timings of a kind."""
+    samples = []
+    for (timing_kind, name), histogram in sorted(histograms.items()):
+        if timing_kind != kind or not histogram.count:
+            continue
+        for quantile in SUMMARY_QUANTILES:
+            samples.append(("", {label: name, "quantile": quantile}, histogram.percentile(quantile * 100)))
+        samples.append(("_sum", {label: name}, histogram.total))
+        samples.append(("_count", {label: name}, histogram.count))
+    return samples
+
+
+def render_metrics():
+    """Get the current metrics in the Prometheus text format."""
+    lines = []
+    cache = get_cache_stats()
+    _metric(lines, "directory_listings_loaded", "gauge",
+            "Listings held by the listings cache.", [("", {}, cache["rows"])])
+    _metric(lines, "directory_listings_cache_requests_total", "counter",
+            "Listings cache lookups by result.",
+            [("", {"result": "hit"}, cache["hits"]), ("", {"result": "miss"}, cache["misses"])])
+    _metric(lines, "directory_listings_cache_reloads_total", "counter",
+            "Full reloads of the listings cache from storage.", [("", {}, cache["reloads"])])
+    _metric(lines, "directory_listings_cache_patches_total", "counter",
+            "In-place updates of the listings cache after a write.", [("", {}, cache["patches"])])
+
+    io_bytes = get_io_stats()
+    for operation in ("read", "write"):
+        _metric(lines, f"directory_storage_{operation}_bytes_total", "counter",
+                f"Bytes of data files {'read' if operation == 'read' else 'written'}, by file format.",
+                [("", {"format": fmt}, nbytes) for (op, fmt), nbytes in sorted(io_bytes.items()) if op == operation])
+
+    buffer = get_page_view_buffer()
+    _metric(lines, "directory_page_views_ingested_total", "counter",
+            "Page view events accepted into the ingest buffer.", [("", {}, buffer.appended)])
+    _metric(lines, "directory_page_views_flushed_total", "counter",
+            "Page view events written to the analytics log.", [("", {}, buffer.flushed)])
+    _metric(lines, "directory_page_view_queue_depth", "gauge",
+            "Page view events buffered and not yet written.", [("", {}, buffer.pending())])
+
+    histograms = get_histograms()
+    _metric(lines, "directory_page_run_seconds", "summary",
+            "Script run time per page.", _summary_samples(histograms, "page", "page"))
+    function_samples = _summary_samples(histograms, "function", "function")
+    if function_samples:
+        _metric(lines, "directory_function_call_seconds", "summary",
+                "Call time per instrumented function.", function_samples)
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics_file(path=None):
+    """Write the metrics to a file atomically, so scrapers never see a partial file."""
+    path = path or METRICS_FILE
+    with atomic_write(path) as tmp_path, open(tmp_path, "w") as f:
+        f.write(render_metrics())
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    """Serves the metrics at /metrics."""
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Keep scrapes out of the app's console."""
+
+
+def _write_periodically():
+    """Rewrite the metrics file every interval."""
+    while True:
+        time.sleep(METRICS_INTERVAL_SECONDS)
+        try:
+            write_metrics_file()
+        except OSError:
+            logger.exception("Could not write metrics to %s", METRICS_FILE)
+
+
+_exporter_started = False
+_exporter_lock = threading.Lock()
+
+
+def start_metrics_exporter():
+    """Start the configured metrics file writer and/or HTTP endpoint, once per process."""
+    global _exporter_started
+    with _exporter_lock:
+        if _exporter_started or not (METRICS_FILE or METRICS_PORT):
+            return
+        _exporter_started = True
+    enable_page_timing()
+
+    if METRICS_FILE:
+        threading.Thread(target=_write_periodically, name="metrics-file", daemon=True).start()
+        atexit.register(write_metrics_file)
+
+    if METRICS_PORT:
+        try:
+            server = ThreadingHTTPServer((METRICS_HOST, METRICS_PORT), _MetricsHandler)
+        except OSError:
+            # Another process (e.g. a second replica) already serves this port
+            logger.exception("Metrics endpoint not started on %s:%s", METRICS_HOST, METRICS_PORT)
+            return
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
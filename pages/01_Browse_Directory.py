@@ -1,7 +1,11 @@
 import streamlit as st
 import pandas as pd
-from data_manager import get_listings_by_category, get_categories
-from utils import track_page_view, apply_page_styling
+from data_manager import get_listings_page, get_categories, get_category_counts, get_listing_by_id
+from listing_grid import listing_grid
+from utils import track_page_view, apply_page_styling, get_page_offset, render_pagination, get_listing_views
+from instrumentation import time_fragment_runs, time_page_run
+
+time_page_run("Browse Directory")
 
 # Page configuration
 st.set_page_config(
@@ -13,144 +17,23 @@ st.set_page_config(
 # Apply consistent styling across the app
 apply_page_styling()
 
-# Add page-specific styles
-st.markdown("""
-<style>
-    /* Listing card styling */
-    .listing-card {
-        border: 1px solid #e0e0e0;
-        border-radius: 8px;
-        padding: 20px;
-        margin-bottom: 20px;
-        background-color: #FFFFFF;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-        transition: transform 0.2s, box-shadow 0.2s;
-    }
-    .listing-card:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-    }
-    
-    /* Category button styling */
-    .category-button {
-        background-color: #F8F9FA;
-        border: 1px solid #e0e0e0;
-        border-radius: 8px;
-        padding: 15px;
-        text-align: center;
-        margin-bottom: 15px;
-        transition: transform 0.2s;
-    }
-    .category-button:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-    }
-</style>
-""", unsafe_allow_html=True)
+# Number of listings sent to the grid per page
+LISTINGS_PER_PAGE = 120
 
-# Get selected category from session state
-selected_category = None
-if 'selected_category' in st.session_state:
-    selected_category = st.session_state['selected_category']
+def select_category(category):
+    """Select the category whose listings are shown."""
+    st.session_state['selected_category'] = category
 
-# Title and description
-st.title("Browse Directory")
-st.write("Explore businesses by category")
+def close_details():
+    """Hide the detail panel."""
+    st.session_state['browse_show_details'] = False
 
-# Sidebar with categories
-st.sidebar.title("Categories")
-categories = get_categories()
-
-# Allow selection of category from sidebar
-for i, category in enumerate(categories['name']):
-    if st.sidebar.button(category, key=f"cat_sidebar_{i}"):
-        selected_category = category
-        st.session_state['selected_category'] = category
-        st.rerun()
-
-# Display listings for selected category
-if selected_category:
-    st.header(f"{selected_category} Businesses")
+def render_listing_details():
+    """Render the detail panel for the listing selected in session state."""
+    if not ('browse_show_details' in st.session_state and st.session_state['browse_show_details'] and 'browse_current_listing' in st.session_state):
+        return
     
-    # Get listings for this category
-    listings = get_listings_by_category(selected_category)
-    
-    if listings.empty:
-        st.info(f"No businesses listed in {selected_category} yet.")
-    else:
-        # Display listings in a grid with modern cards
-        cols = st.columns(3)
-        
-        for i, row in listings.iterrows():
-            with cols[i % 3]:
-                # Create a styled card for each listing
-                st.markdown(f"""
-                <div class="listing-card">
-                    <h3>{row['name']}</h3>
-                    <p><em>📍 {row['location']}</em></p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Description with truncation for long text
-                description = row['description']
-                if len(description) > 150:
-                    description = description[:150] + "..."
-                st.write(description)
-                
-                # Use columns for buttons with better styling
-                btn_col1, btn_col2 = st.columns(2)
-                with btn_col1:
-                    if st.button("View Details", key=f"view_{row['id']}", use_container_width=True):
-                        # Track the page view
-                        track_page_view(row['id'])
-                        
-                        # Store in session state
-                        st.session_state['current_listing'] = row['id']
-                        
-                        # Display details
-                        st.session_state['show_details'] = True
-                        st.rerun()
-                
-                with btn_col2:
-                    # Style the website link as a button for consistency
-                    st.markdown(f"""
-                    <a href="{row['website']}" target="_blank" style="
-                        display: inline-block;
-                        width: 100%;
-                        padding: 0.5rem 1rem;
-                        background-color: #F8F9FA;
-                        color: #212529;
-                        text-align: center;
-                        text-decoration: none;
-                        font-size: 16px;
-                        border-radius: 4px;
-                        border: 1px solid #e0e0e0;
-                        cursor: pointer;
-                    ">Visit Website</a>
-                    """, unsafe_allow_html=True)
-                
-                # Add some spacing instead of a line
-                st.markdown("<div style='margin-bottom: 30px;'></div>", unsafe_allow_html=True)
-else:
-    # If no category selected, show a prompt to select
-    st.info("Please select a category from the sidebar to browse businesses.")
-    
-    # Show a preview of categories
-    st.subheader("Popular Categories")
-    cols = st.columns(4)
-    
-    for i, category in enumerate(categories['name'][:8]):  # Show first 8 categories
-        with cols[i % 4]:
-            if st.button(category, key=f"cat_preview_{i}"):
-                selected_category = category
-                st.session_state['selected_category'] = category
-                st.rerun()
-
-# Detail view for a specific listing
-if 'show_details' in st.session_state and st.session_state['show_details'] and 'current_listing' in st.session_state:
-    from data_manager import get_listing_by_id
-    
-    listing_id = st.session_state['current_listing']
+    listing_id = st.session_state['browse_current_listing']
     listing = get_listing_by_id(listing_id)
     
     if listing is not None:
@@ -214,7 +97,6 @@ if 'show_details' in st.session_state and st.session_state['show_details'] and '
             """, unsafe_allow_html=True)
             
             # Get view count
-            from utils import get_listing_views
             views = get_listing_views(listing_id)
             
             st.metric("Page Views", views)
@@ -222,9 +104,7 @@ if 'show_details' in st.session_state and st.session_state['show_details'] and '
             st.markdown("</div>", unsafe_allow_html=True)
             
             # Close button with better styling
-            if st.button("← Back to Listings", key="close_details", use_container_width=True):
-                st.session_state['show_details'] = False
-                st.rerun()
+            st.button("← Back to Listings", key="close_details", use_container_width=True, on_click=close_details)
             
             # Call to action for premium
             st.markdown("""
@@ -236,3 +116,74 @@ if 'show_details' in st.session_state and st.session_state['show_details'] and '
             
             if st.button("Explore Premium Options", key="premium_cta", use_container_width=True):
                 st.switch_page("pages/04_Premium_Options.py")
+
+@st.fragment
+@time_fragment_runs
+def render_category_listings(category):
+    """Render one page of a category's listings and the detail panel.
+    
+    Runs as a fragment: paging, opening and closing details rerun only
+    this function, not the page.
+    """
+    # Get one page of listings for this category
+    page_key = f"browse_{category}"
+    listings, total_listings = get_listings_page(LISTINGS_PER_PAGE, get_page_offset(page_key, LISTINGS_PER_PAGE), category=category)
+    if listings.empty and total_listings:
+        # The page is past the end after the listings shrank; go to the last page
+        offset = get_page_offset(page_key, LISTINGS_PER_PAGE, total_listings)
+        listings, total_listings = get_listings_page(LISTINGS_PER_PAGE, offset, category=category)
+    
+    if listings.empty:
+        st.info(f"No businesses listed in {category} yet.")
+    else:
+        # Display listings in a virtualized grid; only the visible cards are rendered
+        clicked_id = listing_grid(listings, key=f"grid_{page_key}", columns=3)
+        if clicked_id:
+            # Track the page view
+            track_page_view(clicked_id)
+            
+            # Store in session state; the panel below renders in this same run
+            st.session_state['browse_current_listing'] = clicked_id
+            st.session_state['browse_show_details'] = True
+        
+        render_pagination(total_listings, LISTINGS_PER_PAGE, page_key)
+    
+    render_listing_details()
+
+# Get selected category from session state
+selected_category = None
+if 'selected_category' in st.session_state:
+    selected_category = st.session_state['selected_category']
+
+# Title and description
+st.title("Browse Directory")
+st.write("Explore businesses by category")
+
+# Sidebar with categories
+st.sidebar.title("Categories")
+categories = get_categories()
+category_counts = get_category_counts()
+
+# Allow selection of category from sidebar
+for i, category in enumerate(categories['name']):
+    st.sidebar.button(f"{category} ({category_counts.get(category, 0)})", key=f"cat_sidebar_{i}",
+                      on_click=select_category, args=(category,))
+
+# Display listings for selected category
+if selected_category:
+    st.header(f"{selected_category} Businesses")
+    render_category_listings(selected_category)
+else:
+    # If no category selected, show a prompt to select
+    st.info("Please select a category from the sidebar to browse businesses.")
+    
+    # Show a preview of categories
+    st.subheader("Popular Categories")
+    cols = st.columns(4)
+    
+    for i, category in enumerate(categories['name'][:8]):  # Show first 8 categories
+        with cols[i % 4]:
+            st.button(f"{category} ({category_counts.get(category, 0)})", key=f"cat_preview_{i}",
+                      on_click=select_category, args=(category,))
+    
+    render_listing_details()
@@ -1,7 +1,11 @@
 import streamlit as st
 import pandas as pd
-from data_manager import search_listings
-from utils import track_page_view, apply_page_styling
+from data_manager import rank_listings, get_listing_by_id
+from listing_grid import listing_grid
+from utils import track_page_view, apply_page_styling, get_page_offset, render_pagination, get_listing_views
+from instrumentation import time_fragment_runs, time_page_run
+
+time_page_run("Search")
 
 # Page configuration
 st.set_page_config(
@@ -13,128 +17,23 @@ st.set_page_config(
 # Apply consistent styling across the app
 apply_page_styling()
 
-# Add page-specific styles
-st.markdown("""
-<style>
-    /* Search result card styling */
-    .search-result {
-        border: 1px solid #e0e0e0;
-        border-radius: 8px;
-        padding: 20px;
-        margin-bottom: 20px;
-        background-color: #FFFFFF;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-        transition: transform 0.2s, box-shadow 0.2s;
-    }
-    .search-result:hover {
-        transform: translateY(-5px);
-        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-    }
-    
-    /* Search form styling */
-    .search-form {
-        background-color: #F8F9FA;
-        padding: 20px;
-        border-radius: 10px;
-        margin-bottom: 30px;
-    }
-</style>
-""", unsafe_allow_html=True)
-
 # Title and description
 st.title("Search Business Directory")
 st.write("Find businesses by name, category, or keywords")
 
-# Search form with improved styling
-st.markdown('<div class="search-form">', unsafe_allow_html=True)
-with st.form(key="search_form"):
-    st.markdown("<h3>Find the perfect business</h3>", unsafe_allow_html=True)
-    search_query = st.text_input("Search for businesses", placeholder="Enter business name, category, or keywords")
-    submit_button = st.form_submit_button("Search", use_container_width=True)
-st.markdown('</div>', unsafe_allow_html=True)
-
-# Process search when form is submitted
-if submit_button and search_query:
-    # Get search results
-    results = search_listings(search_query)
-    
-    # Display results
-    st.header(f"Search Results for '{search_query}'")
-    
-    if results.empty:
-        st.info("No results found. Try different keywords.")
-    else:
-        st.write(f"Found {len(results)} results")
-        
-        # Display results in a grid with modern styling
-        cols = st.columns(2)
-        
-        for i, row in results.iterrows():
-            with cols[i % 2]:
-                # Create a styled card for each search result
-                st.markdown(f"""
-                <div class="search-result">
-                    <h3>{row['name']}</h3>
-                    <p><em>Category: {row['category']}</em></p>
-                    <p><em>📍 {row['location']}</em></p>
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # Description with truncation for long text
-                description = row['description']
-                if len(description) > 150:
-                    description = description[:150] + "..."
-                st.write(description)
-                
-                # Use columns for buttons with better styling
-                btn_col1, btn_col2 = st.columns(2)
-                with btn_col1:
-                    if st.button("View Details", key=f"view_{row['id']}", use_container_width=True):
-                        # Track the page view
-                        track_page_view(row['id'])
-                        
-                        # Store in session state and show details
-                        st.session_state['current_listing'] = row['id']
-                        st.session_state['show_details'] = True
-                        st.rerun()
-                
-                with btn_col2:
-                    # Style the website link as a button for consistency
-                    st.markdown(f"""
-                    <a href="{row['website']}" target="_blank" style="
-                        display: inline-block;
-                        width: 100%;
-                        padding: 0.5rem 1rem;
-                        background-color: #F8F9FA;
-                        color: #212529;
-                        text-align: center;
-                        text-decoration: none;
-                        font-size: 16px;
-                        border-radius: 4px;
-                        border: 1px solid #e0e0e0;
-                        cursor: pointer;
-                    ">Visit Website</a>
-                    """, unsafe_allow_html=True)
-                
-                # Add some spacing
-                st.markdown("<div style='margin-bottom: 30px;'></div>", unsafe_allow_html=True)
-elif submit_button:
-    st.warning("Please enter a search term.")
+# Number of ranked results sent to the grid per page
+RESULTS_PER_PAGE = 120
 
-# Search tips
-with st.expander("Search Tips"):
-    st.write("""
-    - Search by business name: "Joe's Coffee Shop"
-    - Search by category: "Restaurant" or "Tech"
-    - Search by location: "Downtown" or "New York"
-    - Search by keywords in description: "organic" or "professional"
-    """)
+def close_details():
+    """Hide the detail panel."""
+    st.session_state['search_show_details'] = False
 
-# Detail view for a specific listing with enhanced styling
-if 'show_details' in st.session_state and st.session_state['show_details'] and 'current_listing' in st.session_state:
-    from data_manager import get_listing_by_id
+def render_listing_details():
+    """Render the detail panel for the listing selected in session state."""
+    if not ('search_show_details' in st.session_state and st.session_state['search_show_details'] and 'search_current_listing' in st.session_state):
+        return
     
-    listing_id = st.session_state['current_listing']
+    listing_id = st.session_state['search_current_listing']
     listing = get_listing_by_id(listing_id)
     
     if listing is not None:
@@ -198,7 +97,6 @@ if 'show_details' in st.session_state and st.session_state['show_details'] and '
             """, unsafe_allow_html=True)
             
             # Get view count
-            from utils import get_listing_views
             views = get_listing_views(listing_id)
             
             st.metric("Page Views", views)
@@ -206,9 +104,7 @@ if 'show_details' in st.session_state and st.session_state['show_details'] and '
             st.markdown("</div>", unsafe_allow_html=True)
             
             # Close button with better styling
-            if st.button("← Back to Results", key="close_details", use_container_width=True):
-                st.session_state['show_details'] = False
-                st.rerun()
+            st.button("← Back to Results", key="close_details", use_container_width=True, on_click=close_details)
             
             # Call to action for premium
             st.markdown("""
@@ -220,3 +116,72 @@ if 'show_details' in st.session_state and st.session_state['show_details'] and '
             
             if st.button("Explore Premium Options", key="premium_cta", use_container_width=True):
                 st.switch_page("pages/04_Premium_Options.py")
+
+@st.fragment
+@time_fragment_runs
+def render_search_results(query):
+    """Render one page of ranked results and the detail panel.
+    
+    Runs as a fragment: paging, opening and closing details rerun only
+    this function, not the page.
+    """
+    # Get one page of search results, best matches and premium listings first
+    results, total_results = rank_listings(query, limit=RESULTS_PER_PAGE, offset=get_page_offset("search", RESULTS_PER_PAGE))
+    if results.empty and total_results:
+        # The page is past the end after the results shrank; go to the last page
+        offset = get_page_offset("search", RESULTS_PER_PAGE, total_results)
+        results, total_results = rank_listings(query, limit=RESULTS_PER_PAGE, offset=offset)
+    
+    # Display results
+    st.header(f"Search Results for '{query}'")
+    
+    if results.empty:
+        st.info("No results found. Try different keywords.")
+    else:
+        st.write(f"Found {total_results} results")
+        
+        # Display results in a virtualized grid; only the visible cards are rendered
+        clicked_id = listing_grid(results, key="grid_search", columns=2, show_category=True)
+        if clicked_id:
+            # Track the page view
+            track_page_view(clicked_id)
+            
+            # Store in session state; the panel below renders in this same run
+            st.session_state['search_current_listing'] = clicked_id
+            st.session_state['search_show_details'] = True
+        
+        render_pagination(total_results, RESULTS_PER_PAGE, "search")
+    
+    render_listing_details()
+
+# Search form with improved styling
+st.markdown('<div class="search-form">', unsafe_allow_html=True)
+with st.form(key="search_form"):
+    st.markdown("<h3>Find the perfect business</h3>", unsafe_allow_html=True)
+    search_query = st.text_input("Search for businesses", placeholder="Enter business name, category, or keywords")
+    submit_button = st.form_submit_button("Search", use_container_width=True)
+st.markdown('</div>', unsafe_allow_html=True)
+
+# Keep the submitted query so results survive page navigation reruns
+if submit_button:
+    if search_query:
+        st.session_state['search_query'] = search_query
+        st.session_state['page_search'] = 0
+    else:
+        st.session_state.pop('search_query', None)
+        st.warning("Please enter a search term.")
+
+active_query = st.session_state.get('search_query')
+if active_query:
+    render_search_results(active_query)
+
+# Search tips
+with st.expander("Search Tips"):
+    st.write("""
+    - Search by business name: "Joe's Coffee Shop"
+    - Search by category: "Restaurant" or "Tech"
+    - Search by location: "Downtown" or "New York"
+    - Search by keywords in description: "organic" or "professional"
+    - Match the start of a word: "coff" finds "Coffee"
+    - Find either of several terms: "bakery OR cafe"
+    """)
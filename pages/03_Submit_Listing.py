@@ -2,6 +2,9 @@ import streamlit as st
 import pandas as pd
 from data_manager import add_listing, get_categories
 from utils import is_valid_url, is_valid_email, apply_page_styling
+from instrumentation import time_page_run
+
+time_page_run("Submit Listing")
 
 # Page configuration
 st.set_page_config(
@@ -13,29 +16,6 @@ st.set_page_config(
 # Apply consistent styling across the app
 apply_page_styling()
 
-# Add page-specific styles
-st.markdown("""
-<style>
-    /* Form styling */
-    .form-container {
-        background-color: white;
-        padding: 30px;
-        border-radius: 10px;
-        border: 1px solid #e0e0e0;
-        box-shadow: 0 2px 10px rgba(0,0,0,0.05);
-    }
-    
-    /* Benefits card styling */
-    .benefits-card {
-        background-color: #F0F3FF;
-        padding: 20px;
-        border-radius: 10px;
-        border-left: 4px solid #4361EE;
-        margin-bottom: 20px;
-    }
-</style>
-""", unsafe_allow_html=True)
-
 # Title and description
 st.title("Submit Your Business Listing")
 st.write("Get your business listed in our directory")
@@ -1,6 +1,9 @@
 import streamlit as st
 from utils import verify_admin, apply_page_styling
 from admin import render_admin_dashboard
+from instrumentation import time_page_run
+
+time_page_run("Admin")
 
 # Page configuration
 st.set_page_config(
@@ -12,31 +15,6 @@ st.set_page_config(
 # Apply consistent styling across the app
 apply_page_styling()
 
-# Add page-specific styles
-st.markdown("""
-<style>
-    /* Login container styling */
-    .login-container {
-        max-width: 500px;
-        margin: 0 auto;
-        padding: 30px;
-        background-color: white;
-        border-radius: 10px;
-        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-    }
-    
-    /* Admin dashboard styling */
-    .admin-section {
-        background-color: white;
-        padding: 20px;
-        border-radius: 10px;
-        margin-bottom: 20px;
-        border: 1px solid #e0e0e0;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-    }
-</style>
-""", unsafe_allow_html=True)
-
 # Title
 st.title("Admin Login")
 
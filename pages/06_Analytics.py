@@ -2,8 +2,12 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from datetime import datetime, timedelta
-from data_manager import get_analytics_data, get_listing_by_id
+from data_manager import get_analytics_data, enrich_with_listings
+from dashboard_metrics import get_dashboard_metrics
 from utils import verify_admin, apply_page_styling
+from instrumentation import time_page_run
+
+time_page_run("Analytics")
 
 # Page configuration
 st.set_page_config(
@@ -15,40 +19,6 @@ st.set_page_config(
 # Apply consistent styling across the app
 apply_page_styling()
 
-# Add page-specific styles
-st.markdown("""
-<style>
-    /* Analytics card styling */
-    .analytics-card {
-        background-color: white;
-        padding: 20px;
-        border-radius: 10px;
-        margin-bottom: 20px;
-        border: 1px solid #e0e0e0;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-    }
-    
-    /* Stat counter styling */
-    .stat-counter {
-        background-color: #F8F9FA;
-        padding: 15px;
-        border-radius: 8px;
-        text-align: center;
-        border-left: 4px solid #4361EE;
-    }
-    
-    /* Login form styling */
-    .login-container {
-        max-width: 500px;
-        margin: 0 auto;
-        padding: 30px;
-        background-color: white;
-        border-radius: 10px;
-        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-    }
-</style>
-""", unsafe_allow_html=True)
-
 # Title
 st.title("Directory Analytics")
 
@@ -98,15 +68,9 @@ if 'admin_logged_in' not in st.session_state or not st.session_state['admin_logg
         
         st.markdown('</div>', unsafe_allow_html=True)
 else:
-    # Get analytics data
-    analytics_data = get_analytics_data()
-    
-    if analytics_data.empty:
+    if get_dashboard_metrics().total_views == 0:
         st.info("No analytics data available yet. As users interact with listings, data will appear here.")
     else:
-        # Convert timestamp to datetime
-        analytics_data["timestamp"] = pd.to_datetime(analytics_data["timestamp"])
-        
         # Date filter in a styled card
         st.markdown('<div class="analytics-card">', unsafe_allow_html=True)
         st.markdown("<h3>Filter Data</h3>", unsafe_allow_html=True)
@@ -131,15 +95,15 @@ else:
         
         st.markdown('</div>', unsafe_allow_html=True)
         
-        # Filter by date
-        filtered_data = analytics_data[
-            (analytics_data["timestamp"].dt.date >= start_date) &
-            (analytics_data["timestamp"].dt.date <= end_date)
-        ]
+        # Every metric for the selected range, computed once and shared across sessions
+        metrics = get_dashboard_metrics(start_date, end_date)
+        total_views = metrics.total_views
         
-        if filtered_data.empty:
+        if total_views == 0:
             st.info("No data available for the selected date range.")
         else:
+            type_views = metrics.type_views()
+            
             # Overview metrics with enhanced styling
             st.markdown('<div class="analytics-card">', unsafe_allow_html=True)
             st.markdown("<h3>Overview</h3>", unsafe_allow_html=True)
@@ -147,7 +111,6 @@ else:
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                total_views = len(filtered_data)
                 st.markdown(f"""
                 <div class="stat-counter">
                     <h4 style="margin-bottom: 5px;">Total Page Views</h4>
@@ -156,7 +119,7 @@ else:
                 """, unsafe_allow_html=True)
             
             with col2:
-                unique_listings = filtered_data["listing_id"].nunique()
+                unique_listings = metrics.unique_listings
                 st.markdown(f"""
                 <div class="stat-counter" style="border-left-color: #2EC4B6;">
                     <h4 style="margin-bottom: 5px;">Listings Viewed</h4>
@@ -165,7 +128,7 @@ else:
                 """, unsafe_allow_html=True)
             
             with col3:
-                premium_views = len(filtered_data[filtered_data["listing_type"] == "premium"])
+                premium_views = metrics.premium_views
                 premium_percentage = (premium_views / total_views) * 100 if total_views > 0 else 0
                 st.markdown(f"""
                 <div class="stat-counter" style="border-left-color: #FF5722;">
@@ -180,9 +143,8 @@ else:
             st.markdown('<div class="analytics-card">', unsafe_allow_html=True)
             st.markdown("<h3>Views Over Time</h3>", unsafe_allow_html=True)
             
-            # Group by day
-            daily_views = filtered_data.groupby(filtered_data["timestamp"].dt.date).size().reset_index()
-            daily_views.columns = ["Date", "Views"]
+            # Views per day
+            daily_views = metrics.daily_views()
             
             # Create enhanced line chart
             fig = px.line(
@@ -223,10 +185,6 @@ else:
                 # Views by listing type
                 st.markdown("<h4>Premium vs. Standard Views</h4>", unsafe_allow_html=True)
                 
-                # Group by listing type
-                type_views = filtered_data.groupby("listing_type").size().reset_index()
-                type_views.columns = ["Listing Type", "Views"]
-                
                 # Create enhanced pie chart
                 fig = px.pie(
                     type_views, 
@@ -251,16 +209,13 @@ else:
                 # Category performance if available
                 st.markdown("<h4>Category Performance</h4>", unsafe_allow_html=True)
                 
-                # Get categories from listings
-                categories = []
-                for listing_id in filtered_data["listing_id"].unique():
-                    listing = get_listing_by_id(listing_id)
-                    if listing is not None and 'category' in listing:
-                        categories.append(listing['category'])
+                # Get categories of the viewed listings in one batch lookup
+                viewed_listings = pd.DataFrame({"listing_id": list(metrics.listing_totals)})
+                categories = enrich_with_listings(viewed_listings, columns={"category": "category"}, fill_value=None)["category"].dropna()
                 
-                if categories:
+                if not categories.empty:
                     # Count occurrences of each category
-                    category_counts = pd.Series(categories).value_counts().reset_index()
+                    category_counts = categories.value_counts().reset_index()
                     category_counts.columns = ["Category", "Views"]
                     
                     # Create bar chart
@@ -299,23 +254,13 @@ else:
             st.markdown("<h3>Top Performing Listings</h3>", unsafe_allow_html=True)
             st.markdown("<p>Top 10 most viewed business listings in the selected time period</p>", unsafe_allow_html=True)
             
-            # Group by listing ID
-            top_listings = filtered_data.groupby("listing_id").size().reset_index()
-            top_listings.columns = ["Listing ID", "Views"]
-            top_listings = top_listings.sort_values("Views", ascending=False).head(10)
+            # Most viewed listings
+            top_listings = metrics.top_listings(limit=10)
             
             # Add listing details
-            top_listings["Listing Name"] = top_listings["Listing ID"].apply(
-                lambda x: get_listing_by_id(x)["name"] if get_listing_by_id(x) is not None else "Unknown"
-            )
+            top_listings = enrich_with_listings(top_listings, "Listing ID", {"name": "Listing Name", "category": "Category"})
             
-            top_listings["Category"] = top_listings["Listing ID"].apply(
-                lambda x: get_listing_by_id(x)["category"] if get_listing_by_id(x) is not None else "Unknown"
-            )
-            
-            top_listings["Type"] = top_listings["Listing ID"].apply(
-                lambda x: "Premium" if x in filtered_data[filtered_data["listing_type"] == "premium"]["listing_id"].unique() else "Standard"
-            )
+            top_listings["Type"] = top_listings["Premium"].map({True: "Premium", False: "Standard"})
             
             # Reorder columns for display
             top_listings = top_listings[["Listing Name", "Category", "Type", "Views", "Listing ID"]]
@@ -357,7 +302,7 @@ else:
             st.markdown("<h3>Daily Breakdown</h3>", unsafe_allow_html=True)
             
             # Create date slider
-            date_list = sorted(filtered_data["timestamp"].dt.date.unique())
+            date_list = metrics.dates()
             if len(date_list) > 1:
                 selected_date = st.select_slider(
                     "Select Date to View Detailed Breakdown",
@@ -365,15 +310,11 @@ else:
                     value=date_list[-1]  # Default to most recent date
                 )
                 
-                # Filter for selected date
-                date_data = filtered_data[filtered_data["timestamp"].dt.date == selected_date]
-                
                 # Hourly breakdown
                 st.markdown(f"<h4>Hourly Breakdown for {selected_date}</h4>", unsafe_allow_html=True)
                 
-                # Group by hour
-                hourly_data = date_data.groupby(date_data["timestamp"].dt.hour).size().reset_index()
-                hourly_data.columns = ["Hour", "Views"]
+                # Views per hour of the selected date
+                hourly_data = metrics.hourly_views(selected_date)
                 
                 # Create enhanced bar chart
                 fig = px.bar(
@@ -417,17 +358,22 @@ else:
             
             with col1:
                 st.markdown("<h4>CSV Export</h4>", unsafe_allow_html=True)
-                # Convert to CSV
-                csv = filtered_data.to_csv(index=False).encode('utf-8')
                 
-                # Create download button
-                st.download_button(
-                    label="Download CSV",
-                    data=csv,
-                    file_name=f"directory_analytics_{start_date}_to_{end_date}.csv",
-                    mime="text/csv",
-                    use_container_width=True
-                )
+                # Raw events are only loaded when an export is requested
+                if st.button("Prepare CSV Export", key="prepare_csv", use_container_width=True):
+                    filtered_data = get_analytics_data(start_date, end_date)
+                    
+                    # Convert to CSV
+                    csv = filtered_data.to_csv(index=False).encode('utf-8')
+                    
+                    # Create download button
+                    st.download_button(
+                        label="Download CSV",
+                        data=csv,
+                        file_name=f"directory_analytics_{start_date}_to_{end_date}.csv",
+                        mime="text/csv",
+                        use_container_width=True
+                    )
                 
             with col2:
                 st.markdown("<h4>Report Options</h4>", unsafe_allow_html=True)
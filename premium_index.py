@@ -0,0 +1,96 @@
+import heapq
+import threading
+from datetime import datetime
+
+
+class PremiumIndex:
+    """Process-wide set of listings with an active premium subscription.
+
+    Keeps a map from listing id to the end date of its latest paid
+    subscription, so duplicate subscriptions collapse to one entry, and a
+    min-heap of end dates. Expired entries are popped lazily when the set
+    is read. The index reloads when the premium table generation changes
+    and is patched in place from the change feed.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._lock = threading.Lock()
+        self._latest = {}
+        self._heap = []
+        self._active = frozenset()
+        self._token = None
+        self._loaded = False
+        self.reloads = 0
+
+    def _load(self, token):
+        """Rebuild the map and heap from the premium table."""
+        premium = self.storage.read_premium()
+        paid = premium[premium["payment_status"] == "paid"]
+        self._latest = paid.groupby("listing_id")["end_date"].max().to_dict() if not paid.empty else {}
+        self._heap = [(end_date, listing_id) for listing_id, end_date in self._latest.items()]
+        heapq.heapify(self._heap)
+        self._active = frozenset(self._latest)
+        self._token = token
+        self._loaded = True
+        self.reloads += 1
+
+    def _expire(self, today):
+        """Pop subscriptions that ended before today."""
+        expired = False
+        while self._heap and self._heap[0][0] < today:
+            end_date, listing_id = heapq.heappop(self._heap)
+            # Skip heap entries superseded by a later subscription
+            if self._latest.get(listing_id) == end_date:
+                del self._latest[listing_id]
+                expired = True
+        if expired:
+            self._active = frozenset(self._latest)
+
+    def active_ids(self, today=None):
+        """Get the ids of listings with active premium as a frozenset."""
+        today = today or datetime.now().strftime("%Y-%m-%d")
+        token = self.storage.premium_generation()
+        with self._lock:
+            if not self._loaded or token != self._token:
+                self._load(token)
+            self._expire(today)
+            return self._active
+
+    def _patchable(self, before):
+        """Check the index matches the state a write started from."""
+        if self._loaded and before == self._token:
+            return True
+        self._loaded = False
+        return False
+
+    def apply_insert(self, record, before, after):
+        """Apply a new premium subscription."""
+        with self._lock:
+            if not self._patchable(before):
+                return
+            listing_id, end_date = str(record["listing_id"]), record["end_date"]
+            if record["payment_status"] == "paid" and end_date > self._latest.get(listing_id, ""):
+                self._latest[listing_id] = end_date
+                heapq.heappush(self._heap, (end_date, listing_id))
+                self._active = frozenset(self._latest)
+            self._token = after
+
+    def apply_delete_listing(self, listing_id, before, after):
+        """Apply the removal of every subscription for a listing."""
+        with self._lock:
+            if not self._patchable(before):
+                return
+            # The listing's heap entry goes stale and is skipped when popped
+            if self._latest.pop(str(listing_id), None) is not None:
+                self._active = frozenset(self._latest)
+            self._token = after
+
+    def apply_change(self, change):
+        """Apply a change from the change feed, if it is to the premium table."""
+        if change["table"] != "premium":
+            return
+        if change["op"] == "insert":
+            self.apply_insert(change["data"], change["before"], change["after"])
+        elif change["op"] == "delete_listing":
+            self.apply_delete_listing(change["key"], change["before"], change["after"])
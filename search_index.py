@@ -0,0 +1,219 @@
+import heapq
+import math
+import re
+from bisect import bisect_left, insort
+
+import pandas as pd
+
+# Listing columns covered by full-text search, with their BM25 field weights
+FIELD_WEIGHTS = {"name": 3.0, "category": 1.5, "description": 1.0, "location": 0.5}
+SEARCH_FIELDS = list(FIELD_WEIGHTS)
+
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+# Query words that separate OR groups; words inside a group are ANDed
+OR_OPERATORS = {"OR", "|"}
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens."""
+    if text is None or (not isinstance(text, str) and pd.isna(text)):
+        return []
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def parse_query(query):
+    """Parse a query into OR groups of AND-ed token prefixes.
+
+    ``"coffee downtown OR tea"`` becomes ``[["coffee", "downtown"], ["tea"]]``.
+    """
+    groups = [[]]
+    for word in query.split():
+        if word in OR_OPERATORS:
+            groups.append([])
+        else:
+            groups[-1].extend(tokenize(word))
+    return [group for group in groups if group]
+
+
+def _weighted_terms(record):
+    """Get a listing's field-weighted term frequencies and weighted length."""
+    frequencies = {}
+    length = 0.0
+    for field, weight in FIELD_WEIGHTS.items():
+        for token in tokenize(record.get(field)):
+            frequencies[token] = frequencies.get(token, 0.0) + weight
+            length += weight
+    return frequencies, length
+
+
+class SearchIndex:
+    """Tokenized inverted index over listing text fields.
+
+    Maps each token to the listings containing it, with field-weighted term
+    frequencies for BM25 ranking, and keeps a sorted vocabulary so a query
+    term matches every token it prefixes. Listings can be added and removed
+    incrementally.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._vocabulary = []
+        self._doc_lengths = {}
+        self._total_length = 0.0
+
+    @classmethod
+    def from_frame(cls, listings):
+        """Build an index from a listings frame."""
+        index = cls()
+        if listings.empty:
+            return index
+        fields = [field for field in SEARCH_FIELDS if field in listings.columns]
+        for listing_id, *values in zip(listings["id"], *(listings[field] for field in fields)):
+            index._add_terms(str(listing_id), *_weighted_terms(dict(zip(fields, values))), sort=False)
+        index._vocabulary.sort()
+        return index
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    def _add_terms(self, listing_id, frequencies, length, sort=True):
+        """Add postings for a listing's weighted terms."""
+        self._doc_lengths[listing_id] = (length, list(frequencies))
+        self._total_length += length
+        for token, frequency in frequencies.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                self._postings[token] = {listing_id: frequency}
+                if sort:
+                    insort(self._vocabulary, token)
+                else:
+                    self._vocabulary.append(token)
+            else:
+                postings[listing_id] = frequency
+
+    def add(self, record):
+        """Index (or re-index) a listing record."""
+        listing_id = str(record["id"])
+        self.remove(listing_id)
+        self._add_terms(listing_id, *_weighted_terms(record))
+
+    def remove(self, listing_id):
+        """Remove a listing from the index."""
+        entry = self._doc_lengths.pop(str(listing_id), None)
+        if entry is None:
+            return
+        length, tokens = entry
+        self._total_length -= length
+        for token in tokens:
+            postings = self._postings[token]
+            postings.pop(str(listing_id), None)
+            if not postings:
+                del self._postings[token]
+                position = bisect_left(self._vocabulary, token)
+                del self._vocabulary[position]
+
+    def expand(self, prefix):
+        """Get the indexed tokens that start with a prefix."""
+        start = bisect_left(self._vocabulary, prefix)
+        end = bisect_left(self._vocabulary, prefix + "\uffff", start)
+        return self._vocabulary[start:end]
+
+    def _match_term(self, prefix):
+        """Get ids of listings with any token starting with the prefix."""
+        tokens = self.expand(prefix)
+        if len(tokens) == 1:
+            return self._postings[tokens[0]].keys()
+        matches = set()
+        for token in tokens:
+            matches |= self._postings[token].keys()
+        return matches
+
+    def search(self, query):
+        """Get the set of listing ids matching a query."""
+        results = set()
+        for group in parse_query(query):
+            # Intersect starting from the rarest term
+            term_matches = sorted((self._match_term(term) for term in group), key=len)
+            group_matches = set(term_matches[0])
+            for matches in term_matches[1:]:
+                group_matches &= matches
+                if not group_matches:
+                    break
+            results |= group_matches
+        return results
+
+    def rank(self, query, limit=20, boosts=None, exclude=None):
+        """Get the top ``limit`` matches as ``(total, [(listing_id, score)])``.
+
+        Scores are BM25 over field-weighted term frequencies, multiplied by
+        ``boosts[listing_id]`` when given. Ids in ``exclude`` are skipped.
+
+        Tokens are scored in order of their maximum contribution (MaxScore):
+        a BM25 term can add at most ``idf * (k1 + 1)``, so once the best
+        score a listing could still reach falls below the ``limit``-th best
+        score so far, it is dropped before the remaining, commoner tokens
+        are scored. Only a size-``limit`` heap is kept, so the full match
+        set is never sorted.
+        """
+        matches = self.search(query)
+        if exclude:
+            matches -= exclude
+        if not matches:
+            return 0, []
+
+        doc_count = len(self._doc_lengths)
+        average_length = self._total_length / doc_count if doc_count else 1.0
+        terms = {term for group in parse_query(query) for term in group}
+        boosts = boosts or {}
+
+        # (upper bound, idf, postings) per matched token, highest bound first
+        tokens = []
+        for token in (token for term in terms for token in self.expand(term)):
+            postings = self._postings[token]
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            tokens.append((idf * (BM25_K1 + 1), idf, postings))
+        tokens.sort(key=lambda entry: entry[0], reverse=True)
+        remaining = sum(bound for bound, _, _ in tokens)
+        # Pruning costs a pass over the candidates, so try it only each time
+        # the bound left to add has halved
+        prune_below = remaining / 2
+        min_boost = min(1.0, *boosts.values()) if boosts else 1.0
+
+        # Accumulate BM25 contributions token by token over the candidates
+        scores = dict.fromkeys(matches, 0.0)
+        for bound, idf, postings in tokens:
+            # Walk whichever side is smaller: the candidates or the postings
+            if len(scores) < len(postings):
+                pairs = [(i, postings[i]) for i in scores if i in postings]
+            else:
+                pairs = [(i, f) for i, f in postings.items() if i in scores]
+            for listing_id, frequency in pairs:
+                length = self._doc_lengths[listing_id][0]
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / average_length)
+                scores[listing_id] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+            remaining -= bound
+
+            if 0 < remaining <= prune_below and len(scores) > limit:
+                prune_below = remaining / 2
+                # Scores only grow, so the limit-th best so far is a floor for the top
+                if not limit:
+                    threshold = math.inf
+                elif boosts:
+                    threshold = heapq.nlargest(limit, (s * boosts.get(i, 1.0) for i, s in scores.items()))[-1]
+                else:
+                    threshold = heapq.nlargest(limit, scores.values())[-1]
+                # Skip the pass when even an unscored listing could still reach the top
+                if threshold > remaining * min_boost:
+                    scores = {
+                        i: s for i, s in scores.items() if (s + remaining) * boosts.get(i, 1.0) >= threshold
+                    }
+
+        top = heapq.nlargest(
+            limit, ((i, s * boosts.get(i, 1.0)) for i, s in scores.items()), key=lambda item: item[1]
+        )
+        return len(matches), top
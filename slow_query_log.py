@@ -0,0 +1,83 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+from instrumentation import current_page
+
+# Queries at least this slow are logged; 0 logs every query
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "500"))
+SLOW_QUERY_LOG_FILE = os.environ.get("SLOW_QUERY_LOG_FILE", "data/slow_queries.log")
+# Rotate at this size, keeping this many old logs
+SLOW_QUERY_LOG_BYTES = int(os.environ.get("SLOW_QUERY_LOG_BYTES", str(5 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.environ.get("SLOW_QUERY_LOG_BACKUPS", "3"))
+
+_logger = None
+_logger_lock = threading.Lock()
+
+
+def _get_logger():
+    """Get the slow query logger, opening the rotating log on first use."""
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            directory = os.path.dirname(SLOW_QUERY_LOG_FILE)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = RotatingFileHandler(
+                SLOW_QUERY_LOG_FILE, maxBytes=SLOW_QUERY_LOG_BYTES, backupCount=SLOW_QUERY_LOG_BACKUPS
+            )
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger("directory.slow_queries")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _logger = logger
+        return _logger
+
+
+class QueryTimer:
+    """Times one query, split into I/O and compute, and logs it if slow.
+
+    Wrap the parts that read from disk in ``io()``; everything else is
+    counted as compute. Records are JSON lines in the rotating slow log.
+    """
+
+    def __init__(self, kind, query=None, date_range=None):
+        self.kind = kind
+        self.query = query
+        self.date_range = date_range
+        self.io_seconds = 0.0
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def io(self):
+        """Count the time spent in the block as I/O."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.io_seconds += time.perf_counter() - started
+
+    def finish(self, rows_scanned, rows_returned):
+        """Stop timing and log the query if it took at least SLOW_QUERY_MS."""
+        total_ms = (time.perf_counter() - self._started) * 1000
+        if total_ms < SLOW_QUERY_MS:
+            return
+        record = {
+            "time": datetime.now().isoformat(timespec="milliseconds"),
+            "kind": self.kind,
+            "query": self.query,
+            "range": [str(d) if d is not None else None for d in self.date_range] if self.date_range else None,
+            "page": current_page(),
+            "rows_scanned": int(rows_scanned),
+            "rows_returned": int(rows_returned),
+            "total_ms": round(total_ms, 2),
+            "io_ms": round(self.io_seconds * 1000, 2),
+            "compute_ms": round(total_ms - self.io_seconds * 1000, 2),
+        }
+        _get_logger().info(json.dumps(record))
@@ -0,0 +1,387 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+import pandas as pd
+from atomic_file import atomic_write
+from columnar import read_table, refresh_snapshot
+from file_lock import file_locked
+from io_stats import record_io
+
+# Table schemas shared by every backend
+CATEGORY_COLUMNS = ["id", "name"]
+LISTING_COLUMNS = [
+    "id", "name", "description", "category", "website",
+    "email", "phone", "location", "submitted_date", "approved"
+]
+PREMIUM_COLUMNS = [
+    "id", "listing_id", "package_type", "start_date", "end_date", "payment_status"
+]
+
+# IDs are always handled as strings so that CSV and SQLite agree
+ID_DTYPES = {"id": str, "listing_id": str}
+
+
+def _read_csv(path, columns):
+    """Read a CSV table, returning an empty frame with the schema if missing."""
+    if os.path.exists(path):
+        return read_table(path, dtypes={k: v for k, v in ID_DTYPES.items() if k in columns})
+    return pd.DataFrame(columns=columns)
+
+
+def _write_csv(frame, path):
+    """Write a CSV table atomically so readers never see a partial file."""
+    with atomic_write(path) as tmp_path:
+        frame.to_csv(tmp_path, index=False)
+    record_io("write", "csv", os.path.getsize(path))
+    # Written after the CSV so the snapshot stays at least as new
+    refresh_snapshot(frame, path)
+
+
+def _normalize_listings(listings):
+    """Coerce the approved column to booleans."""
+    if "approved" in listings.columns and not listings.empty:
+        listings["approved"] = listings["approved"].astype(str).str.lower().isin(["true", "1"])
+    if "category" in listings.columns and isinstance(listings["category"].dtype, pd.CategoricalDtype):
+        # Snapshots store categories as categoricals; the cache patches rows in place
+        listings["category"] = listings["category"].astype(object)
+    return listings
+
+
+class CSVStorage:
+    """Stores each table as a CSV file (the default, compatible backend)."""
+
+    name = "csv"
+
+    def __init__(self, categories_file, listings_file, premium_file):
+        self.categories_file = categories_file
+        self.listings_file = listings_file
+        self.premium_file = premium_file
+        # Serializes read-modify-write cycles within this process; a file
+        # lock next to the listings table serializes them across processes
+        self._lock = threading.RLock()
+        self.lock_file = f"{listings_file}.lock"
+
+    @contextmanager
+    def _locked(self):
+        """Hold the in-process and cross-process write locks."""
+        with self._lock:
+            directory = os.path.dirname(self.lock_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.lock_file, "a") as f, file_locked(f):
+                yield
+
+    def initialize(self, default_categories):
+        """Create any missing table files."""
+        with self._locked():
+            if not os.path.exists(self.categories_file):
+                _write_csv(default_categories, self.categories_file)
+            if not os.path.exists(self.listings_file):
+                _write_csv(pd.DataFrame(columns=LISTING_COLUMNS), self.listings_file)
+            if not os.path.exists(self.premium_file):
+                _write_csv(pd.DataFrame(columns=PREMIUM_COLUMNS), self.premium_file)
+
+    def exists(self):
+        """Check whether the listings table exists."""
+        return os.path.exists(self.listings_file)
+
+    def generation(self):
+        """Get a token that changes whenever the listings table changes."""
+        try:
+            stat = os.stat(self.listings_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def premium_generation(self):
+        """Get a token that changes whenever the premium table changes."""
+        try:
+            stat = os.stat(self.premium_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def read_categories(self):
+        """Read all categories."""
+        return _read_csv(self.categories_file, CATEGORY_COLUMNS)
+
+    def read_listings(self):
+        """Read all listings."""
+        return _normalize_listings(_read_csv(self.listings_file, LISTING_COLUMNS))
+
+    def read_premium(self):
+        """Read all premium subscriptions."""
+        return _read_csv(self.premium_file, PREMIUM_COLUMNS)
+
+    def insert_listing(self, record):
+        """Append a listing. Returns the listings generations before and after."""
+        with self._locked():
+            before = self.generation()
+            listings = self.read_listings()
+            listings = pd.concat([listings, pd.DataFrame([record])], ignore_index=True)
+            _write_csv(listings, self.listings_file)
+            return before, self.generation()
+
+    def update_listing(self, listing_id, fields):
+        """Update fields of a listing.
+
+        Returns the listings generations before and after, or None if the
+        table is missing.
+        """
+        with self._locked():
+            if not self.exists():
+                return None
+            before = self.generation()
+            listings = self.read_listings()
+            mask = listings["id"] == listing_id
+            for column, value in fields.items():
+                listings.loc[mask, column] = value
+            _write_csv(listings, self.listings_file)
+            return before, self.generation()
+
+    def delete_listing(self, listing_id):
+        """Delete a listing and its premium subscriptions.
+
+        Returns the (before, after) generations of the listings and of the
+        premium table, or None if the table is missing.
+        """
+        with self._locked():
+            if not self.exists():
+                return None
+            before, premium_before = self.generation(), self.premium_generation()
+            listings = self.read_listings()
+            _write_csv(listings[listings["id"] != listing_id], self.listings_file)
+
+            if os.path.exists(self.premium_file):
+                premium = self.read_premium()
+                _write_csv(premium[premium["listing_id"] != listing_id], self.premium_file)
+            return (before, self.generation()), (premium_before, self.premium_generation())
+
+    def insert_premium(self, record):
+        """Append a premium subscription. Returns the premium generations before and after."""
+        with self._locked():
+            before = self.premium_generation()
+            premium = self.read_premium()
+            premium = pd.concat([premium, pd.DataFrame([record])], ignore_index=True)
+            _write_csv(premium, self.premium_file)
+            return before, self.premium_generation()
+
+
+class SQLiteStorage:
+    """Stores tables in a single SQLite database in WAL mode.
+
+    Each mutation touches only the affected rows, and WAL lets readers
+    proceed while a writer commits.
+    """
+
+    name = "sqlite"
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS categories (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS listings (
+            id TEXT PRIMARY KEY,
+            name TEXT,
+            description TEXT,
+            category TEXT,
+            website TEXT,
+            email TEXT,
+            phone TEXT,
+            location TEXT,
+            submitted_date TEXT,
+            approved INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_listings_category ON listings (category);
+        CREATE INDEX IF NOT EXISTS idx_listings_approved ON listings (approved);
+        CREATE TABLE IF NOT EXISTS premium_listings (
+            id TEXT PRIMARY KEY,
+            listing_id TEXT NOT NULL,
+            package_type TEXT,
+            start_date TEXT,
+            end_date TEXT,
+            payment_status TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_premium_listing_id ON premium_listings (listing_id);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO meta (key, value) VALUES ('listings_generation', 0);
+        CREATE TRIGGER IF NOT EXISTS listings_generation_insert AFTER INSERT ON listings BEGIN
+            UPDATE meta SET value = value + 1 WHERE key = 'listings_generation';
+        END;
+        CREATE TRIGGER IF NOT EXISTS listings_generation_update AFTER UPDATE ON listings BEGIN
+            UPDATE meta SET value = value + 1 WHERE key = 'listings_generation';
+        END;
+        CREATE TRIGGER IF NOT EXISTS listings_generation_delete AFTER DELETE ON listings BEGIN
+            UPDATE meta SET value = value + 1 WHERE key = 'listings_generation';
+        END;
+        INSERT OR IGNORE INTO meta (key, value) VALUES ('premium_generation', 0);
+        CREATE TRIGGER IF NOT EXISTS premium_generation_insert AFTER INSERT ON premium_listings BEGIN
+            UPDATE meta SET value = value + 1 WHERE key = 'premium_generation';
+        END;
+        CREATE TRIGGER IF NOT EXISTS premium_generation_update AFTER UPDATE ON premium_listings BEGIN
+            UPDATE meta SET value = value + 1 WHERE key = 'premium_generation';
+        END;
+        CREATE TRIGGER IF NOT EXISTS premium_generation_delete AFTER DELETE ON premium_listings BEGIN
+            UPDATE meta SET value = value + 1 WHERE key = 'premium_generation';
+        END;
+    """
+
+    def __init__(self, db_file, import_from=None):
+        self.db_file = db_file
+        # Optional CSVStorage whose tables are imported into an empty database
+        self.import_from = import_from
+        self._local = threading.local()
+        self._schema_ready = False
+        self._initialized = False
+
+    def _connect(self):
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_file, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._schema_ready:
+                conn.executescript(self.SCHEMA)
+                self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def initialize(self, default_categories):
+        """Create the schema and seed it from CSV or the default categories.
+
+        Seeding happens once per database: a marker is written to the meta
+        table in the same transaction, so deleting every row later never
+        brings the imported CSV tables back.
+        """
+        if self._initialized and self.exists():
+            return
+
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if self._meta("seeded") is None:
+                # Databases seeded before the marker existed already have categories
+                if self._count("categories") == 0:
+                    categories = default_categories
+                    if self.import_from is not None and os.path.exists(self.import_from.categories_file):
+                        categories = self.import_from.read_categories()
+                    self._insert_frame(conn, "categories", categories, CATEGORY_COLUMNS)
+                    if self.import_from is not None:
+                        self._insert_frame(conn, "listings", self.import_from.read_listings(), LISTING_COLUMNS)
+                        self._insert_frame(conn, "premium_listings", self.import_from.read_premium(), PREMIUM_COLUMNS)
+                conn.execute("INSERT INTO meta (key, value) VALUES ('seeded', 1)")
+        self._initialized = True
+
+    def _count(self, table):
+        """Count the rows in a table."""
+        return self._connect().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    @staticmethod
+    def _insert_frame(conn, table, frame, columns):
+        """Bulk insert a frame's rows into a table, in the caller's transaction."""
+        if frame.empty:
+            return
+        frame = frame[columns].astype(object).where(frame[columns].notna(), None)
+        placeholders = ", ".join("?" for _ in columns)
+        conn.executemany(
+            f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+            frame.itertuples(index=False, name=None)
+        )
+
+    def exists(self):
+        """Check whether the database exists."""
+        return os.path.exists(self.db_file)
+
+    def _meta(self, key):
+        """Read a counter or marker from the meta table."""
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def generation(self):
+        """Get the listings write-generation counter maintained by triggers."""
+        return self._meta("listings_generation")
+
+    def premium_generation(self):
+        """Get the premium write-generation counter maintained by triggers."""
+        return self._meta("premium_generation")
+
+    def read_categories(self):
+        """Read all categories."""
+        return pd.read_sql_query("SELECT id, name FROM categories ORDER BY rowid", self._connect())
+
+    def read_listings(self):
+        """Read all listings."""
+        listings = pd.read_sql_query(
+            f"SELECT {', '.join(LISTING_COLUMNS)} FROM listings ORDER BY rowid", self._connect()
+        )
+        listings["approved"] = listings["approved"].astype(bool)
+        return listings
+
+    def read_premium(self):
+        """Read all premium subscriptions."""
+        return pd.read_sql_query(
+            f"SELECT {', '.join(PREMIUM_COLUMNS)} FROM premium_listings ORDER BY rowid", self._connect()
+        )
+
+    def insert_listing(self, record):
+        """Insert a listing. Returns the listings generations before and after."""
+        conn = self._connect()
+        with conn:
+            # Take the write lock first, so no other write lands between the reads
+            conn.execute("BEGIN IMMEDIATE")
+            before = self.generation()
+            conn.execute(
+                f"INSERT INTO listings ({', '.join(LISTING_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in LISTING_COLUMNS)})",
+                [record[column] for column in LISTING_COLUMNS]
+            )
+            return before, self.generation()
+
+    def update_listing(self, listing_id, fields):
+        """Update fields of a single listing row. Returns the listings generations before and after."""
+        unknown = set(fields) - set(LISTING_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown listing columns: {sorted(unknown)}")
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before = self.generation()
+            conn.execute(
+                f"UPDATE listings SET {assignments} WHERE id = ?",
+                list(fields.values()) + [listing_id]
+            )
+            return before, self.generation()
+
+    def delete_listing(self, listing_id):
+        """Delete a listing and its premium subscriptions.
+
+        Returns the (before, after) generations of the listings and of the
+        premium table.
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before, premium_before = self.generation(), self.premium_generation()
+            conn.execute("DELETE FROM listings WHERE id = ?", (listing_id,))
+            conn.execute("DELETE FROM premium_listings WHERE listing_id = ?", (listing_id,))
+            return (before, self.generation()), (premium_before, self.premium_generation())
+
+    def insert_premium(self, record):
+        """Insert a premium subscription. Returns the premium generations before and after."""
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            before = self.premium_generation()
+            conn.execute(
+                f"INSERT INTO premium_listings ({', '.join(PREMIUM_COLUMNS)}) "
+                f"VALUES ({', '.join('?' for _ in PREMIUM_COLUMNS)})",
+                [record[column] for column in PREMIUM_COLUMNS]
+            )
+            return before, self.premium_generation()
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+# The app's modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import LISTING_COLUMNS, CSVStorage  # noqa: E402
+
+DEFAULT_CATEGORIES = pd.DataFrame({"id": ["cat1"], "name": ["Retail"]})
+
+
+@pytest.fixture
+def make_listing():
+    """Build a listing record with every column, overriding the given fields."""
+    def make(listing_id, name=None, description="", category="Retail", location="Springfield", approved=False):
+        record = dict.fromkeys(LISTING_COLUMNS, "")
+        record.update(
+            id=listing_id, name=name or listing_id, description=description,
+            category=category, location=location, approved=approved,
+        )
+        return record
+    return make
+
+
+@pytest.fixture
+def csv_storage(tmp_path):
+    """An initialized CSV backend in a temporary directory."""
+    storage = CSVStorage(
+        str(tmp_path / "categories.csv"), str(tmp_path / "listings.csv"), str(tmp_path / "premium.csv")
+    )
+    storage.initialize(DEFAULT_CATEGORIES)
+    return storage
@@ -0,0 +1,67 @@
+import multiprocessing
+import os
+
+import pandas as pd
+
+from analytics_partitions import (
+    MIGRATION_STAGING, list_partitions, migrate_legacy_log, partition_path, read_partitions,
+)
+
+LEGACY_ROWS = [
+    ("2026-01-01 09:00:00", "1", "standard"),
+    ("2026-01-01 10:00:00", "2", "premium"),
+    ("2026-01-02 11:00:00", "1", "standard"),
+    ("2026-01-03 12:00:00", "3", "standard"),
+]
+
+
+def _legacy_log(tmp_path):
+    path = str(tmp_path / "analytics.csv")
+    pd.DataFrame(LEGACY_ROWS, columns=["timestamp", "listing_id", "listing_type"]).to_csv(path, index=False)
+    return path
+
+
+def _migrate(legacy_file, directory, start):
+    start.wait()
+    migrate_legacy_log(legacy_file, directory)
+
+
+def test_migrates_once(tmp_path):
+    legacy_file, directory = _legacy_log(tmp_path), str(tmp_path / "analytics")
+    assert migrate_legacy_log(legacy_file, directory) == 4
+    assert migrate_legacy_log(legacy_file, directory) == 0
+    assert [day for day, _ in list_partitions(directory=directory)] == ["2026-01-01", "2026-01-02", "2026-01-03"]
+    assert len(read_partitions(directory=directory)) == 4
+    assert not os.path.exists(os.path.join(directory, MIGRATION_STAGING))
+
+
+def test_concurrent_processes_migrate_once(tmp_path):
+    legacy_file, directory = _legacy_log(tmp_path), str(tmp_path / "analytics")
+    start = multiprocessing.Event()
+    processes = [multiprocessing.Process(target=_migrate, args=(legacy_file, directory, start)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    start.set()
+    for process in processes:
+        process.join(30)
+    assert len(read_partitions(directory=directory)) == 4
+
+
+def test_interrupted_migration_resumes_without_duplicates(tmp_path):
+    legacy_file, directory = _legacy_log(tmp_path), str(tmp_path / "analytics")
+    os.makedirs(directory)
+    staging = os.path.join(directory, MIGRATION_STAGING)
+    os.makedirs(staging)
+    frame = pd.DataFrame(LEGACY_ROWS, columns=["timestamp", "listing_id", "listing_type"])
+    for day, events in frame.groupby(frame["timestamp"].str[:10]):
+        events.to_csv(partition_path(day, staging), index=False)
+    # Crashed after linking the first day into place, before unstaging it
+    os.link(partition_path("2026-01-01", staging), partition_path("2026-01-01", directory))
+    # and after another process started ingesting into the third
+    with open(partition_path("2026-01-03", directory), "w") as f:
+        f.write("timestamp,listing_id,listing_type\n2026-01-03 13:00:00,4,standard\n")
+
+    migrate_legacy_log(legacy_file, directory)
+    events = read_partitions(directory=directory)
+    assert sorted(events["listing_id"]) == ["1", "1", "2", "3", "4"]
+    assert not os.path.exists(staging)
@@ -0,0 +1,55 @@
+import analytics_rollups
+from analytics_partitions import partition_path
+from analytics_rollups import AnalyticsRollups
+
+
+def _append(directory, rows):
+    for timestamp, listing_id, listing_type in rows:
+        path = partition_path(timestamp[:10], directory)
+        with open(path, "a") as f:
+            if f.tell() == 0:
+                f.write("timestamp,listing_id,listing_type\n")
+            f.write(f"{timestamp},{listing_id},{listing_type}\n")
+
+
+def _totals(rollups):
+    totals = {}
+    rollups.scan(None, None, lambda day, rollup: totals.update({
+        day: (rollup.total, dict(rollup.types), dict(rollup.hours), dict(rollup.listings))
+    }))
+    return totals
+
+
+def test_restart_resumes_from_the_snapshot(tmp_path, monkeypatch):
+    directory, snapshot_file = str(tmp_path), str(tmp_path / "rollups.json")
+    _append(directory, [
+        ("2026-01-01 09:00:00", "1", "standard"),
+        ("2026-01-01 10:00:00", "2", "premium"),
+        ("2026-01-02 11:00:00", "1", "standard"),
+    ])
+    rollups = AnalyticsRollups(directory, snapshot_file)
+    rollups.refresh()
+    rollups.save()
+
+    _append(directory, [("2026-01-02 12:00:00", "3", "standard")])
+    restarted = AnalyticsRollups(directory, snapshot_file)
+    folded = []
+    fold = restarted._fold
+    monkeypatch.setattr(restarted, "_fold", lambda text: (folded.append(text), fold(text)))
+    restarted.refresh()
+
+    # Only the event written after the snapshot is read again
+    assert folded == ["2026-01-02 12:00:00,3,standard\n"]
+    rollups.refresh()
+    assert restarted.events == rollups.events == 4
+    assert _totals(restarted) == _totals(rollups)
+    assert _totals(restarted)["2026-01-01"] == (2, {"standard": 1, "premium": 1}, {9: 1, 10: 1},
+                                                 {("1", "standard"): 1, ("2", "premium"): 1})
+
+
+def test_snapshot_is_saved_on_the_interval(tmp_path, monkeypatch):
+    monkeypatch.setattr(analytics_rollups, "SNAPSHOT_INTERVAL_SECONDS", 0)
+    directory, snapshot_file = str(tmp_path), tmp_path / "rollups.json"
+    _append(directory, [("2026-01-01 09:00:00", "1", "standard")])
+    AnalyticsRollups(directory, str(snapshot_file)).refresh()
+    assert AnalyticsRollups(directory, str(snapshot_file)).events == 1
@@ -0,0 +1,39 @@
+import threading
+
+import pytest
+
+from atomic_file import atomic_write
+
+
+def test_concurrent_writers_never_share_a_temp_file(tmp_path):
+    path = str(tmp_path / "out" / "snapshot.json")
+    barrier = threading.Barrier(8)
+    temp_paths = []
+
+    def write(i):
+        with atomic_write(path) as tmp, open(tmp, "w") as f:
+            temp_paths.append(tmp)
+            barrier.wait()
+            f.write(str(i) * 1000)
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(temp_paths)) == 8
+    with open(path) as f:
+        text = f.read()
+    assert len(text) == 1000 and len(set(text)) == 1
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["snapshot.json"]
+
+
+def test_failed_write_keeps_the_old_file(tmp_path):
+    path = tmp_path / "table.csv"
+    path.write_text("old")
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path)) as tmp, open(tmp, "w") as f:
+            f.write("partial")
+            raise RuntimeError
+    assert path.read_text() == "old"
+    assert [p.name for p in tmp_path.iterdir()] == ["table.csv"]
@@ -0,0 +1,33 @@
+import numpy as np
+
+from bitmap_index import BitmapIndex
+
+
+def test_add_grows_every_bitmap():
+    bitmaps = BitmapIndex()
+    bitmaps.load_labels("live", [0, 1, 2])
+    bitmaps.add("approved", 1)
+    bitmaps.add("live", 200)
+    assert len(bitmaps.get("live")) == len(bitmaps.get("approved"))
+    assert list(BitmapIndex.labels(bitmaps.get("live"))) == [0, 1, 2, 200]
+    assert list(BitmapIndex.labels(bitmaps.get("approved"))) == [1]
+
+
+def test_discard_and_discard_label():
+    bitmaps = BitmapIndex()
+    bitmaps.load("approved", np.array([True, False, True, True]))
+    bitmaps.load_labels(("category", "Retail"), [2, 3])
+    bitmaps.discard("approved", 0)
+    bitmaps.discard("approved", 10_000)  # Past the end: no-op
+    bitmaps.discard_label(3)
+    assert list(BitmapIndex.labels(bitmaps.get("approved"))) == [2]
+    assert list(BitmapIndex.labels(bitmaps.get(("category", "Retail")))) == [2]
+
+
+def test_filters_and_counts():
+    bitmaps = BitmapIndex()
+    bitmaps.load_labels("live", range(130))
+    bitmaps.load_labels("approved", range(0, 130, 2))
+    pending = bitmaps.get("live") & ~bitmaps.get("approved")
+    assert BitmapIndex.count(pending) == 65
+    assert BitmapIndex.count(bitmaps.get("missing")) == 0
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+import change_feed
+from change_feed import ChangeFeed
+from listings_cache import ListingsCache
+
+
+def _feed(tmp_path):
+    return ChangeFeed(str(tmp_path / "changes.log"), str(tmp_path / "state.json"))
+
+
+def test_sequence_numbers_span_feeds_on_one_log(tmp_path):
+    first, second = _feed(tmp_path), _feed(tmp_path)
+    seen = []
+    second.subscribe("follower", lambda change: seen.append(change["seq"]))
+    assert first.publish("listings", "insert", "1", {}, 0, 1) == 1
+    assert second.publish("listings", "insert", "2", {}, 1, 2) == 2
+    assert first.publish("listings", "insert", "3", {}, 2, 3) == 3
+    second.poll()
+    # The first feed's change is delivered before the second's own publish
+    assert seen == [1, 2, 3]
+
+
+def test_durable_subscriber_is_replayed_what_it_missed(tmp_path):
+    feed = _feed(tmp_path)
+    seen = []
+    feed.subscribe("durable", lambda change: seen.append(change["seq"]), durable=True)
+    feed.publish("listings", "insert", "1", {}, 0, 1)
+
+    writer = _feed(tmp_path)
+    writer.publish("listings", "insert", "2", {}, 1, 2)
+    writer.publish("listings", "insert", "3", {}, 2, 3)
+
+    restarted = _feed(tmp_path)
+    replayed = []
+    restarted.subscribe("durable", lambda change: replayed.append(change["seq"]), durable=True)
+    assert seen == [1]
+    assert replayed == [2, 3]
+    assert restarted.last_seen("durable") == 3
+
+
+def test_compaction_keeps_unseen_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(change_feed, "CHANGE_LOG_MAX_BYTES", 1000)
+    monkeypatch.setattr(change_feed, "CHANGE_LOG_KEEP", 2)
+    durable = _feed(tmp_path)
+    durable.subscribe("durable", lambda change: None, durable=True)
+    durable.publish("listings", "insert", "0", {}, 0, 1)
+
+    writer, follower = _feed(tmp_path), _feed(tmp_path)
+    seen = []
+    follower.subscribe("follower", lambda change: seen.append(change["seq"]))
+    for i in range(1, 40):
+        writer.publish("listings", "insert", str(i), {}, i, i + 1)
+        follower.poll()
+    assert seen == list(range(2, 41))
+
+    # The durable subscriber last saw 1, so everything after it was kept
+    restarted = _feed(tmp_path)
+    replayed = []
+    restarted.subscribe("durable", lambda change: replayed.append(change["seq"]), durable=True)
+    assert replayed == list(range(2, 41))
+
+    # Once it has caught up, compaction drops all but the latest changes
+    for i in range(40, 60):
+        writer.publish("listings", "insert", str(i), {}, i, i + 1)
+    with open(tmp_path / "changes.log") as f:
+        assert json.loads(f.readline())["seq"] > 40
+
+
+@pytest.mark.parametrize("publish_order", [(0, 1), (1, 0)])
+def test_cache_converges_whatever_order_racing_writes_publish(tmp_path, csv_storage, make_listing, publish_order):
+    cache = ListingsCache(csv_storage)
+    cache.get()
+    feed = _feed(tmp_path)
+    feed.subscribe("cache", cache.apply_change)
+
+    writes = [(listing_id, csv_storage.insert_listing(make_listing(listing_id))) for listing_id in ("A", "B")]
+    for i in publish_order:
+        listing_id, generations = writes[i]
+        feed.publish("listings", "insert", listing_id, make_listing(listing_id), *generations)
+    assert sorted(cache.get()["id"]) == ["A", "B"]
@@ -0,0 +1,40 @@
+import logging
+
+import pytest
+
+from ingest import EventBuffer
+
+
+@pytest.fixture
+def buffer(tmp_path):
+    buffer = EventBuffer(str(tmp_path / "views.csv"), ["listing_id"], max_events=1000, flush_interval=3600)
+    yield buffer
+    buffer.close()
+
+
+def test_failed_append_is_requeued(buffer, tmp_path, monkeypatch):
+    buffer.append({"listing_id": "1"})
+    buffer.append({"listing_id": "1"})
+
+    def fail(path, text):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(buffer, "_append", fail)
+    with pytest.raises(OSError):
+        buffer.flush()
+    assert buffer.count_pending("listing_id", "1") == 2
+    monkeypatch.undo()
+
+    assert buffer.flush() == 2
+    assert (tmp_path / "views.csv").read_text() == "listing_id\n1\n1\n"
+
+
+def test_failing_listener_is_logged_and_others_still_run(buffer, caplog):
+    seen = []
+    buffer.add_listener(lambda events: 1 / 0)
+    buffer.add_listener(seen.extend)
+    buffer.append({"listing_id": "1"})
+    with caplog.at_level(logging.ERROR, logger="ingest"):
+        buffer.flush()
+    assert seen == [{"listing_id": "1"}]
+    assert "listener" in caplog.text and "ZeroDivisionError" in caplog.text
@@ -0,0 +1,19 @@
+from listings_cache import ListingsCache
+
+
+def test_update_leaves_frames_already_handed_out_unchanged(csv_storage, make_listing):
+    csv_storage.insert_listing(make_listing("1", "Corner Coffee"))
+    csv_storage.insert_listing(make_listing("2", "Tea House", category="Food"))
+    cache = ListingsCache(csv_storage)
+    before = cache.get()
+
+    generations = csv_storage.update_listing("1", {"approved": True, "category": "Food"})
+    cache.apply_update("1", {"approved": True, "category": "Food"}, *generations)
+    assert list(before["approved"]) == [False, False]
+    assert list(before["category"]) == ["Retail", "Food"]
+
+    after = cache.get()
+    assert cache.reloads == 1
+    assert list(after["approved"]) == [True, False]
+    assert list(cache.by_category("Food")["id"]) == ["1"]
+    assert cache.category_counts(approved_only=False) == {"Food": 2}
@@ -0,0 +1,57 @@
+from premium_index import PremiumIndex
+from storage import PREMIUM_COLUMNS
+
+
+def _with_premium(storage, rows):
+    for row in rows:
+        storage.insert_premium(dict(zip(PREMIUM_COLUMNS, row)))
+    return storage
+
+
+def test_expired_and_unpaid_subscriptions_are_not_active(csv_storage):
+    storage = _with_premium(csv_storage, [
+        ("p1", "a", "basic", "2026-01-01", "2026-01-31", "paid"),
+        ("p2", "b", "basic", "2026-01-01", "2026-03-31", "paid"),
+        ("p3", "c", "basic", "2026-01-01", "2026-03-31", "pending"),
+    ])
+    index = PremiumIndex(storage)
+    assert index.active_ids("2026-01-15") == {"a", "b"}
+    assert index.active_ids("2026-02-01") == {"b"}
+    assert index.active_ids("2026-04-01") == frozenset()
+
+
+def test_latest_subscription_wins_over_an_expired_heap_entry(csv_storage):
+    storage = _with_premium(csv_storage, [
+        ("p1", "a", "basic", "2026-01-01", "2026-01-31", "paid"),
+        ("p2", "a", "basic", "2026-01-01", "2026-06-30", "paid"),
+    ])
+    index = PremiumIndex(storage)
+    assert index.active_ids("2026-02-01") == {"a"}
+
+
+def test_patched_insert_and_delete_keep_the_index_current(csv_storage):
+    index = PremiumIndex(csv_storage)
+    assert index.active_ids("2026-01-01") == frozenset()
+
+    record = dict(zip(PREMIUM_COLUMNS, ("p1", "a", "basic", "2026-01-01", "2026-01-31", "paid")))
+    index.apply_insert(record, *csv_storage.insert_premium(record))
+    assert index.active_ids("2026-01-15") == {"a"}
+    assert index.reloads == 1
+
+    _, premium_generations = csv_storage.delete_listing("a")
+    index.apply_delete_listing("a", *premium_generations)
+    assert index.active_ids("2026-01-15") == frozenset()
+    assert index.reloads == 1
+
+
+def test_change_from_another_generation_forces_a_reload(csv_storage):
+    index = PremiumIndex(csv_storage)
+    index.active_ids("2026-01-01")
+    first = dict(zip(PREMIUM_COLUMNS, ("p1", "a", "basic", "2026-01-01", "2026-01-31", "paid")))
+    second = dict(zip(PREMIUM_COLUMNS, ("p2", "b", "basic", "2026-01-01", "2026-01-31", "paid")))
+    first_generations = csv_storage.insert_premium(first)
+    second_generations = csv_storage.insert_premium(second)
+    # Published out of order: the second write does not start from the index's state
+    index.apply_insert(second, *second_generations)
+    index.apply_insert(first, *first_generations)
+    assert index.active_ids("2026-01-15") == {"a", "b"}
@@ -0,0 +1,52 @@
+import pandas as pd
+
+from search_index import SearchIndex
+
+
+def _index(*records):
+    return SearchIndex.from_frame(pd.DataFrame(list(records)))
+
+
+def test_search_matches_prefixes_and_ands_terms(make_listing):
+    index = _index(make_listing("1", "Corner Coffee", "fresh roasted beans"), make_listing("2", "Tea House", "loose leaf tea"))
+    assert index.search("cof") == {"1"}
+    assert index.search("coffee beans") == {"1"}
+    assert index.search("coffee tea") == set()
+    assert index.search("coffee OR tea") == {"1", "2"}
+
+
+def test_add_reindexes_and_remove_drops_vocabulary(make_listing):
+    index = _index(make_listing("1", "Corner Coffee"))
+    index.add(make_listing("1", "Corner Bakery"))
+    assert index.search("coffee") == set()
+    assert index.search("bakery") == {"1"}
+    assert index.expand("cof") == []
+
+    index.add(make_listing("2", "Bakery Two"))
+    index.remove("1")
+    assert index.search("bakery") == {"2"}
+    assert index.expand("corner") == []
+    assert len(index) == 1
+
+
+def test_incremental_index_ranks_like_a_rebuilt_one(make_listing):
+    records = [make_listing(str(i), f"Shop {i}", "coffee " * (i % 3 + 1) + "tea") for i in range(20)]
+    incremental = _index(*records[:10])
+    for record in records[10:]:
+        incremental.add(record)
+    incremental.remove("3")
+    rebuilt = _index(*(r for r in records if r["id"] != "3"))
+    assert incremental.rank("coffee OR tea", 5) == rebuilt.rank("coffee OR tea", 5)
+
+
+def test_rank_top_matches_full_sort_with_boosts_and_exclusions(make_listing):
+    records = [make_listing(str(i), f"Studio {i}", "yoga " * (i % 4 + 1) + ("pilates" if i % 5 == 0 else "")) for i in range(50)]
+    index = _index(*records)
+    boosts = {"7": 1.5, "12": 1.5}
+    total, top = index.rank("yoga OR pilates", 50, boosts=boosts, exclude={"0"})
+    assert total == 49
+    for limit in (1, 5, 20):
+        limited_total, limited = index.rank("yoga OR pilates", limit, boosts=boosts, exclude={"0"})
+        assert limited_total == total
+        assert [listing_id for listing_id, _ in limited] == [listing_id for listing_id, _ in top[:limit]]
+    assert all(listing_id != "0" for listing_id, _ in top)
@@ -0,0 +1,64 @@
+import pytest
+
+from conftest import DEFAULT_CATEGORIES
+from storage import PREMIUM_COLUMNS, SQLiteStorage
+
+
+def _premium(premium_id, listing_id):
+    return dict(zip(PREMIUM_COLUMNS, (premium_id, listing_id, "basic", "2026-01-01", "2026-01-31", "paid")))
+
+
+@pytest.fixture
+def sqlite_storage(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "directory.db"))
+    storage.initialize(DEFAULT_CATEGORIES)
+    return storage
+
+
+@pytest.fixture(params=["csv", "sqlite"])
+def storage(request, csv_storage, sqlite_storage):
+    return csv_storage if request.param == "csv" else sqlite_storage
+
+
+def test_round_trip(storage, make_listing):
+    assert list(storage.read_categories()["name"]) == ["Retail"]
+    before, after = storage.insert_listing(make_listing("1", "Corner Coffee"))
+    assert before != after == storage.generation()
+    storage.insert_listing(make_listing("2", "Tea House"))
+
+    generations = storage.update_listing("1", {"approved": True, "name": "Corner Cafe"})
+    assert generations[1] == storage.generation()
+    listings = storage.read_listings()
+    assert list(listings["id"]) == ["1", "2"]
+    assert list(listings["name"]) == ["Corner Cafe", "Tea House"]
+    assert list(listings["approved"]) == [True, False]
+
+    premium_before, premium_after = storage.insert_premium(_premium("p1", "1"))
+    assert premium_before != premium_after == storage.premium_generation()
+    storage.insert_premium(_premium("p2", "2"))
+
+    (before, after), (premium_before, premium_after) = storage.delete_listing("1")
+    assert before != after == storage.generation()
+    assert premium_before != premium_after == storage.premium_generation()
+    assert list(storage.read_listings()["id"]) == ["2"]
+    assert list(storage.read_premium()["listing_id"]) == ["2"]
+
+
+def test_sqlite_imports_csv_tables_once(tmp_path, csv_storage, make_listing):
+    csv_storage.insert_listing(make_listing("1", approved=True))
+    csv_storage.insert_premium(_premium("p1", "1"))
+    db_file = str(tmp_path / "directory.db")
+
+    storage = SQLiteStorage(db_file, import_from=csv_storage)
+    storage.initialize(DEFAULT_CATEGORIES)
+    assert list(storage.read_listings()["id"]) == ["1"]
+    assert list(storage.read_listings()["approved"]) == [True]
+    assert list(storage.read_premium()["id"]) == ["p1"]
+
+    storage.delete_listing("1")
+    # A restart must not import the stale CSV tables into the emptied database
+    restarted = SQLiteStorage(db_file, import_from=csv_storage)
+    restarted.initialize(DEFAULT_CATEGORIES)
+    assert restarted.read_listings().empty
+    assert restarted.read_premium().empty
+    assert list(restarted.read_categories()["name"]) == ["Retail"]
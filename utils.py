@@ -1,78 +1,29 @@
 import streamlit as st
-import pandas as pd
 import os
+import sys
 from datetime import datetime
 import hashlib
 import re
+from ingest import get_page_view_buffer
+from view_counts import get_view_counter
+from instrumentation import instrument_module
+from metrics_exporter import start_metrics_exporter
+import streamlit.components.v1 as components
+
+THEME_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "components", "theme")
+# Changes whenever theme.css changes, so cached copies are never stale
+with open(os.path.join(THEME_DIR, "theme.css"), "rb") as _theme_file:
+    THEME_VERSION = hashlib.md5(_theme_file.read()).hexdigest()[:12]
+_theme_loader = components.declare_component("theme", path=THEME_DIR)
 
 def apply_page_styling():
-    """Apply consistent styling to Streamlit pages."""
-    st.markdown("""
-    <style>
-        /* Button styling */
-        div.stButton > button:first-child {
-            background-color: #4361EE;
-            color: white;
-            border-radius: 4px;
-            padding: 0.5rem 1rem;
-            border: none;
-            text-align: center;
-            text-decoration: none;
-            display: inline-block;
-            font-size: 16px;
-            margin: 4px 2px;
-            transition-duration: 0.4s;
-            cursor: pointer;
-        }
-        div.stButton > button:hover {
-            background-color: #3A56D4;
-        }
-        
-        /* Header styling */
-        h1, h2, h3, h4 {
-            font-family: 'sans-serif';
-            font-weight: 600;
-            color: #212529;
-        }
-        h1 {
-            border-bottom: 2px solid #4361EE;
-            padding-bottom: 10px;
-            margin-bottom: 20px;
-        }
-        
-        /* Card styling */
-        .card {
-            border: 1px solid #e0e0e0;
-            border-radius: 10px;
-            padding: 20px;
-            margin-bottom: 20px;
-            background-color: #FFFFFF;
-            box-shadow: 0 2px 4px rgba(0,0,0,0.05);
-            transition: transform 0.2s, box-shadow 0.2s;
-        }
-        .card:hover {
-            transform: translateY(-5px);
-            box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-        }
-        
-        /* Form styling */
-        div.stTextInput > div > div > input {
-            border-radius: 4px;
-            border: 1px solid #e0e0e0;
-            padding: 10px;
-        }
-        div.stTextInput > div > div > input:focus {
-            border-color: #4361EE;
-            box-shadow: 0 0 0 0.2rem rgba(67, 97, 238, 0.25);
-        }
-        
-        /* Info box styling */
-        div.stAlert > div {
-            border-radius: 10px;
-            padding: 15px;
-        }
-    </style>
-    """, unsafe_allow_html=True)
+    """Apply consistent styling to Streamlit pages.
+    
+    The theme lives in components/theme/theme.css and is linked into the
+    page by a zero-height component, so the browser fetches and caches it
+    once instead of every rerun carrying the CSS.
+    """
+    _theme_loader(version=THEME_VERSION, key="theme", default=None)
 
 def is_valid_url(url):
     """Check if URL is valid."""
@@ -100,32 +51,59 @@ def verify_admin(username, password):
 
 def track_page_view(listing_id, listing_type="standard"):
     """Track a page view for analytics."""
-    analytics_file = "data/analytics.csv"
-    
-    # Create analytics file if it doesn't exist
-    if not os.path.exists(analytics_file):
-        analytics_df = pd.DataFrame(columns=["timestamp", "listing_id", "listing_type"])
-        analytics_df.to_csv(analytics_file, index=False)
-    
-    # Load existing analytics
-    analytics_df = pd.read_csv(analytics_file)
-    
-    # Add new page view
-    new_view = {
+    # Events are buffered and appended to the daily partitions in data/analytics in batches
+    get_page_view_buffer().append({
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "listing_id": listing_id,
         "listing_type": listing_type
-    }
-    
-    analytics_df = pd.concat([analytics_df, pd.DataFrame([new_view])], ignore_index=True)
-    analytics_df.to_csv(analytics_file, index=False)
+    })
 
 def get_listing_views(listing_id):
     """Get the number of views for a specific listing."""
-    analytics_file = "data/analytics.csv"
+    counter = get_view_counter()
+    # Picks up views written by other processes; reads only appended bytes
+    counter.refresh()
+    # Views still buffered are counted without forcing a one-event flush
+    return counter.get(listing_id) + get_page_view_buffer().count_pending("listing_id", listing_id)
+
+def get_page_offset(key, page_size, total=None):
+    """Get the row offset of the current page of a paginated list.
+    
+    With ``total``, a page past the end (e.g. after deletions) is moved
+    back to the last page.
+    """
+    state_key = f"page_{key}"
+    page = st.session_state.get(state_key, 0)
+    if total is not None:
+        page = max(0, min(page, (total - 1) // page_size))
+        st.session_state[state_key] = page
+    return page * page_size
+
+def render_pagination(total, page_size, key):
+    """Render previous/next controls for a paginated list."""
+    state_key = f"page_{key}"
+    pages = max(1, -(-total // page_size))
+    page = max(0, min(st.session_state.get(state_key, 0), pages - 1))
+    if pages <= 1:
+        return
     
-    if not os.path.exists(analytics_file):
-        return 0
+    def move(step):
+        st.session_state[state_key] = page + step
     
-    analytics_df = pd.read_csv(analytics_file)
-    return len(analytics_df[analytics_df["listing_id"] == listing_id])
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        st.button("← Previous", key=f"{state_key}_prev", disabled=page == 0,
+                  on_click=move, args=(-1,), use_container_width=True)
+    with col2:
+        first = page * page_size + 1
+        last = min(total, first + page_size - 1)
+        st.markdown(f"<p style='text-align: center;'>Page {page + 1} of {pages} ({first}–{last} of {total})</p>", unsafe_allow_html=True)
+    with col3:
+        st.button("Next →", key=f"{state_key}_next", disabled=page >= pages - 1,
+                  on_click=move, args=(1,), use_container_width=True)
+
+# Time the public functions above when instrumentation is enabled
+instrument_module(sys.modules[__name__])
+
+# Serve or write Prometheus metrics when configured
+start_metrics_exporter()
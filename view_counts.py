@@ -0,0 +1,103 @@
+import atexit
+import csv
+import io
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+from analytics_partitions import PAGE_VIEWS_DIR, PartitionTail
+from atomic_file import atomic_write
+from ingest import get_page_view_buffer
+
+VIEW_COUNTS_FILE = os.path.join(PAGE_VIEWS_DIR, "view_counts.json")
+
+# Save the snapshot at most this often (and at exit)
+SNAPSHOT_INTERVAL_SECONDS = float(os.environ.get("VIEW_COUNTS_SNAPSHOT_SECONDS", "60"))
+
+
+class ViewCounter:
+    """Total page views per listing, kept current from the partition tail.
+
+    The counts are saved to a small JSON snapshot together with the byte
+    offsets of the partitions they cover, so a restart restores the
+    snapshot and only folds the events written since.
+    """
+
+    def __init__(self, directory=PAGE_VIEWS_DIR, snapshot_file=VIEW_COUNTS_FILE):
+        self.snapshot_file = snapshot_file
+        self._lock = threading.Lock()
+        self._counts = Counter()
+        self._tail = PartitionTail(directory)
+        self._saved_at = time.monotonic()
+        self._dirty = False
+        self._load_snapshot()
+
+    def _load_snapshot(self):
+        """Restore counts and offsets from the snapshot, if there is one."""
+        try:
+            with open(self.snapshot_file) as f:
+                snapshot = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        self._counts = Counter(snapshot.get("counts", {}))
+        self._tail.offsets = {path: tuple(state) for path, state in snapshot.get("offsets", {}).items()}
+        self._tail.latest_day = snapshot.get("latest_day", "")
+
+    def save(self):
+        """Write the snapshot atomically."""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {
+                "counts": dict(self._counts),
+                # Copied under the lock, as refresh() moves the offsets on
+                "offsets": dict(self._tail.offsets),
+                "latest_day": self._tail.latest_day,
+            }
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        with atomic_write(self.snapshot_file) as tmp_path, open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+
+    def refresh(self):
+        """Count the events appended to the partitions since the last refresh."""
+        with self._lock:
+            chunks = self._tail.read_new()
+            if chunks is None:
+                # A partition was replaced or truncated; count everything again
+                self._counts = Counter()
+                self._tail.reset()
+                chunks = self._tail.read_new() or []
+            for text in chunks:
+                for row in csv.reader(io.StringIO(text)):
+                    if len(row) >= 2 and row[0] != "timestamp":
+                        self._counts[row[1]] += 1
+                        self._dirty = True
+            due = self._dirty and time.monotonic() - self._saved_at >= SNAPSHOT_INTERVAL_SECONDS
+        if due:
+            self.save()
+
+    def get(self, listing_id):
+        """Get the number of views of a listing."""
+        return self._counts.get(str(listing_id), 0)
+
+
+_view_counter = None
+_view_counter_lock = threading.Lock()
+
+
+def get_view_counter():
+    """Get the process-wide view counter, restoring it on first use.
+
+    The counter is refreshed by the page view flusher after each batch.
+    """
+    global _view_counter
+    with _view_counter_lock:
+        if _view_counter is None:
+            _view_counter = ViewCounter()
+            _view_counter.refresh()
+            get_page_view_buffer().add_listener(lambda events: _view_counter.refresh())
+            atexit.register(_view_counter.save)
+        return _view_counter